@@ -1,59 +1,191 @@
 import os
+import json
+import time
 import uuid
-import shutil
 import asyncio
+import functools
 
+from typing import Optional
 from contextlib import asynccontextmanager
+from concurrent.futures.process import BrokenProcessPool
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import RedirectResponse, FileResponse, JSONResponse
+from fastapi.responses import RedirectResponse, FileResponse, JSONResponse, Response, PlainTextResponse
 
 from api.my_env import my_env
-from src.wound_image import WoundImage
+from src.model_registry import model_registry
+from api.metrics import stage_seconds, request_seconds, gauge
+from api.tasks import predict_pwat, render_format, render_formats, render_job, encode_masks, measure_image, init_worker, close_worker, cache_stats
+from api.inference_pool import InferencePool, QueueFullError, PROCESS
+from api.jobs import Job, JobQueue, RUNNING, DONE, FAILED
+from api.janitor import Janitor, LeasedFileResponse
+from src.results_store import ResultsStore
+from src.wound_image import ImageDecodeError
 
 TEMPLATES = os.path.join(
     os.path.dirname(
         os.path.abspath(__file__)),
     "templates")
-TEMP_DIR = os.path.join("output", "api", "temp")
 VALID_EXTENSIONS = {".png", ".jpg", ".jpeg"}
-EXPECTED_FORMATS = {
-    "segmentation_mask": "save_segmentation_mask",
-    "segmentation_semantic": "save_segmentation_semantic",
-    "mask_wound": "save_mask_wound",
-    "mask_peri_wound": "save_mask_peri_wound",
-    "masked_wound": "save_masked_wound",
-    "masked_peri_wound": "save_masked_peri_wound",
-    "pwat_estimation": "save_pwat_estimation",
-}
+EXPECTED_FORMATS = (
+    "segmentation_mask",
+    "segmentation_semantic",
+    "mask_wound",
+    "mask_peri_wound",
+    "masked_wound",
+    "masked_peri_wound",
+    "pwat_estimation",
+    "contact_sheet",
+)
+MASK_ENCODINGS = ("rle", "polygon")
 
+inference_pool = InferencePool(
+    kind=my_env.pool,
+    workers=my_env.workers,
+    queue_size=my_env.queue_size,
+    timeout=my_env.timeout)
 
-def gen_id():
-    return str(uuid.uuid4())
+janitor = Janitor(
+    root_dir=my_env.job_dir,
+    max_bytes=my_env.temp_max_bytes,
+    interval=my_env.janitor_interval)
+
+job_queue = JobQueue(
+    janitor=janitor,
+    workers=my_env.job_workers,
+    queue_size=my_env.job_queue_size,
+    retention=my_env.job_retention)
 
+# Results of the processed images, opened at startup
+results_store: Optional[ResultsStore] = None
 
-async def auto_delete_file(file_path: str, delay: float):
-    """Delete the file after `delay` seconds."""
-    await asyncio.sleep(delay)
-    if os.path.exists(file_path):
-        os.remove(file_path)
 
+def gen_id():
+    return str(uuid.uuid4())
 
-async def auto_delete_dir(dir_path: str, delay: float):
-    """Delete the directory after `delay` seconds."""
-    await asyncio.sleep(delay)
-    if os.path.exists(dir_path):
-        shutil.rmtree(dir_path)
+
+async def run_inference(fn, *args, filename: str):
+    """Run `fn` on the inference pool, translating saturation, lost workers, timeouts and undecodable images to HTTP errors, naming the image by its uploaded `filename` rather than its temporary name."""
+    try:
+        return await inference_pool.run(fn, *args)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Server is busy, retry later.", headers={
+                            "Retry-After": str(my_env.retry_after)})
+    except BrokenProcessPool:
+        # The pool already restarts its workers
+        raise HTTPException(status_code=503, detail="A worker stopped while processing, retry later.", headers={
+                            "Retry-After": str(my_env.retry_after)})
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Processing took longer than {my_env.timeout} seconds.")
+    except ImageDecodeError:
+        raise HTTPException(status_code=400,
+                            detail=f"File {filename} could not be decoded as an image.")
+
+
+def record_timings(request: Request, endpoint: str, expected_format: str,
+                   upload_seconds: float, inference_seconds: float,
+                   stages: dict[str, float]) -> dict[str, float]:
+    """Record the stage and request durations of a successful upload in the metrics, and return every stage with the upload and the time spent around the worker."""
+    timings = {"upload": upload_seconds, **stages,
+               # Waiting for a worker and passing the image to it
+               "pool": max(0.0, inference_seconds - sum(stages.values()))}
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, stage)
+    request_seconds.observe(time.perf_counter() - request.state.start,
+                            endpoint, expected_format)
+    return timings
+
+
+def timing_headers(request: Request, timings: dict[str, float],
+                   memory: Optional[dict]) -> dict[str, str]:
+    """Headers breaking down the duration of an upload: Server-Timing and X-Stage-Durations in milliseconds, and X-Memory-Delta in bytes when API_DEBUG_MEMORY is set."""
+    durations = {stage: round(seconds * 1000, 3)
+                 for stage, seconds in timings.items()}
+    durations["total"] = round(
+        (time.perf_counter() - request.state.start) * 1000, 3)
+    headers = {
+        "Server-Timing": ", ".join(f"{stage};dur={ms}" for stage, ms in durations.items()),
+        "X-Stage-Durations": json.dumps(durations, separators=(",", ":")),
+        # Lets the browsers of other origins read Server-Timing
+        "Timing-Allow-Origin": "*",
+    }
+    if memory is not None:
+        headers["X-Memory-Delta"] = json.dumps(memory, separators=(",", ":"))
+    return headers
+
+
+async def store_result(image: str, image_hash: str, patient_id: Optional[str],
+                       wound_id: Optional[str], clinical_pwat: Optional[float],
+                       predicted_pwat: float) -> None:
+    """Add the result of a processed image to the results store, on a thread so the SQLite commit does not block the event loop."""
+    await run_in_threadpool(results_store.add, [{
+        "image_hash": image_hash,
+        "image": image,
+        "patient_id": patient_id,
+        "wound_id": wound_id,
+        "clinical_pwat": clinical_pwat,
+        "predicted_pwat": predicted_pwat,
+        "working_scale": my_env.working_scale,
+        "model_version": model_registry.version(),
+        "source": "api",
+    }])
+
+
+async def run_job(job: Job) -> float:
+    """Process a job on the inference pool, queued until the pool has a free slot instead of failing while it is busy, and return its predicted PWAT."""
+    while inference_pool.free_slots() < 1:
+        await asyncio.sleep(my_env.retry_after)
+    # Submitted without awaiting in between, no other job or request can
+    # take the slot
+    job.status = RUNNING
+    try:
+        predicted_pwat, stages, _ = await inference_pool.run(
+            render_job, job.input_path, job.dir, job.expected_formats,
+            job.file_extension, my_env.is_dev(), job.clinical_pwat,
+            timeout=my_env.job_timeout)
+    except ImageDecodeError:
+        # Named as uploaded, not by the path of the job directory
+        raise ImageDecodeError(
+            f"File {job.image} could not be decoded as an image.") from None
+    for stage, seconds in stages.items():
+        stage_seconds.observe(seconds, stage)
+    await store_result(job.image, job.image_hash, job.patient_id, job.wound_id,
+                       job.clinical_pwat, predicted_pwat)
+    return predicted_pwat
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events in a single function."""
-    os.makedirs(TEMP_DIR, exist_ok=True)
+    global results_store
+    results_store = ResultsStore(my_env.results_db)
+    # Also in this process, so the stored results carry the model version of
+    # the workers
+    model_registry.configure(my_env.backend, my_env.model_path or None)
+    init = functools.partial(init_worker, my_env.is_dev(),
+                             my_env.batch_size, my_env.batch_wait_ms / 1000,
+                             my_env.cache_bytes, my_env.cache_dir, my_env.cache_disk_bytes,
+                             my_env.working_scale, my_env.debug_memory,
+                             my_env.graph_workers, my_env.backend, my_env.model_path)
+    if inference_pool.kind == PROCESS:
+        # Every worker process holds its own warm models
+        inference_pool.start(initializer=init)
+    else:
+        print(f"Models ready: {init()}")
+        inference_pool.start()
+    await inference_pool.warm_up()
+    janitor.start()
+    job_queue.start(run_job)
     yield  # here the app running
-    if os.path.exists(TEMP_DIR):
-        shutil.rmtree(TEMP_DIR)
+    await job_queue.shutdown()
+    await janitor.shutdown()
+    inference_pool.shutdown()
+    close_worker()
+    results_store.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -70,6 +202,13 @@ app.add_middleware(
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
 
+@app.middleware("http")
+async def stamp_start(request: Request, call_next):
+    """Stamp the arrival of a request, before its body is received."""
+    request.state.start = time.perf_counter()
+    return await call_next(request)
+
+
 @app.get("/", response_class=RedirectResponse)
 async def root():
     """
@@ -85,7 +224,42 @@ async def get_valid_extensions():
 
 @app.get("/expected_formats")
 async def get_expected_formats():
-    return list(EXPECTED_FORMATS.keys())
+    return list(EXPECTED_FORMATS)
+
+
+@app.get("/models")
+async def get_models():
+    """Loading statistics of the models held by the API process."""
+    return model_registry.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics of the API process in the Prometheus text format: stage and request histograms, queue depth, results cache and model loading."""
+    models = model_registry.stats()
+    cache = cache_stats() or {}
+    return PlainTextResponse("".join([
+        stage_seconds.render(),
+        request_seconds.render(),
+        gauge("deepskin_queue_depth", "Images running or waiting for a worker.",
+              inference_pool.depth),
+        gauge("deepskin_queue_capacity", "Images that can run or wait before uploads are rejected.",
+              my_env.workers + my_env.queue_size),
+        gauge("deepskin_cache_hits_total", "Results answered by the cache.",
+              cache.get("hits"), kind="counter"),
+        gauge("deepskin_cache_misses_total", "Results not answered by the cache.",
+              cache.get("misses"), kind="counter"),
+        gauge("deepskin_cache_hit_ratio", "Fraction of the results answered by the cache.",
+              cache.get("hit_rate")),
+        gauge("deepskin_cache_bytes", "Memory held by the cached results.",
+              cache.get("bytes")),
+        gauge("deepskin_cache_disk_bytes", "Disk space held by the cached results, as of the last write.",
+              cache.get("disk_bytes")),
+        gauge("deepskin_model_load_seconds", "Seconds to load the segmentation model.",
+              models["load_time"]),
+        gauge("deepskin_model_warm_up_seconds", "Seconds of the first forward passes.",
+              models["warm_up_time"]),
+    ]), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/upload")
@@ -94,9 +268,12 @@ async def get_upload():
 
 
 @app.post("/upload")
-async def upload_image(expected_format: str,
-                       file: UploadFile = File(...)) -> FileResponse:
-    """Upload and process an image based on the expected format. In the header, x-predicted-pwat is the predicted PWAT score."""
+async def upload_image(request: Request, expected_format: str,
+                       file: UploadFile = File(...),
+                       patient_id: Optional[str] = None,
+                       wound_id: Optional[str] = None,
+                       clinical_pwat: Optional[float] = Query(None, ge=0)) -> Response:
+    """Upload and process an image based on the expected format, storing its result under the patient and wound if given. In the header, x-predicted-pwat is the predicted PWAT score."""
     file_ext = os.path.splitext(file.filename)[1].lower()
 
     if file_ext not in VALID_EXTENSIONS:
@@ -105,25 +282,62 @@ async def upload_image(expected_format: str,
     if expected_format not in EXPECTED_FORMATS:
         raise HTTPException(status_code=400, detail=f"Invalid expected format. Use one of: {await get_expected_formats()}")
 
-    file_uuid = gen_id()
-    file_path = os.path.join(TEMP_DIR, f"{file_uuid}{file_ext}")
-    file_new_path = os.path.join(TEMP_DIR, f"{file_uuid}_processed{file_ext}")
+    image_data = await file.read()
+    upload_seconds = time.perf_counter() - request.state.start
+
+    # Process the image in memory
+    start = time.perf_counter()
+    content, predicted_pwat, stages, memory = await run_inference(render_format, f"{gen_id()}{file_ext}", image_data, expected_format, file_ext, my_env.is_dev(), clinical_pwat, filename=file.filename)
+    timings = record_timings(request, "/upload", expected_format, upload_seconds,
+                             time.perf_counter() - start, stages)
+    await store_result(file.filename, ResultsStore.hash_bytes(image_data), patient_id,
+                       wound_id, clinical_pwat, predicted_pwat)
+
+    return Response(content=content, media_type=file.content_type, headers={
+                    "predicted_pwat": str(predicted_pwat),
+                    **timing_headers(request, timings, memory)})
+
+
+@app.post("/upload/formats")
+async def upload_image_formats(request: Request,
+                               file: UploadFile = File(...),
+                               expected_formats: Optional[list[str]] = Query(
+                                   None),
+                               image_format: str = ".png",
+                               quality: Optional[int] = Query(
+                                   None, ge=0, le=100),
+                               patient_id: Optional[str] = None,
+                               wound_id: Optional[str] = None,
+                               clinical_pwat: Optional[float] = Query(None, ge=0)) -> Response:
+    """Upload and process an image once and return a zip of the expected formats (all if none) with a summary.json holding the predicted PWAT and mask statistics, storing its result under the patient and wound if given. quality only applies to .jpg/.jpeg."""
+    file_ext = os.path.splitext(file.filename)[1].lower()
 
-    # Save the uploaded file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    if file_ext not in VALID_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid image format. Use one of: {await get_valid_extensions()}.")
 
-    # Process the image
-    wi = WoundImage(image_path=file_path, logging=my_env.is_dev())
-    predicted_pwat = wi.get_predicted_pwat()
-    getattr(wi, EXPECTED_FORMATS[expected_format])(file_new_path)
+    if image_format not in VALID_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid output image format. Use one of: {await get_valid_extensions()}.")
 
-    # Schedule auto-delete
-    asyncio.create_task(auto_delete_file(file_path, delay=1))
-    asyncio.create_task(auto_delete_file(file_new_path, delay=1))
+    expected_formats = expected_formats or list(EXPECTED_FORMATS)
+    for expected_format in expected_formats:
+        if expected_format not in EXPECTED_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid expected format. Use one of: {await get_expected_formats()}")
 
-    return FileResponse(file_new_path, media_type=file.content_type, headers={
-                        "predicted_pwat": str(predicted_pwat)})
+    image_data = await file.read()
+    upload_seconds = time.perf_counter() - request.state.start
+
+    # Process the image once for every format
+    start = time.perf_counter()
+    content, predicted_pwat, stages, memory = await run_inference(render_formats, f"{gen_id()}{file_ext}", image_data, list(dict.fromkeys(expected_formats)), image_format, quality, my_env.is_dev(), clinical_pwat, filename=file.filename)
+    timings = record_timings(request, "/upload/formats", "zip", upload_seconds,
+                             time.perf_counter() - start, stages)
+    await store_result(file.filename, ResultsStore.hash_bytes(image_data), patient_id,
+                       wound_id, clinical_pwat, predicted_pwat)
+
+    return Response(content=content, media_type="application/zip", headers={
+                    "predicted_pwat": str(predicted_pwat),
+                    "Content-Disposition": 'attachment; filename="formats.zip"',
+                    **timing_headers(request, timings, memory)})
 
 
 @app.get("/upload/pwat")
@@ -132,24 +346,195 @@ async def get_upload_pwat():
 
 
 @app.post("/upload/pwat")
-async def pwat_from_image(file: UploadFile = File(...)) -> JSONResponse:
-    """Upload and process an image to get the predicted PWAT score."""
+async def pwat_from_image(request: Request, file: UploadFile = File(...),
+                          patient_id: Optional[str] = None,
+                          wound_id: Optional[str] = None,
+                          clinical_pwat: Optional[float] = Query(None, ge=0)) -> JSONResponse:
+    """Upload and process an image to get the predicted PWAT score, storing its result under the patient and wound if given."""
     file_ext = os.path.splitext(file.filename)[1].lower()
 
     if file_ext not in VALID_EXTENSIONS:
         raise HTTPException(status_code=400, detail=f"Invalid image format. Use one of: {await get_valid_extensions()}.")
 
-    file_path = os.path.join(TEMP_DIR, f"{gen_id()}{file_ext}")
+    image_data = await file.read()
+    upload_seconds = time.perf_counter() - request.state.start
+
+    # Process the image in memory
+    start = time.perf_counter()
+    predicted_pwat, stages, memory = await run_inference(predict_pwat, f"{gen_id()}{file_ext}", image_data, my_env.is_dev(), filename=file.filename)
+    timings = record_timings(request, "/upload/pwat", "", upload_seconds,
+                             time.perf_counter() - start, stages)
+    await store_result(file.filename, ResultsStore.hash_bytes(image_data), patient_id,
+                       wound_id, clinical_pwat, predicted_pwat)
 
-    # Save the uploaded file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    return JSONResponse(content={"predicted_pwat": predicted_pwat},
+                        headers=timing_headers(request, timings, memory))
 
-    # Process the image
-    wi = WoundImage(image_path=file_path, logging=my_env.is_dev())
-    predicted_pwat = wi.get_predicted_pwat()
 
-    # Schedule auto-delete
-    asyncio.create_task(auto_delete_file(file_path, delay=1))
+@app.post("/upload/masks")
+async def masks_from_image(request: Request, file: UploadFile = File(...),
+                           encoding: str = "rle",
+                           tolerance: float = Query(0.0, ge=0)) -> JSONResponse:
+    """Upload and segment an image to get its wound, body, background and peri-wound masks as JSON, run-length encoded (rle, COCO uncompressed RLE in column order) or as outer polygons (polygon, simplified within tolerance pixels), without predicting the PWAT."""
+    file_ext = os.path.splitext(file.filename)[1].lower()
+
+    if file_ext not in VALID_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid image format. Use one of: {await get_valid_extensions()}.")
+
+    if encoding not in MASK_ENCODINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mask encoding. Use one of: {', '.join(MASK_ENCODINGS)}.")
+
+    image_data = await file.read()
+    upload_seconds = time.perf_counter() - request.state.start
+
+    # Process the image in memory
+    start = time.perf_counter()
+    content, stages, memory = await run_inference(encode_masks, f"{gen_id()}{file_ext}", image_data, encoding, tolerance, my_env.is_dev(), filename=file.filename)
+    timings = record_timings(request, "/upload/masks", encoding, upload_seconds,
+                             time.perf_counter() - start, stages)
+
+    return JSONResponse(
+        content=content, headers=timing_headers(request, timings, memory))
+
+
+@app.post("/upload/morphometrics")
+async def morphometrics_from_image(request: Request, file: UploadFile = File(...),
+                                   pixel_size: Optional[float] = Query(None, gt=0)) -> JSONResponse:
+    """Upload and segment an image to get the area, perimeter, bounding box and color mean, standard deviation and histogram of its wound and peri-wound areas as JSON, in millimeters too given the pixel_size in millimeters, without predicting the PWAT."""
+    file_ext = os.path.splitext(file.filename)[1].lower()
+
+    if file_ext not in VALID_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid image format. Use one of: {await get_valid_extensions()}.")
 
-    return JSONResponse(content={"predicted_pwat": predicted_pwat})
+    image_data = await file.read()
+    upload_seconds = time.perf_counter() - request.state.start
+
+    # Process the image in memory
+    start = time.perf_counter()
+    content, stages, memory = await run_inference(measure_image, f"{gen_id()}{file_ext}", image_data, pixel_size, my_env.is_dev(), filename=file.filename)
+    timings = record_timings(request, "/upload/morphometrics", "", upload_seconds,
+                             time.perf_counter() - start, stages)
+
+    return JSONResponse(
+        content=content, headers=timing_headers(request, timings, memory))
+
+
+@app.post("/jobs", status_code=202)
+async def submit_jobs(files: list[UploadFile] = File(...),
+                      expected_formats: Optional[list[str]] = Query(None),
+                      image_format: str = ".png",
+                      patient_id: Optional[str] = None,
+                      wound_id: Optional[str] = None,
+                      clinical_pwat: Optional[float] = Query(None, ge=0)) -> JSONResponse:
+    """Upload one or several images and return a job per image right away, processed in the background into the expected formats (all if none), storing their results under the patient and wound if given. Poll GET /jobs/{job_id} for its status."""
+    for file in files:
+        if os.path.splitext(file.filename)[1].lower() not in VALID_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid image format of {file.filename}. Use one of: {await get_valid_extensions()}.")
+
+    if image_format not in VALID_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid output image format. Use one of: {await get_valid_extensions()}.")
+
+    expected_formats = expected_formats or list(EXPECTED_FORMATS)
+    for expected_format in expected_formats:
+        if expected_format not in EXPECTED_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid expected format. Use one of: {await get_expected_formats()}")
+
+    uploads = [(file.filename, await file.read()) for file in files]
+
+    if not await janitor.has_room(sum(len(image_data) for _, image_data in uploads)):
+        raise HTTPException(status_code=507, detail="Temporary storage is full, retry later.", headers={
+                            "Retry-After": str(my_env.retry_after)})
+
+    # All the images are queued or none, checked last so no other request can
+    # fill the queue before the submit reserves its slots
+    if job_queue.free_slots() < len(uploads):
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later.", headers={
+                            "Retry-After": str(my_env.retry_after)})
+
+    jobs = await job_queue.submit(uploads, list(dict.fromkeys(expected_formats)), image_format,
+                                  patient_id, wound_id, clinical_pwat)
+    return JSONResponse(status_code=202, content={
+                        "jobs": [job.to_dict() for job in jobs]})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> JSONResponse:
+    """Status, progress and predicted PWAT of a job, with the URLs of its formats once done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404,
+                            detail=f"Job {job_id} not found or expired.")
+    return JSONResponse(content=job.to_dict())
+
+
+@app.get("/jobs/{job_id}/artifacts/{expected_format}")
+async def get_job_artifact(
+        job_id: str, expected_format: str) -> LeasedFileResponse:
+    """Rendered expected format of a done job. In the header, predicted_pwat is the predicted PWAT score."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404,
+                            detail=f"Job {job_id} not found or expired.")
+    if expected_format not in job.expected_formats:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Format {expected_format} not requested. Use one of: {job.expected_formats}")
+    if job.status != DONE:
+        raise HTTPException(status_code=409,
+                            detail=f"Job {job_id} is {job.status}.")
+    media_type = "image/png" if job.file_extension == ".png" else "image/jpeg"
+    # The janitor keeps the file until it is sent or the client is gone
+    return LeasedFileResponse(janitor, job.dir, job.artifact_path(expected_format),
+                              media_type=media_type, headers={
+                                  "predicted_pwat": str(job.predicted_pwat)})
+
+
+@app.delete("/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str) -> Response:
+    """Drop a finished job before its retention ends, its files are removed once the downloads in progress are done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404,
+                            detail=f"Job {job_id} not found or expired.")
+    if job.status not in (DONE, FAILED):
+        raise HTTPException(status_code=409,
+                            detail=f"Job {job_id} is {job.status}.")
+    await job_queue.remove(job)
+    return Response(status_code=204)
+
+
+@app.get("/results/series")
+async def get_results_series(patient_id: str, wound_id: Optional[str] = None,
+                             since: Optional[str] = None, until: Optional[str] = None,
+                             limit: int = Query(1000, ge=1, le=10000)) -> JSONResponse:
+    """PWAT time series of a patient, or of one of their wounds, from the indexed results store. since and until are ISO 8601 timestamps, UTC if they have no offset, or dates (e.g. 2026-01-31), both included."""
+    try:
+        results = await run_in_threadpool(results_store.series, patient_id, wound_id, since, until, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid since or until, use an ISO 8601 timestamp or date: {e}")
+    return JSONResponse(content={
+        "patient_id": patient_id,
+        "wound_id": wound_id,
+        "points": [{
+            "timestamp": result["timestamp"],
+            "wound_id": result["wound_id"],
+            "predicted_pwat": result["predicted_pwat"],
+            "clinical_pwat": result["clinical_pwat"],
+            "image": result["image"],
+            "image_hash": result["image_hash"],
+        } for result in results],
+    })
+
+
+@app.get("/results/{image_hash}")
+async def get_results_by_hash(image_hash: str) -> JSONResponse:
+    """Every stored result of an image, by the blake2b-128 hash of its content."""
+    results = await run_in_threadpool(results_store.by_hash, image_hash)
+    if not results:
+        raise HTTPException(status_code=404,
+                            detail=f"No result for image {image_hash}.")
+    return JSONResponse(content={"results": results})
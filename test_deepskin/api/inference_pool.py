@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+import multiprocessing
+
+from typing import Any, Callable, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+class QueueFullError(Exception):
+    """Raised when the inference pool has no free slot for a new job."""
+
+
+def _worker_id() -> tuple[int, int]:
+    """Identify the worker running a job, held briefly so each job of a round lands on another worker."""
+    time.sleep(0.05)
+    return os.getpid(), threading.get_ident()
+
+
+class InferencePool:
+    """
+    A bounded worker pool that runs blocking inference off the event loop.
+
+    At most `workers` jobs run at the same time and at most `queue_size`
+    more wait for a free worker. Any further submission is rejected with a
+    `QueueFullError` so the API can answer with a backpressure status instead
+    of piling up work it cannot finish in time.
+
+    Attributes:
+        kind (str): Either "thread" or "process".
+        workers (int): Number of concurrent workers.
+        queue_size (int): Number of jobs allowed to wait for a worker.
+        timeout (float): Seconds a caller waits for a job before giving up.
+    """
+
+    def __init__(self, kind: str, workers: int,
+                 queue_size: int, timeout: float):
+        """
+        Initialize the InferencePool object.
+
+        Args:
+            kind (str): Either "thread" or "process".
+            workers (int): Number of concurrent workers.
+            queue_size (int): Number of jobs allowed to wait for a worker.
+            timeout (float): Seconds a caller waits for a job before giving up.
+
+        Raises:
+            ValueError: If the kind is unknown or a size is not positive.
+        """
+        if kind not in (THREAD, PROCESS):
+            raise ValueError(
+                f"{kind} is not a valid pool kind, try {THREAD}/{PROCESS} instead.")
+        if workers < 1 or queue_size < 0 or timeout <= 0:
+            raise ValueError(
+                "Pool workers and timeout must be positive, queue size must not be negative.")
+
+        self.kind: str = kind
+        self.workers: int = workers
+        self.queue_size: int = queue_size
+        self.timeout: float = timeout
+
+        self._executor: Optional[Executor] = None
+        self._initializer: Optional[Callable[[], None]] = None
+        self._warming: Optional[asyncio.Task] = None
+        self._pending: int = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs currently running or waiting for a worker."""
+        return self._pending
+
+    def free_slots(self) -> int:
+        """
+        Get the number of jobs that can still be submitted.
+
+        Returns:
+            int: The free workers and places in the queue.
+        """
+        return self.workers + self.queue_size - self._pending
+
+    def start(self, initializer: Optional[Callable[[], None]] = None) -> None:
+        """
+        Start the underlying executor.
+
+        Args:
+            initializer (Callable | None): Called once in every worker when it starts.
+        """
+        self._initializer = initializer
+        if self.kind == PROCESS:
+            # TensorFlow is not fork-safe, workers start from a fresh
+            # interpreter
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(
+                    "spawn"),
+                initializer=initializer)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference",
+                initializer=initializer)
+
+    async def warm_up(self) -> None:
+        """
+        Start every worker and wait until each one ran its initializer.
+
+        Executors only start a worker when a job finds none idle, so without
+        this the first jobs would also pay the initializer, e.g. loading the
+        models of a worker process.
+
+        Raises:
+            RuntimeError: If the pool is not started.
+        """
+        if self._executor is None:
+            raise RuntimeError("Inference pool is not started.")
+        started: set[tuple[int, int]] = set()
+        while len(started) < self.workers:
+            futures = [self._executor.submit(_worker_id)
+                       for _ in range(self.workers)]
+            started.update(await asyncio.gather(*map(asyncio.wrap_future, futures)))
+
+    def shutdown(self) -> None:
+        """
+        Stop the underlying executor and drop the jobs still waiting.
+        """
+        if self._warming is not None:
+            self._warming.cancel()
+            self._warming = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any,
+                  timeout: Optional[float] = None) -> Any:
+        """
+        Run `fn(*args)` on a worker and wait for its result.
+
+        The slot is only given back once the job really finished, so a job that
+        timed out but still runs keeps counting against the queue bound.
+
+        Args:
+            fn (Callable): The blocking function, picklable for a process pool.
+            *args: Arguments passed to `fn`.
+            timeout (float | None): Seconds to wait instead of the pool `timeout`.
+
+        Returns:
+            Any: The value returned by `fn`.
+
+        Raises:
+            RuntimeError: If the pool is not started.
+            QueueFullError: If every worker is busy and the queue is full.
+            asyncio.TimeoutError: If the job did not finish in time.
+            BrokenProcessPool: If a worker process died, the pool then restarts its workers.
+        """
+        if self._executor is None:
+            raise RuntimeError("Inference pool is not started.")
+        if self.free_slots() < 1:
+            raise QueueFullError(
+                f"Inference queue is full ({self._pending} pending jobs).")
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        self._pending += 1
+        try:
+            try:
+                future = executor.submit(functools.partial(fn, *args))
+            except BaseException:
+                self._pending -= 1
+                raise
+            future.add_done_callback(
+                lambda _: loop.call_soon_threadsafe(self._release))
+            # Cancelling the wrapped future also cancels a job still waiting
+            return await asyncio.wait_for(asyncio.wrap_future(future),
+                                          timeout if timeout is not None else self.timeout)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def _restart(self, broken: Executor) -> None:
+        """
+        Replace a process pool broken by the death of a worker, e.g. killed when out of memory.
+
+        Every job of the broken pool fails, only the first of them restarts it.
+
+        Args:
+            broken (Executor): The executor the failed job was submitted to.
+        """
+        if broken is not self._executor:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start(self._initializer)
+        # Warmed in the background, the failed job answers right away
+        self._warming = asyncio.create_task(self.warm_up())
+        self._warming.add_done_callback(
+            lambda task: task.cancelled() or task.exception())
+
+    def _release(self) -> None:
+        """
+        Give back the slot of a finished job.
+        """
+        self._pending -= 1
@@ -0,0 +1,292 @@
+import os
+import time
+import shutil
+import asyncio
+
+from typing import Callable, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+
+class TempEntry:
+    """
+    A file or directory managed by the janitor.
+
+    Attributes:
+        path (str): Path of the file or directory.
+        expires_at (float | None): Time it can be removed at, None while still in use.
+        size (int): Bytes it holds on disk, as of its last update.
+        leases (int): Number of responses still sending it.
+        removed (bool): Whether it must be removed as soon as no response sends it.
+        on_remove (Callable[[], None] | None): Called once it is removed.
+    """
+
+    def __init__(self, path: str, expires_at: Optional[float],
+                 on_remove: Optional[Callable[[], None]]):
+        """
+        Initialize the TempEntry object, not leased and of unknown size.
+
+        Args:
+            path (str): Path of the file or directory.
+            expires_at (float | None): Time it can be removed at, None while still in use.
+            on_remove (Callable[[], None] | None): Called once it is removed.
+        """
+        self.path: str = path
+        self.expires_at: Optional[float] = expires_at
+        self.size: int = 0
+        self.leases: int = 0
+        self.removed: bool = False
+        self.on_remove: Optional[Callable[[], None]] = on_remove
+
+
+class Janitor:
+    """
+    The single owner of the temporary files of the API.
+
+    Every temporary file or directory is tracked in an index with its expiry
+    time and size. One task sweeps the index on a schedule and removes the
+    expired entries, instead of one sleeping task per file, deleting them on
+    a thread so large directories do not block the event loop. An entry sent
+    by a response is leased and only removed once the response is fully
+    sent. When the tracked size exceeds `max_bytes`, the entries closest to
+    their expiry are removed first. Files left by a previous run are removed
+    at startup.
+
+    Attributes:
+        root_dir (str): Directory of the temporary files.
+        max_bytes (int): Quota of the tracked files, in bytes.
+        interval (float): Seconds between two sweeps.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int, interval: float):
+        """
+        Initialize the Janitor object.
+
+        Args:
+            root_dir (str): Directory of the temporary files.
+            max_bytes (int): Quota of the tracked files, in bytes.
+            interval (float): Seconds between two sweeps.
+
+        Raises:
+            ValueError: If the quota or the interval is not positive.
+        """
+        if max_bytes <= 0 or interval <= 0:
+            raise ValueError("Janitor quota and interval must be positive.")
+
+        self.root_dir: str = root_dir
+        self.max_bytes: int = max_bytes
+        self.interval: float = interval
+
+        self._entries: dict[str, TempEntry] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def used_bytes(self) -> int:
+        """Bytes held by the tracked files."""
+        return sum(entry.size for entry in self._entries.values())
+
+    def start(self) -> None:
+        """
+        Remove the orphans of a previous run and start sweeping, in the running event loop.
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        with os.scandir(self.root_dir) as entries:
+            for entry in entries:
+                if entry.path not in self._entries:
+                    self._delete(entry.path)
+        self._task = asyncio.create_task(self._run(), name="janitor")
+
+    async def shutdown(self) -> None:
+        """
+        Stop sweeping, the files left are removed at the next startup.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def track(self, path: str, ttl: Optional[float] = None,
+              on_remove: Optional[Callable[[], None]] = None) -> None:
+        """
+        Add a file or directory to the index, or update its expiry and size.
+
+        Args:
+            path (str): Path of the file or directory, inside `root_dir`.
+            ttl (float | None): Seconds before it expires, None to keep it until tracked again with a ttl.
+            on_remove (Callable[[], None] | None): Called once it is removed, kept if already tracked.
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        entry = self._entries.get(path)
+        if entry is None:
+            entry = self._entries[path] = TempEntry(
+                path, expires_at, on_remove)
+        else:
+            entry.expires_at = expires_at
+        entry.size = self._disk_size(path)
+
+    async def has_room(self, size: int) -> bool:
+        """
+        Check whether `size` more bytes fit in the quota, first removing what can be.
+
+        Args:
+            size (int): The bytes about to be written.
+
+        Returns:
+            bool: Whether they fit.
+        """
+        await self.sweep(extra=size)
+        return self.used_bytes + size <= self.max_bytes
+
+    def acquire(self, path: str) -> None:
+        """
+        Lease a tracked entry while a response sends it, so it is not removed meanwhile.
+
+        Args:
+            path (str): Path of the tracked file or directory.
+        """
+        entry = self._entries.get(path)
+        if entry is not None:
+            entry.leases += 1
+
+    async def release(self, path: str) -> None:
+        """
+        Give back a lease once the response is fully sent, removing the entry if it was removed meanwhile.
+
+        Args:
+            path (str): Path of the tracked file or directory.
+        """
+        entry = self._entries.get(path)
+        if entry is None:
+            return
+        entry.leases -= 1
+        if entry.removed and entry.leases == 0:
+            await self._remove([entry])
+
+    async def remove(self, path: str) -> None:
+        """
+        Remove a tracked entry now, or once the responses sending it are done.
+
+        Args:
+            path (str): Path of the tracked file or directory.
+        """
+        entry = self._entries.get(path)
+        if entry is None:
+            return
+        entry.removed = True
+        if entry.leases == 0:
+            await self._remove([entry])
+
+    async def sweep(self, extra: int = 0) -> None:
+        """
+        Remove the expired entries, then the entries closest to their expiry while over the quota.
+
+        Entries sent by a response or without expiry are never removed here.
+
+        Args:
+            extra (int): Bytes about to be written, counted in the quota.
+        """
+        now = time.time()
+        removable = sorted((entry for entry in self._entries.values()
+                            if entry.expires_at is not None and entry.leases == 0),
+                           key=lambda entry: entry.expires_at)
+        used = self.used_bytes + extra
+        expired = []
+        for entry in removable:
+            if entry.expires_at > now and used <= self.max_bytes:
+                break
+            used -= entry.size
+            expired.append(entry)
+        await self._remove(expired)
+
+    async def _run(self) -> None:
+        """
+        Sweep every `interval` seconds.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.sweep()
+
+    async def _remove(self, entries: list[TempEntry]) -> None:
+        """
+        Delete entries from the index, then from the disk on a thread.
+
+        Args:
+            entries (list[TempEntry]): The entries, not leased.
+        """
+        # Dropped from the index first, the entries cannot be leased or
+        # removed again while deleted
+        for entry in entries:
+            del self._entries[entry.path]
+            if entry.on_remove is not None:
+                entry.on_remove()
+        for entry in entries:
+            await run_in_threadpool(self._delete, entry.path)
+
+    @staticmethod
+    def _delete(path: str) -> None:
+        """
+        Delete a file or directory, if it exists.
+
+        Args:
+            path (str): Path of the file or directory.
+        """
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def _disk_size(path: str) -> int:
+        """
+        Get the bytes held by a file or directory.
+
+        Args:
+            path (str): Path of the file or directory.
+
+        Returns:
+            int: Its size, 0 if it does not exist.
+        """
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        size = 0
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                try:
+                    size += os.path.getsize(os.path.join(dir_path, file_name))
+                except OSError:
+                    # Removed or replaced while walking
+                    pass
+        return size
+
+
+class LeasedFileResponse(FileResponse):
+    """
+    A file response giving back its janitor lease once sent, even if sending fails or the client disconnects.
+
+    Attributes:
+        janitor (Janitor): The janitor the lease is taken from.
+        lease (str): Path of the tracked entry leased.
+    """
+
+    def __init__(self, janitor: Janitor, lease: str, path: str, **kwargs):
+        """
+        Initialize the LeasedFileResponse object, leasing the entry right away.
+
+        Args:
+            janitor (Janitor): The janitor the lease is taken from.
+            lease (str): Path of the tracked entry holding the file.
+            path (str): Path of the file to send.
+            **kwargs: The other arguments of `FileResponse`.
+        """
+        super().__init__(path, **kwargs)
+        self.janitor: Janitor = janitor
+        self.lease: str = lease
+        janitor.acquire(lease)
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.janitor.release(self.lease)
@@ -0,0 +1,315 @@
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import functools
+
+from typing import Any, Awaitable, Callable, Optional
+from starlette.concurrency import run_in_threadpool
+
+from api.janitor import Janitor
+from src.results_store import ResultsStore
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    An uploaded image waiting for or going through its processing.
+
+    The uploaded image and the rendered formats are kept on disk in the
+    directory of the job, so waiting jobs do not hold their images in memory.
+
+    Attributes:
+        id (str): Identifier of the job.
+        image (str): Name of the uploaded file.
+        dir (str): Directory of the input image and the rendered formats.
+        input_path (str): Path of the uploaded image.
+        expected_formats (list[str]): Formats to render.
+        file_extension (str): Image format of the rendered formats (e.g., '.png').
+        image_hash (str | None): Content hash of the uploaded image, once written.
+        patient_id (str | None): Identifier of the patient, if given.
+        wound_id (str | None): Identifier of the wound, if given.
+        clinical_pwat (float | None): PWAT scored by a clinician, if given.
+        status (str): One of "queued", "running", "done" or "failed".
+        predicted_pwat (float | None): Predicted PWAT once done.
+        error (str | None): Why the job failed.
+        created_at (float): Submission time, in seconds since the epoch.
+        finished_at (float | None): Completion time, in seconds since the epoch.
+    """
+
+    def __init__(self, image: str, root_dir: str, expected_formats: list[str],
+                 file_extension: str, patient_id: Optional[str] = None,
+                 wound_id: Optional[str] = None, clinical_pwat: Optional[float] = None):
+        """
+        Initialize the Job object, with a new identifier and directory name.
+
+        Args:
+            image (str): Name of the uploaded file.
+            root_dir (str): Directory holding the directories of the jobs.
+            expected_formats (list[str]): Formats to render.
+            file_extension (str): Image format of the rendered formats (e.g., '.png').
+            patient_id (str | None): Identifier of the patient, if given.
+            wound_id (str | None): Identifier of the wound, if given.
+            clinical_pwat (float | None): PWAT scored by a clinician, if given.
+        """
+        self.id: str = str(uuid.uuid4())
+        self.image: str = image
+        self.dir: str = os.path.join(root_dir, self.id)
+        self.input_path: str = os.path.join(
+            self.dir, "input" + os.path.splitext(image)[1].lower())
+        self.expected_formats: list[str] = expected_formats
+        self.file_extension: str = file_extension
+        self.image_hash: Optional[str] = None
+        self.patient_id: Optional[str] = patient_id
+        self.wound_id: Optional[str] = wound_id
+        self.clinical_pwat: Optional[float] = clinical_pwat
+        self.status: str = QUEUED
+        self.predicted_pwat: Optional[float] = None
+        self.error: Optional[str] = None
+        self.created_at: float = time.time()
+        self.finished_at: Optional[float] = None
+
+    def artifact_path(self, expected_format: str) -> str:
+        """
+        Get the path of a rendered format.
+
+        Args:
+            expected_format (str): One of the expected formats of the job.
+
+        Returns:
+            str: The path of the file, written once the format is rendered.
+        """
+        return os.path.join(self.dir, expected_format + self.file_extension)
+
+    def progress(self) -> float:
+        """
+        Get the fraction of the expected formats already rendered.
+
+        Returns:
+            float: From 0 when queued to 1 when done.
+        """
+        if self.status == DONE:
+            return 1.0
+        if self.status == QUEUED:
+            return 0.0
+        # Formats are written one by one, and atomically, by the worker
+        rendered = sum(os.path.exists(self.artifact_path(expected_format))
+                       for expected_format in self.expected_formats)
+        return rendered / len(self.expected_formats)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Describe the job for the API.
+
+        Returns:
+            dict[str, Any]: The status, progress and result of the job, with the URL of each format once done.
+        """
+        return {
+            "id": self.id,
+            "image": self.image,
+            "status": self.status,
+            "progress": self.progress(),
+            "patient_id": self.patient_id,
+            "wound_id": self.wound_id,
+            "clinical_pwat": self.clinical_pwat,
+            "predicted_pwat": self.predicted_pwat,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "artifacts": {
+                expected_format: f"/jobs/{self.id}/artifacts/{expected_format}"
+                for expected_format in self.expected_formats
+            } if self.status == DONE else {},
+        }
+
+
+class JobQueue:
+    """
+    A queue of jobs processed in the background by a fixed number of runners.
+
+    Submitting jobs only writes their images to disk, on a thread, and
+    returns, the runners then process the jobs in submission order. The job directories are
+    tracked by the janitor, which drops a finished job, with its files,
+    `retention` seconds after completion or earlier when over its quota.
+
+    Attributes:
+        janitor (Janitor): Owner of the job directories, kept in its root directory.
+        workers (int): Number of jobs processed at the same time.
+        queue_size (int): Number of jobs allowed to wait.
+        retention (float): Seconds a finished job is kept.
+    """
+
+    def __init__(self, janitor: Janitor, workers: int,
+                 queue_size: int, retention: float):
+        """
+        Initialize the JobQueue object.
+
+        Args:
+            janitor (Janitor): Owner of the job directories, kept in its root directory.
+            workers (int): Number of jobs processed at the same time.
+            queue_size (int): Number of jobs allowed to wait.
+            retention (float): Seconds a finished job is kept.
+
+        Raises:
+            ValueError: If a size or the retention is not positive.
+        """
+        if workers < 1 or queue_size < 1 or retention <= 0:
+            raise ValueError(
+                "Job workers, queue size and retention must be positive.")
+
+        self.janitor: Janitor = janitor
+        self.workers: int = workers
+        self.queue_size: int = queue_size
+        self.retention: float = retention
+
+        self._jobs: dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._reserved: int = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, runner: Callable[[Job], Awaitable[float]]) -> None:
+        """
+        Start the runners, in the running event loop.
+
+        Args:
+            runner (Callable[[Job], Awaitable[float]]): Processes a job, marking it running once it starts, and returns its predicted PWAT.
+        """
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._run(runner), name=f"job-runner-{i}")
+                       for i in range(self.workers)]
+
+    async def shutdown(self) -> None:
+        """
+        Stop the runners, the jobs not done are dropped.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def free_slots(self) -> int:
+        """
+        Get the number of jobs that can still be submitted.
+
+        Returns:
+            int: The free places in the queue, less those reserved by the submissions being written.
+        """
+        if self._queue is None:
+            return 0
+        return self.queue_size - self._queue.qsize() - self._reserved
+
+    async def submit(self, uploads: list[tuple[str, bytes]], expected_formats: list[str],
+                     file_extension: str, patient_id: Optional[str] = None,
+                     wound_id: Optional[str] = None, clinical_pwat: Optional[float] = None) -> list[Job]:
+        """
+        Write uploaded images to disk and queue their jobs, all of them or none.
+
+        The slots are reserved before the images are written on a thread, so
+        the concurrent submissions cannot take them meanwhile.
+
+        Args:
+            uploads (list[tuple[str, bytes]]): Name and content of each uploaded file.
+            expected_formats (list[str]): Formats to render.
+            file_extension (str): Image format of the rendered formats (e.g., '.png').
+            patient_id (str | None): Identifier of the patient, if given.
+            wound_id (str | None): Identifier of the wound, if given.
+            clinical_pwat (float | None): PWAT scored by a clinician, if given.
+
+        Returns:
+            list[Job]: The queued jobs, in upload order.
+
+        Raises:
+            RuntimeError: If the queue is not started.
+            asyncio.QueueFull: If the queue has fewer free slots than uploads.
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started.")
+        if self.free_slots() < len(uploads):
+            raise asyncio.QueueFull()
+        jobs = [Job(image, self.janitor.root_dir, expected_formats, file_extension,
+                    patient_id, wound_id, clinical_pwat) for image, _ in uploads]
+        self._reserved += len(jobs)
+        try:
+            await run_in_threadpool(self._write_inputs, jobs,
+                                    [image_data for _, image_data in uploads])
+        finally:
+            self._reserved -= len(jobs)
+        for job in jobs:
+            # Kept until done, then for `retention`
+            self.janitor.track(
+                job.dir, on_remove=functools.partial(
+                    self._jobs.pop, job.id, None))
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+        return jobs
+
+    async def remove(self, job: Job) -> None:
+        """
+        Drop a finished job, its files are removed once no response sends them.
+
+        Args:
+            job (Job): The done or failed job.
+        """
+        await self.janitor.remove(job.dir)
+        self._jobs.pop(job.id, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job still retained.
+
+        Args:
+            job_id (str): Identifier of the job.
+
+        Returns:
+            Job | None: The job, None if unknown or expired.
+        """
+        return self._jobs.get(job_id)
+
+    async def _run(self, runner: Callable[[Job], Awaitable[float]]) -> None:
+        """
+        Process the queued jobs one after the other.
+
+        Args:
+            runner (Callable[[Job], Awaitable[float]]): Processes a job, marking it running once it starts, and returns its predicted PWAT.
+        """
+        while True:
+            job = await self._queue.get()
+            try:
+                job.predicted_pwat = await runner(job)
+                job.status = DONE
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+            # Only the rendered formats are kept until the job expires
+            if os.path.exists(job.input_path):
+                await run_in_threadpool(os.remove, job.input_path)
+            self.janitor.track(job.dir, ttl=self.retention)
+
+    @staticmethod
+    def _write_inputs(jobs: list[Job], images: list[bytes]) -> None:
+        """
+        Hash and write the uploaded images of jobs, removing every job directory if one fails.
+
+        Args:
+            jobs (list[Job]): The jobs, not queued yet.
+            images (list[bytes]): Content of the uploaded file of each job.
+        """
+        try:
+            for job, image_data in zip(jobs, images):
+                job.image_hash = ResultsStore.hash_bytes(image_data)
+                os.makedirs(job.dir, exist_ok=True)
+                with open(job.input_path, mode="wb") as file:
+                    file.write(image_data)
+        except BaseException:
+            for job in jobs:
+                shutil.rmtree(job.dir, ignore_errors=True)
+            raise
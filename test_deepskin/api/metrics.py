@@ -0,0 +1,94 @@
+import bisect
+import threading
+
+from typing import Optional
+
+# Upper bounds in seconds, from a fast decode to a cold segmentation
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value of the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace(
+        "\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    """Format label names and values as a Prometheus label set."""
+    return ",".join(f'{name}="{_escape(value)}"' for name,
+                    value in zip(names, values))
+
+
+class Histogram:
+    """A labelled histogram, rendered in the Prometheus text exposition format."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...],
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # Per label values: the count of each bucket, then the +Inf one, the
+        # sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Add an observation to the series of the given label values."""
+        with self._lock:
+            counts, total = self._series.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> str:
+        """Render the histogram with cumulative buckets."""
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total) in sorted(self._series.items()):
+                labels = _labels(self.labels, label_values)
+                prefix = labels + "," if labels else ""
+                cumulative = 0
+                for bound, count in zip(
+                        self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total[0]}")
+                lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def gauge(name: str, documentation: str,
+          value: Optional[float], kind: str = "gauge") -> str:
+    """Render a single unlabelled gauge or counter, nothing if its value is unknown."""
+    if value is None:
+        return ""
+    return f"# HELP {name} {documentation}\n# TYPE {name} {kind}\n{name} {value}\n"
+
+
+# Seconds spent in each stage of the requests, see `WoundImage._stage`
+stage_seconds = Histogram(
+    "deepskin_stage_seconds",
+    "Seconds spent in each processing stage of the uploaded images.",
+    ("stage",))
+# Seconds of each successful upload, by endpoint and expected format
+request_seconds = Histogram(
+    "deepskin_request_seconds",
+    "Seconds to answer the successful uploads.",
+    ("endpoint", "expected_format"))
@@ -13,13 +13,64 @@ class MyEnv:
             cls._instance.port = int(os.getenv("API_PORT", 3001))
             cls._instance.host = os.getenv("API_HOST", "localhost")
             cls._instance.env = os.getenv("API_ENV", DEV)
+            cls._instance.pool = os.getenv("API_POOL", "thread")
+            cls._instance.workers = int(os.getenv("API_WORKERS", 1))
+            cls._instance.queue_size = int(os.getenv("API_QUEUE_SIZE", 8))
+            cls._instance.timeout = float(os.getenv("API_TIMEOUT", 120))
+            cls._instance.retry_after = int(os.getenv("API_RETRY_AFTER", 5))
+            cls._instance.batch_size = int(os.getenv("API_BATCH_SIZE", 1))
+            cls._instance.batch_wait_ms = float(
+                os.getenv("API_BATCH_WAIT_MS", 10))
+            cls._instance.cache_bytes = int(
+                os.getenv("API_CACHE_BYTES", 256 * 1024 * 1024))
+            cls._instance.cache_dir = os.getenv("API_CACHE_DIR", "")
+            cls._instance.cache_disk_bytes = int(
+                os.getenv("API_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+            cls._instance.working_scale = float(
+                os.getenv("API_WORKING_SCALE", 1))
+            cls._instance.graph_workers = int(
+                os.getenv("API_GRAPH_WORKERS", 1))
+            cls._instance.job_workers = int(os.getenv("API_JOB_WORKERS", 1))
+            cls._instance.job_queue_size = int(
+                os.getenv("API_JOB_QUEUE_SIZE", 64))
+            cls._instance.job_timeout = float(
+                os.getenv("API_JOB_TIMEOUT", 600))
+            cls._instance.job_retention = float(
+                os.getenv("API_JOB_RETENTION", 3600))
+            cls._instance.job_dir = os.getenv(
+                "API_JOB_DIR", os.path.join(
+                    "output", "api", "jobs"))
+            cls._instance.temp_max_bytes = int(
+                os.getenv("API_TEMP_MAX_BYTES", 1024 * 1024 * 1024))
+            cls._instance.janitor_interval = float(
+                os.getenv("API_JANITOR_INTERVAL", 60))
+            cls._instance.results_db = os.getenv(
+                "API_RESULTS_DB", os.path.join(
+                    "output", "api", "results.sqlite"))
+            cls._instance.debug_memory = os.getenv(
+                "API_DEBUG_MEMORY", "false").lower() in (
+                "1", "true", "yes")
+            cls._instance.backend = os.getenv("API_BACKEND", "tensorflow")
+            cls._instance.model_path = os.getenv("API_MODEL_PATH", "")
         return cls._instance
 
     def is_dev(self) -> bool:
         return self.env == DEV
 
     def __str__(self) -> str:
-        return f"MyEnv(port={self.port}, host='{self.host}', env='{self.env}')"
+        return (f"MyEnv(port={self.port}, host='{self.host}', env='{self.env}', "
+                f"pool='{self.pool}', workers={self.workers}, queue_size={self.queue_size}, "
+                f"timeout={self.timeout}, retry_after={self.retry_after}, "
+                f"batch_size={self.batch_size}, batch_wait_ms={self.batch_wait_ms}, "
+                f"cache_bytes={self.cache_bytes}, cache_dir='{self.cache_dir}', "
+                f"cache_disk_bytes={self.cache_disk_bytes}, "
+                f"working_scale={self.working_scale}, graph_workers={self.graph_workers}, "
+                f"job_workers={self.job_workers}, "
+                f"job_queue_size={self.job_queue_size}, job_timeout={self.job_timeout}, "
+                f"job_retention={self.job_retention}, job_dir='{self.job_dir}', "
+                f"temp_max_bytes={self.temp_max_bytes}, janitor_interval={self.janitor_interval}, "
+                f"results_db='{self.results_db}', debug_memory={self.debug_memory}, "
+                f"backend='{self.backend}', model_path='{self.model_path}')")
 
 
 my_env = MyEnv()
@@ -0,0 +1,190 @@
+import io
+import os
+import json
+import zipfile
+
+from typing import Optional, Union
+
+from src.wound_image import WoundImage
+from src.mask_encoding import encode_rle, encode_polygons
+from src.memory import rss_bytes, peak_rss_bytes
+from src.result_cache import ResultCache
+from src.batch_segmenter import BatchSegmenter
+from src.model_registry import ModelRegistry, model_registry
+
+# Models used by the tasks of this worker, see `init_worker`
+models: Union[ModelRegistry, BatchSegmenter] = model_registry
+# Results cache of this worker, see `init_worker`
+cache: Optional[ResultCache] = None
+# Working resolution of the images of this worker, see `init_worker`
+working_scale: float = 1.0
+# Whether the tasks of this worker measure their memory, see `init_worker`
+debug_memory: bool = False
+# Threads computing the independent stages of an image, see `init_worker`
+graph_workers: int = 1
+
+
+def init_worker(logging: bool, batch_size: int, batch_wait: float,
+                cache_bytes: int, cache_dir: str, cache_disk_bytes: int, scale: float = 1.0,
+                memory: bool = False, stage_workers: int = 1,
+                backend: str = "tensorflow", model_path: str = "") -> dict:
+    """Load and warm the models of a pool worker on the `backend` inference backend, running the exported model at `model_path` if not TensorFlow, batching segmentations if `batch_size` > 1, caching results if `cache_bytes` > 0, also in `cache_dir` up to `cache_disk_bytes` if given, segmenting at `scale` of the image resolution, measuring the memory of each task if `memory` and computing the independent stages of an image on `stage_workers` threads, and return their loading statistics."""
+    global models, cache, working_scale, debug_memory, graph_workers
+    if not 0 < scale <= 1:
+        raise ValueError(f"Working scale {scale} must be in (0, 1].")
+    working_scale = scale
+    debug_memory = memory
+    graph_workers = max(1, stage_workers)
+    model_registry.configure(backend, model_path or None)
+    model_registry.warm_up(verbose=logging)
+    if cache_bytes > 0 and cache is None:
+        cache = ResultCache(max_bytes=cache_bytes, disk_dir=cache_dir or None,
+                            max_disk_bytes=cache_disk_bytes)
+    if batch_size > 1 and not isinstance(models, BatchSegmenter):
+        models = BatchSegmenter(
+            model_registry, max_batch=batch_size, max_wait=batch_wait)
+        models.start()
+    return model_registry.stats()
+
+
+def close_worker() -> None:
+    """Stop the segmentation batching of the worker, if any."""
+    global models
+    if isinstance(models, BatchSegmenter):
+        models.stop()
+        models = model_registry
+
+
+def cache_stats() -> Optional[dict]:
+    """Usage statistics of the results cache of this worker, None without cache."""
+    return cache.stats() if cache is not None else None
+
+
+def open_image(image_name: str, image_data: Optional[bytes], logging: bool,
+               clinical_pwat: Optional[float] = None) -> tuple[WoundImage, dict[str, float]]:
+    """Create the WoundImage of an uploaded image, read from `image_name` if no `image_data`, with the settings of the worker and its clinical PWAT if labelled, along with the seconds of each of its stages, filled as they run."""
+    stages: dict[str, float] = {}
+
+    def trace(stage: str, seconds: float) -> None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+    wi = WoundImage(image_path=image_name, logging=logging,
+                    models=models, image_data=image_data, cache=cache,
+                    working_scale=working_scale, tracer=trace,
+                    clinical_pwat=clinical_pwat)
+    return wi, stages
+
+
+def memory_before() -> Optional[tuple[Optional[int], Optional[int]]]:
+    """Read the resident and peak memory of the worker before a task, None if not measured."""
+    return (rss_bytes(), peak_rss_bytes()) if debug_memory else None
+
+
+def memory_delta(
+        before: Optional[tuple[Optional[int], Optional[int]]]) -> Optional[dict]:
+    """Get the resident and peak memory growth of the worker since `memory_before`, in bytes, shared by the concurrent tasks of a thread pool."""
+    if before is None:
+        return None
+    rss, peak = before
+    rss_after, peak_after = rss_bytes(), peak_rss_bytes()
+    return {
+        "rss": rss_after,
+        "rss_delta": rss_after - rss if rss is not None and rss_after is not None else None,
+        "peak_rss_delta": peak_after - peak if peak is not None and peak_after is not None else None,
+    }
+
+
+def predict_pwat(image_name: str, image_data: bytes,
+                 logging: bool) -> tuple[float, dict[str, float], Optional[dict]]:
+    """Run the PWAT prediction of an uploaded image on a pool worker, returning it with the seconds of each stage and the memory growth."""
+    memory = memory_before()
+    wi, stages = open_image(image_name, image_data, logging)
+    return wi.get_predicted_pwat(), stages, memory_delta(memory)
+
+
+def render_format(image_name: str, image_data: bytes, expected_format: str,
+                  file_extension: str, logging: bool,
+                  clinical_pwat: Optional[float] = None) -> tuple[bytes, float, dict[str, float], Optional[dict]]:
+    """Render and encode one expected format of an uploaded image on a pool worker, returning it with its predicted PWAT, the seconds of each stage and the memory growth."""
+    memory = memory_before()
+    wi, stages = open_image(image_name, image_data, logging, clinical_pwat)
+    wi.compute([expected_format, "predicted_pwat"], graph_workers)
+    predicted_pwat = wi.get_predicted_pwat()
+    content = wi.encode(expected_format, file_extension)
+    return content, predicted_pwat, stages, memory_delta(memory)
+
+
+def render_formats(image_name: str, image_data: bytes, expected_formats: list[str],
+                   file_extension: str, quality: Optional[int], logging: bool,
+                   clinical_pwat: Optional[float] = None) -> tuple[bytes, float, dict[str, float], Optional[dict]]:
+    """Render several expected formats of an uploaded image from a single processing and return them zipped with a summary.json, along with the predicted PWAT, the seconds of each stage and the memory growth."""
+    memory = memory_before()
+    wi, stages = open_image(image_name, image_data, logging, clinical_pwat)
+    wi.compute(expected_formats + ["predicted_pwat",
+               "segmentation", "peri_wound_mask"], graph_workers)
+    predicted_pwat = wi.get_predicted_pwat()
+    summary = {
+        "predicted_pwat": predicted_pwat,
+        "clinical_pwat": clinical_pwat,
+        "mask_statistics": wi.get_mask_statistics(),
+        "formats": expected_formats,
+    }
+    buffer = io.BytesIO()
+    # Images are already compressed, storing them is enough
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for expected_format in expected_formats:
+            archive.writestr(expected_format + file_extension,
+                             wi.encode(expected_format, file_extension, quality))
+        archive.writestr("summary.json", json.dumps(summary, indent=2))
+    return buffer.getvalue(), predicted_pwat, stages, memory_delta(memory)
+
+
+def encode_masks(image_name: str, image_data: bytes, encoding: str, tolerance: float,
+                 logging: bool) -> tuple[dict, dict[str, float], Optional[dict]]:
+    """Segment an uploaded image on a pool worker and return its wound, body, background and peri-wound masks, run-length encoded or as polygons simplified within `tolerance` pixels, along with the seconds of each stage and the memory growth."""
+    memory = memory_before()
+    wi, stages = open_image(image_name, image_data, logging)
+    wi.compute(["segmentation", "peri_wound_mask"], graph_workers)
+    height, width = wi.get_image().shape[:2]
+    if encoding == "rle":
+        masks = {name: encode_rle(mask)
+                 for name, mask in wi.get_masks().items()}
+    else:
+        masks = {
+            name: encode_polygons(
+                mask,
+                tolerance) for name,
+            mask in wi.get_masks().items()}
+    content = {
+        "width": width,
+        "height": height,
+        "encoding": encoding,
+        "masks": masks}
+    return content, stages, memory_delta(memory)
+
+
+def measure_image(image_name: str, image_data: bytes, pixel_size: Optional[float],
+                  logging: bool) -> tuple[dict, dict[str, float], Optional[dict]]:
+    """Segment an uploaded image on a pool worker and return the morphometrics of its wound and peri-wound areas, in millimeters too if `pixel_size` is given, along with the seconds of each stage and the memory growth."""
+    memory = memory_before()
+    wi, stages = open_image(image_name, image_data, logging)
+    wi.compute(["morphometrics"], graph_workers)
+    return wi.get_morphometrics(pixel_size), stages, memory_delta(memory)
+
+
+def render_job(image_path: str, output_dir: str, expected_formats: list[str],
+               file_extension: str, logging: bool,
+               clinical_pwat: Optional[float] = None) -> tuple[float, dict[str, float], Optional[dict]]:
+    """Render the expected formats of a job image into its directory, each written atomically so the written files give its progress, and return its predicted PWAT, the seconds of each stage and the memory growth."""
+    memory = memory_before()
+    wi, stages = open_image(image_path, None, logging, clinical_pwat)
+    wi.compute(expected_formats + ["predicted_pwat"], graph_workers)
+    predicted_pwat = wi.get_predicted_pwat()
+    for expected_format in expected_formats:
+        file_path = os.path.join(output_dir, expected_format + file_extension)
+        temp_path = os.path.join(
+            output_dir, f".{expected_format}{file_extension}")
+        with open(temp_path, mode="wb") as file:
+            file.write(wi.encode(expected_format, file_extension))
+        os.replace(temp_path, file_path)
+    return predicted_pwat, stages, memory_delta(memory)
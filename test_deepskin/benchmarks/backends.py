@@ -0,0 +1,204 @@
+import os
+import sys
+import argparse
+import cv2
+
+from numpy import ndarray
+
+from benchmarks import report
+from benchmarks.working_scale import iou
+from demo.pipeline import iter_image_paths
+from src.inference_backend import BACKENDS, TENSORFLOW
+from src.memory import peak_rss_bytes
+from src.wound_image import WoundImage
+from src.model_registry import model_registry
+
+
+def backend_spec(value: str) -> tuple[str, str]:
+    """
+    Parse a backend argument.
+
+    Args:
+        value (str): The backend name and the path of its exported model, as 'name:path'.
+
+    Returns:
+        tuple[str, str]: The name and the path.
+
+    Raises:
+        argparse.ArgumentTypeError: If the name is not a backend other than TensorFlow, or the path is missing.
+    """
+    name, _, path = value.partition(":")
+    if name not in BACKENDS or name == TENSORFLOW or not path:
+        raise argparse.ArgumentTypeError(
+            f"{value} is not a valid backend, expected e.g. onnx:models/deepskin.onnx.")
+    return name, path
+
+
+def process(image_path: str, img: ndarray, samples: dict[str, list[float]],
+            label: str) -> WoundImage:
+    """
+    Compute the masks and the PWAT of an image, timing the stages of the segmentation.
+
+    Args:
+        image_path (str): Path to the wound image file.
+        img (ndarray): The decoded BGR image, so decoding is not timed.
+        samples (dict[str, list[float]]): Durations by metric name, completed in place.
+        label (str): Name of the backend, the group of its metrics.
+
+    Returns:
+        WoundImage: The processed image.
+    """
+    def tracer(stage: str, seconds: float) -> None:
+        if stage in ("segmentation", "predicted_pwat"):
+            samples.setdefault(f"{label}/{stage}", []).append(seconds)
+
+    wi = WoundImage(
+        image_path=image_path,
+        logging=False,
+        image_data=img,
+        tracer=tracer)
+    wi.get_predicted_pwat()
+    wi.get_labels()
+    return wi
+
+
+def run(label: str, images: list[tuple[str, ndarray]], repeat: int,
+        samples: dict[str, list[float]]) -> list[WoundImage]:
+    """
+    Process every image `repeat` times with the configured backend.
+
+    Args:
+        label (str): Name of the backend, the group of its metrics.
+        images (list[tuple[str, ndarray]]): The path and the decoded BGR image of each image.
+        repeat (int): Number of runs per image.
+        samples (dict[str, list[float]]): Durations by metric name, completed in place.
+
+    Returns:
+        list[WoundImage]: The last processed image of each image.
+    """
+    # Loading and warming the model is reported apart from the stages
+    model_registry.warm_up()
+    results = []
+    for image_path, img in images:
+        for _ in range(repeat):
+            wi = process(image_path, img, samples, label)
+        results.append(wi)
+        print(f"Measured {image_path} on {label}", file=sys.stderr)
+    return results
+
+
+def parity(results: list[WoundImage],
+           references: list[WoundImage]) -> dict[str, float]:
+    """
+    Compare the masks and the PWAT of a backend with the TensorFlow reference.
+
+    Args:
+        results (list[WoundImage]): The images processed by the backend.
+        references (list[WoundImage]): The same images processed by TensorFlow.
+
+    Returns:
+        dict[str, float]: The mean and min wound and body IoU, and the mean and max PWAT delta.
+    """
+    wound_iou, body_iou, pwat_delta = [], [], []
+    for wi, reference in zip(results, references):
+        wound_iou.append(iou(wi.get_wound_mask(), reference.get_wound_mask()))
+        body_iou.append(iou(wi.get_body_mask(), reference.get_body_mask()))
+        pwat_delta.append(abs(wi.get_predicted_pwat() -
+                          reference.get_predicted_pwat()))
+    return {
+        "wound_iou_mean": sum(wound_iou) / len(wound_iou),
+        "wound_iou_min": min(wound_iou),
+        "body_iou_mean": sum(body_iou) / len(body_iou),
+        "body_iou_min": min(body_iou),
+        "pwat_delta_mean": sum(pwat_delta) / len(pwat_delta),
+        "pwat_delta_max": max(pwat_delta),
+    }
+
+
+def failures(label: str, result: dict[str, float], min_iou: float,
+             max_pwat_delta: float) -> list[str]:
+    """
+    List the parity checks a backend fails.
+
+    Args:
+        label (str): Name of the backend.
+        result (dict[str, float]): Its parity, see `parity`.
+        min_iou (float): Lowest wound and body IoU of an image.
+        max_pwat_delta (float): Highest PWAT delta of an image.
+
+    Returns:
+        list[str]: A description of each failure.
+    """
+    failed = []
+    for key in ("wound_iou_min", "body_iou_min"):
+        if result[key] < min_iou:
+            failed.append(f"{label} {key}: {result[key]:.3f} < {min_iou:.3f}")
+    if result["pwat_delta_max"] > max_pwat_delta:
+        failed.append(
+            f"{label} pwat_delta_max: {result['pwat_delta_max']:.3f} > {max_pwat_delta:.3f}")
+    return failed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check the masks and PWAT of exported models against TensorFlow and time their segmentation.")
+    parser.add_argument("folder", nargs="?", default="input",
+                        help="folder of the wound images (default: input)")
+    parser.add_argument("--backends", type=backend_spec, nargs="+", required=True,
+                        help="backends to compare with TensorFlow, as name:path of the exported model "
+                             "(e.g. onnx:models/deepskin_int8.onnx tflite:models/deepskin.tflite)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads of one forward pass of the exported models (default: runtime default)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per image and backend (default: 3)")
+    parser.add_argument("--min-iou", type=float, default=0.9,
+                        help="lowest wound and body IoU of an image to pass (default: 0.9)")
+    parser.add_argument("--max-pwat-delta", type=float, default=0.5,
+                        help="highest PWAT delta of an image to pass (default: 0.5)")
+    report.add_arguments(parser)
+    args = parser.parse_args()
+
+    images = [(image_path, cv2.imread(image_path))
+              for image_path in sorted(iter_image_paths(args.folder))]
+    if not images:
+        print(f"No image found in {args.folder}", file=sys.stderr)
+        return 1
+
+    samples: dict[str, list[float]] = {}
+    model_registry.configure(TENSORFLOW)
+    references = run(TENSORFLOW, images, args.repeat, samples)
+    loading = {TENSORFLOW: model_registry.stats()}
+    results, failed = {}, []
+    for name, path in args.backends:
+        label = f"{name}:{os.path.basename(path)}"
+        model_registry.configure(name, path, args.threads)
+        results[label] = parity(
+            run(label, images, args.repeat, samples), references)
+        loading[label] = model_registry.stats()
+        failed += failures(label,
+                           results[label],
+                           args.min_iou,
+                           args.max_pwat_delta)
+    model_registry.configure(TENSORFLOW)
+
+    code = report.finish({
+        "benchmark": "backends",
+        "environment": report.environment(),
+        "params": {
+            "images": [image_path for image_path, _ in images],
+            "backends": [f"{name}:{path}" for name, path in args.backends],
+            "threads": args.threads,
+            "repeat": args.repeat,
+        },
+        "metrics": {name: report.summarize(seconds) for name, seconds in samples.items()},
+        "parity": results,
+        "loading": loading,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }, args)
+    for failure in failed:
+        print(f"Parity failure {failure}", file=sys.stderr)
+    return 1 if failed else code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
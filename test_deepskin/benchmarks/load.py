@@ -0,0 +1,197 @@
+import os
+import sys
+import time
+import uuid
+import socket
+import argparse
+import threading
+import urllib.error
+import urllib.request
+
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import report
+from src.memory import peak_rss_bytes
+
+
+def multipart(field: str, file_name: str, content: bytes) -> tuple[bytes, str]:
+    """
+    Encode a file as a multipart form.
+
+    Args:
+        field (str): Name of the form field.
+        file_name (str): Name of the file.
+        content (bytes): Content of the file.
+
+    Returns:
+        tuple[bytes, str]: The request body and its content type.
+    """
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{file_name}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def post(url: str, body: bytes, content_type: str,
+         timeout: float) -> tuple[int, float]:
+    """
+    Send one upload and read the whole response.
+
+    Args:
+        url (str): URL of the endpoint.
+        body (bytes): The multipart body.
+        content_type (str): Its content type.
+        timeout (float): Seconds before giving up.
+
+    Returns:
+        tuple[int, float]: The HTTP status and the seconds until the response is read.
+    """
+    request = urllib.request.Request(url, data=body, method="POST",
+                                     headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def load(url: str, body: bytes, content_type: str, clients: int,
+         requests: int, timeout: float) -> dict:
+    """
+    Send uploads from concurrent clients, each waiting for its previous response.
+
+    Args:
+        url (str): URL of the endpoint.
+        body (bytes): The multipart body.
+        content_type (str): Its content type.
+        clients (int): Number of concurrent clients.
+        requests (int): Number of uploads per client.
+        timeout (float): Seconds before a request gives up.
+
+    Returns:
+        dict: The latencies of the successful uploads, the throughput and the count of each error status.
+    """
+    def client() -> list[tuple[int, float]]:
+        return [post(url, body, content_type, timeout)
+                for _ in range(requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = [result for results in executor.map(lambda _: client(), range(clients))
+                   for result in results]
+    elapsed = time.perf_counter() - start
+
+    seconds = [seconds for status, seconds in results if status == 200]
+    errors: dict[str, int] = {}
+    for status, _ in results:
+        if status != 200:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    metric = report.summarize(seconds) if seconds else {"count": 0}
+    metric["throughput_rps"] = len(seconds) / elapsed
+    metric["errors"] = errors
+    return metric
+
+
+def start_server(cache: bool) -> tuple[str, object, threading.Thread]:
+    """
+    Serve the API in this process, on a free local port.
+
+    Args:
+        cache (bool): Whether the API keeps its results cache, which answers every upload of the same image after the first.
+
+    Returns:
+        tuple[str, object, threading.Thread]: The base URL, the Uvicorn server and its thread.
+    """
+    if not cache:
+        # Read by the API settings when first imported
+        os.environ["API_CACHE_BYTES"] = "0"
+        os.environ["API_CACHE_DIR"] = ""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        "api.app:app", host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(
+        target=server.run,
+        name="benchmark-api",
+        daemon=True)
+    thread.start()
+    # The models are warmed up before the server starts accepting
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server did not start.")
+        time.sleep(0.1)
+    return f"http://127.0.0.1:{port}", server, thread
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Load-test the /upload and /upload/pwat endpoints with concurrent clients.")
+    parser.add_argument("--url",
+                        help="base URL of a running API, by default one is served in this process")
+    parser.add_argument("--image", default=os.path.join("input", "0.png"),
+                        help="image uploaded by every request (default: input/0.png)")
+    parser.add_argument("--clients", type=int, default=4,
+                        help="number of concurrent clients (default: 4)")
+    parser.add_argument("--requests", type=int, default=10,
+                        help="uploads per client and endpoint (default: 10)")
+    parser.add_argument("--expected-format", default="segmentation_semantic",
+                        help="format asked to /upload (default: segmentation_semantic)")
+    parser.add_argument("--cache", action="store_true",
+                        help="keep the results cache of the API served in this process, disabled by default")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="seconds before a request gives up (default: 300)")
+    report.add_arguments(parser)
+    args = parser.parse_args()
+
+    with open(args.image, mode="rb") as file:
+        body, content_type = multipart(
+            "file", os.path.basename(
+                args.image), file.read())
+
+    server: Optional[object] = None
+    url = args.url.rstrip("/") if args.url else None
+    if url is None:
+        url, server, thread = start_server(args.cache)
+    try:
+        metrics = {}
+        for name, endpoint in (
+                ("upload", f"/upload?expected_format={args.expected_format}"),
+                ("upload_pwat", "/upload/pwat")):
+            metrics[name] = load(url + endpoint, body, content_type,
+                                 args.clients, args.requests, args.timeout)
+            print(f"Measured {endpoint}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+
+    return report.finish({
+        "benchmark": "load",
+        "environment": report.environment(),
+        "params": {
+            "url": args.url,
+            "cache": args.cache if args.url is None else None,
+            "image": args.image,
+            "clients": args.clients,
+            "requests": args.requests,
+            "expected_format": args.expected_format,
+        },
+        "metrics": metrics,
+        # The API only shares this process when served by the benchmark
+        "peak_rss_bytes": peak_rss_bytes() if server is not None else None,
+    }, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import numpy as np
+
+from typing import Any, Optional
+
+from src.model_registry import model_registry
+
+
+def summarize(seconds: list[float]) -> dict[str, float]:
+    """
+    Summarize the durations of a measured operation.
+
+    Args:
+        seconds (list[float]): The measured durations, in seconds.
+
+    Returns:
+        dict[str, float]: The count, mean, min, max and p50/p95/p99 in milliseconds.
+    """
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    return {
+        "count": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "min_ms": float(ms.min()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def environment() -> dict[str, Any]:
+    """
+    Describe the machine a report is measured on, to compare reports of the same one.
+
+    Returns:
+        dict[str, Any]: The Python version, platform, number of CPUs and model version.
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model_version": model_registry.version(),
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the output and baseline arguments shared by the benchmarks.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of a benchmark.
+    """
+    parser.add_argument("--output",
+                        help="path of the JSON report, only printed if not given")
+    parser.add_argument("--baseline",
+                        help="path of a previous JSON report to compare with")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="also write the report to the --baseline path")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative slowdown tolerated before a regression is reported (default: 0.1)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="latency increase ignored whatever its ratio, for the fastest stages (default: 1)")
+
+
+def compare(report: dict, baseline: dict, tolerance: float,
+            min_delta_ms: float = 0.0) -> list[str]:
+    """
+    Compare a report with a baseline.
+
+    Latencies and peak memory regress when higher, throughputs when lower.
+
+    Args:
+        report (dict): The new report.
+        baseline (dict): The baseline report.
+        tolerance (float): Relative change tolerated.
+        min_delta_ms (float): Latency increase tolerated whatever its ratio.
+
+    Returns:
+        list[str]: A description of each regression.
+    """
+    regressions = []
+
+    def check(name: str, new: Optional[float],
+              old: Optional[float], higher_is_better: bool) -> None:
+        if new is None or not old:
+            return
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(
+                f"{name}: {old:.1f} -> {new:.1f} ({change:+.0%})")
+
+    for name, metric in report["metrics"].items():
+        old_metric = baseline["metrics"].get(name)
+        if old_metric is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            new, old = metric.get(key), old_metric.get(key)
+            if new is not None and old is not None and new - old > min_delta_ms:
+                check(f"{name} {key}", new, old, False)
+        check(f"{name} throughput_rps", metric.get("throughput_rps"),
+              old_metric.get("throughput_rps"), True)
+    check("peak_rss_mb", _mb(report.get("peak_rss_bytes")),
+          _mb(baseline.get("peak_rss_bytes")), False)
+    return regressions
+
+
+def _mb(size: Optional[int]) -> Optional[float]:
+    """
+    Convert a size to megabytes.
+
+    Args:
+        size (int | None): The size in bytes.
+
+    Returns:
+        float | None: The size in megabytes, None if unknown.
+    """
+    return None if size is None else size / (1024 * 1024)
+
+
+def finish(report: dict, args: argparse.Namespace) -> int:
+    """
+    Print and write a report, then compare it with the baseline.
+
+    Args:
+        report (dict): The report of a benchmark.
+        args (argparse.Namespace): The arguments added by `add_arguments`.
+
+    Returns:
+        int: The exit code, 1 if a regression is found.
+    """
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.baseline if args.save_baseline else None):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, mode="w") as file:
+                file.write(text)
+    if not args.baseline or args.save_baseline:
+        return 0
+
+    with open(args.baseline, mode="r") as file:
+        baseline = json.load(file)
+    if baseline.get("environment") != report["environment"]:
+        print(
+            "Warning: the baseline was measured in another environment",
+            file=sys.stderr)
+    regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"Regression {regression}", file=sys.stderr)
+    if not regressions:
+        print(f"No regression over {args.tolerance:.0%} against {args.baseline}",
+              file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import cv2
+import numpy as np
+
+from typing import Callable
+
+from benchmarks import report
+from demo.pipeline import iter_image_paths
+from src.memory import peak_rss_bytes
+from src.mask_encoding import encode_rle, decode_rle
+from src.wound_image import WoundImage
+from src.model_registry import model_registry
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> bytes:
+    """
+    Draw a reproducible wound-like image, a red ellipse on a noisy skin tone.
+
+    Args:
+        width (int): Width of the image.
+        height (int): Height of the image.
+        seed (int): Seed of the noise.
+
+    Returns:
+        bytes: The PNG encoded image.
+    """
+    rng = np.random.default_rng(seed)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[:] = (140, 170, 220)  # BGR skin tone
+    center = (width // 2, height // 2)
+    axes = (max(1, width // 6), max(1, height // 8))
+    cv2.ellipse(img, center, axes, 20, 0, 360, (40, 40, 170), thickness=-1)
+    noise = rng.integers(-12, 13, size=img.shape, dtype=np.int16)
+    img = np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def stages(wi: WoundImage, output_dir: str,
+           file_extension: str) -> list[tuple[str, Callable]]:
+    """
+    List the stages of an image in processing order, each computed once.
+
+    Args:
+        wi (WoundImage): The image, not processed yet.
+        output_dir (str): Directory receiving the saved images and the CSV file.
+        file_extension (str): Extension of the saved images.
+
+    Returns:
+        list[tuple[str, Callable]]: The name and the function of each stage.
+    """
+    def encode_masks() -> list[dict]:
+        # As /upload/masks serves them
+        return [encode_rle(mask) for mask in wi.get_masks().values()]
+
+    steps = [
+        ("decode", wi.get_image),
+        ("segmentation", wi.get_working_labels),
+        ("masks", wi.get_labels),
+        ("peri_wound_mask", wi._update_peri_wound_mask),
+        ("rle", encode_masks),
+        ("predicted_pwat", wi._update_predicted_pwat),
+    ]
+    for artifact in WoundImage.ARTIFACTS:
+        save = getattr(wi, f"save_{artifact}")
+        file_path = os.path.join(output_dir, artifact + file_extension)
+        steps.append(
+            (f"save_{artifact}",
+             lambda save=save,
+             file_path=file_path: save(file_path)))
+    csv_file = os.path.join(output_dir, "pwat_data.csv")
+    steps.append(("csv_write", lambda: WoundImage.append_pwat_rows(
+        csv_file, [wi.get_pwat_row()], False)))
+    return steps
+
+
+def rle_failures(name: str, wi: WoundImage) -> list[str]:
+    """
+    List the masks of a processed image that do not decode back from their RLE, as served by /upload/masks.
+
+    Args:
+        name (str): Name of the image.
+        wi (WoundImage): The processed image.
+
+    Returns:
+        list[str]: A description of each failure.
+    """
+    return [f"{name} {mask_name}" for mask_name, mask in wi.get_masks().items()
+            if not np.array_equal(decode_rle(encode_rle(mask)) != 0, mask != 0)]
+
+
+def measure(name: str, image_data: bytes, repeat: int, working_scale: float,
+            samples: dict[str, list[float]]) -> list[str]:
+    """
+    Time every stage of an image `repeat` times, each time from a fresh WoundImage.
+
+    Args:
+        name (str): Name of the image, its group in the report.
+        image_data (bytes): The encoded image, decoded by the first stage.
+        repeat (int): Number of runs.
+        working_scale (float): Working scale of the masks and PWAT.
+        samples (dict[str, list[float]]): Durations by metric name, completed in place.
+
+    Returns:
+        list[str]: The masks of the image that do not round trip through their RLE, see `rle_failures`.
+    """
+    file_extension = "." + name.split(".")[-1]
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            wi = WoundImage(image_path=name, logging=False, image_data=image_data,
+                            working_scale=working_scale)
+            total = 0.0
+            for stage, fn in stages(wi, output_dir, file_extension):
+                start = time.perf_counter()
+                fn()
+                seconds = time.perf_counter() - start
+                samples.setdefault(f"{name}/{stage}", []).append(seconds)
+                total += seconds
+            samples.setdefault(f"{name}/total", []).append(total)
+    # Checked once, out of the timings
+    return rle_failures(name, wi)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Time each WoundImage stage on the input images and on synthetic images.")
+    parser.add_argument("folder", nargs="?", default="input",
+                        help="folder of the wound images, empty string to skip them (default: input)")
+    parser.add_argument("--sizes", nargs="*", default=["640x480", "1920x1080", "4032x3024"],
+                        help="WIDTHxHEIGHT of the synthetic images (default: 640x480 1920x1080 4032x3024)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per image (default: 5)")
+    parser.add_argument("--working-scale", type=float, default=1.0,
+                        help="working scale of the masks and PWAT (default: 1)")
+    report.add_arguments(parser)
+    args = parser.parse_args()
+
+    images = []
+    if args.folder:
+        for image_path in sorted(iter_image_paths(args.folder)):
+            with open(image_path, mode="rb") as file:
+                images.append((os.path.basename(image_path), file.read()))
+    for size in args.sizes:
+        width, height = (int(side) for side in size.lower().split("x"))
+        images.append(
+            (f"synthetic_{width}x{height}.png",
+             synthetic_image(
+                 width,
+                 height)))
+
+    # Loading and warming the models is not part of the stages
+    model_registry.warm_up()
+    samples: dict[str, list[float]] = {}
+    failed = []
+    for name, image_data in images:
+        failed += measure(name, image_data, args.repeat,
+                          args.working_scale, samples)
+        print(f"Measured {name}", file=sys.stderr)
+
+    code = report.finish({
+        "benchmark": "stages",
+        "environment": report.environment(),
+        "params": {
+            "images": [name for name, _ in images],
+            "repeat": args.repeat,
+            "working_scale": args.working_scale,
+        },
+        "metrics": {name: report.summarize(seconds) for name, seconds in samples.items()},
+        "peak_rss_bytes": peak_rss_bytes(),
+    }, args)
+    for failure in failed:
+        print(f"RLE round trip failure {failure}", file=sys.stderr)
+    return 1 if failed else code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import time
+import argparse
+import statistics
+import cv2
+import numpy as np
+
+from numpy import ndarray
+
+from demo.pipeline import iter_image_paths
+from src.wound_image import WoundImage
+from src.model_registry import model_registry
+
+
+def iou(a: ndarray, b: ndarray) -> float:
+    """
+    Get the intersection over union of two binary masks.
+
+    Args:
+        a (ndarray): The first mask.
+        b (ndarray): The second mask.
+
+    Returns:
+        float: The IoU, 1 if both masks are empty.
+    """
+    a, b = a > 0, b > 0
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+
+def process(image_path: str, img: ndarray,
+            scale: float) -> tuple[float, WoundImage]:
+    """
+    Compute the masks and the PWAT of an image at a working scale.
+
+    Args:
+        image_path (str): Path to the wound image file.
+        img (ndarray): The decoded BGR image, so decoding is not timed.
+        scale (float): The working scale.
+
+    Returns:
+        tuple[float, WoundImage]: The seconds spent and the processed image.
+    """
+    start = time.perf_counter()
+    wi = WoundImage(image_path=image_path, logging=False,
+                    image_data=img, working_scale=scale)
+    wi.get_predicted_pwat()
+    wi.get_wound_mask()
+    wi.get_peri_wound_mask()
+    return time.perf_counter() - start, wi
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the latency and the drift of the masks and PWAT at several working scales.")
+    parser.add_argument("folder", nargs="?", default="input",
+                        help="folder of the wound images (default: input)")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.25],
+                        help="working scales to compare with the full resolution (default: 1 0.75 0.5 0.25)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per image and scale, the median is kept (default: 3)")
+    args = parser.parse_args()
+
+    model_registry.warm_up()
+    results = {scale: {"seconds": [], "pwat_drift": [], "wound_iou": [], "peri_wound_iou": []}
+               for scale in args.scales}
+    full_seconds = []
+    for image_path in iter_image_paths(args.folder):
+        img = cv2.imread(image_path)
+        seconds, reference = process(image_path, img, 1.0)
+        full_seconds.append(seconds)
+        for scale in args.scales:
+            runs = [
+                process(
+                    image_path,
+                    img,
+                    scale) for _ in range(
+                    args.repeat)]
+            wi = runs[-1][1]
+            result = results[scale]
+            result["seconds"].append(
+                statistics.median(
+                    seconds for seconds,
+                    _ in runs))
+            result["pwat_drift"].append(
+                abs(wi.get_predicted_pwat() - reference.get_predicted_pwat()))
+            result["wound_iou"].append(
+                iou(wi.get_wound_mask(), reference.get_wound_mask()))
+            result["peri_wound_iou"].append(
+                iou(wi.get_peri_wound_mask(), reference.get_peri_wound_mask()))
+        print(f"Measured {image_path} ({img.shape[1]}x{img.shape[0]})")
+
+    print(f"{'scale':>6} {'ms':>9} {'speedup':>8} {'pwat drift':>11} {'max drift':>10} "
+          f"{'wound IoU':>10} {'peri IoU':>9}")
+    if not full_seconds:
+        return
+    full = statistics.mean(full_seconds)
+    for scale, result in results.items():
+        seconds = statistics.mean(result["seconds"])
+        print(f"{scale:>6.2f} {seconds * 1000:>9.1f} {full / seconds:>7.2f}x "
+              f"{statistics.mean(result['pwat_drift']):>11.3f} {max(result['pwat_drift']):>10.3f} "
+              f"{statistics.mean(result['wound_iou']):>10.3f} "
+              f"{statistics.mean(result['peri_wound_iou']):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,84 @@
 import subprocess
+import argparse
 import sys
 import os
 
-from src.wound_image import WoundImage
+from demo.manifest import Manifest
+from demo.labels import read_labels, find_labels
+from src.results_store import ResultsStore
+from demo.pipeline import run_batch, iter_image_paths
+from src.inference_backend import BACKENDS, TENSORFLOW
 
 
 class CLI:
-    """Non-Threaded CLI"""
+    """CLI, processing images in worker processes when workers > 1"""
 
-    def __init__(self, logging: bool):
+    def __init__(self, logging: bool, workers: int = 1, ordered: bool = True,
+                 recursive: bool = False, resume: bool = True,
+                 working_scale: float = 1.0, results_format: str = "csv",
+                 labels_file: str = None, graph_workers: int = 1,
+                 encoder_settings: dict = None, pixel_size: float = None,
+                 backend: str = TENSORFLOW, model_path: str = None):
         self.logging = logging
+        self.workers = workers
+        self.ordered = ordered
+        self.recursive = recursive
+        self.resume = resume
+        self.working_scale = working_scale
+        self.results_format = results_format
+        self.labels_file = labels_file
+        self.graph_workers = graph_workers
+        self.encoder_settings = encoder_settings
+        self.pixel_size = pixel_size
+        self.backend = backend
+        self.model_path = model_path
         self.folder_input = None
         self.folder_output = None
 
     def run(self):
         try:
-            # List all image files in the input folder
-            wsis: list[WoundImage] = [
-                WoundImage(
-                    image_path=os.path.join(
-                        self.folder_input,
-                        file),
-                    logging=self.logging)
-                for file in os.listdir(self.folder_input)
-                if file.endswith((".png", ".jpg", ".jpeg"))
-            ]
+            # Lazily list all image files in the input folder
+            image_paths = iter_image_paths(self.folder_input, self.recursive)
 
             wounds_output_dir = os.path.join(self.folder_output, "wounds")
-            csv_output_file = os.path.join(
-                self.folder_output, "csv", "pwat_data.csv")
+            results_file = os.path.join(
+                self.folder_output, "csv", "pwat_data." + self.results_format)
+            morphometrics_file = os.path.join(
+                self.folder_output, "csv", "morphometrics." + self.results_format)
+            manifest_file = os.path.join(self.folder_output, "manifest.sqlite")
+            store_file = os.path.join(self.folder_output, "results.sqlite")
+            # Patient, wound and clinical PWAT of the images, if labelled
+            labels = read_labels(
+                self.labels_file,
+                self.folder_input) if self.labels_file else find_labels(
+                self.folder_input)
+            if not self.resume and os.path.exists(manifest_file):
+                os.remove(manifest_file)
 
-            for wi in wsis:
-                current_dir = os.path.join(
-                    wounds_output_dir, os.path.basename(wi.image_path).replace(".", "_"))
-                extension = "." + wi.image_path.split(".")[-1]
-
-                # Save all data in the 'img_output_dir'
-                wi.save_all(
-                    img_output_dir=current_dir,
-                    csv_output_file=csv_output_file,
-                    file_extension=extension)
+            # Save all data in the 'wounds_output_dir' and 'results_file',
+            # skipping the images already processed by a previous run, and add
+            # the results to the 'store_file'
+            with Manifest(manifest_file) as manifest, ResultsStore(store_file) as store:
+                for _ in run_batch(
+                        image_paths=image_paths,
+                        wounds_output_dir=wounds_output_dir,
+                        results_file=results_file,
+                        workers=self.workers,
+                        ordered=self.ordered,
+                        logging=self.logging,
+                        input_root=self.folder_input,
+                        manifest=manifest,
+                        working_scale=self.working_scale,
+                        labels=labels,
+                        store=store,
+                        source="cli",
+                        graph_workers=self.graph_workers,
+                        encoder_settings=self.encoder_settings,
+                        morphometrics_file=morphometrics_file,
+                        pixel_size=self.pixel_size,
+                        backend=self.backend,
+                        model_path=self.model_path):
+                    pass
 
             if self.folder_output:
                 # For Windows
@@ -59,8 +98,49 @@ class CLI:
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Process the wound images of the input folder.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes, each with its own models (default: 1)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write the CSV rows as images complete instead of in input order")
+    parser.add_argument("--recursive", action="store_true",
+                        help="also process the images of the input sub-folders")
+    parser.add_argument("--force", action="store_true",
+                        help="process every image again, even those recorded in the output manifest")
+    parser.add_argument("--working-scale", type=float, default=1.0,
+                        help="fraction of the image resolution the masks are computed at, in (0, 1] (default: 1)")
+    parser.add_argument("--results-format", choices=("csv", "parquet", "sqlite"), default="csv",
+                        help="format of the PWAT results, parquet needs pyarrow (default: csv)")
+    parser.add_argument("--labels",
+                        help="CSV of the image, patient_id, wound_id and clinical_pwat of the input images (default: input/labels.csv if any)")
+    parser.add_argument("--graph-workers", type=int, default=1,
+                        help="threads computing the independent stages of each image, e.g. the PWAT with the masks (default: 1)")
+    parser.add_argument("--png-compression", type=int, choices=range(10), metavar="{0..9}",
+                        help="compression level of the saved PNG images, faster when lower (default: OpenCV's 1)")
+    parser.add_argument("--jpeg-quality", type=int, choices=range(101), metavar="{0..100}",
+                        help="quality of the saved JPEG images (default: OpenCV's 95)")
+    parser.add_argument("--pixel-size", type=float,
+                        help="side of a pixel in millimeters, to also write the areas and perimeters in millimeters (default: pixels only)")
+    parser.add_argument("--backend", choices=tuple(BACKENDS), default=TENSORFLOW,
+                        help="inference backend of the segmentation, onnx and tflite run the --model-path model (default: tensorflow)")
+    parser.add_argument("--model-path",
+                        help="exported model of the onnx or tflite backend, see src.model_export")
+    args = parser.parse_args()
+    if args.pixel_size is not None and args.pixel_size <= 0:
+        parser.error("--pixel-size must be positive")
+    if args.backend != TENSORFLOW and not args.model_path:
+        parser.error(f"--backend {args.backend} needs --model-path")
+
     logging = True
-    cli = CLI(logging)
+    cli = CLI(logging, workers=args.workers, ordered=not args.unordered,
+              recursive=args.recursive, resume=not args.force,
+              working_scale=args.working_scale, results_format=args.results_format,
+              labels_file=args.labels, graph_workers=args.graph_workers,
+              encoder_settings={".png": args.png_compression,
+                                ".jpg": args.jpeg_quality, ".jpeg": args.jpeg_quality},
+              pixel_size=args.pixel_size, backend=args.backend,
+              model_path=args.model_path)
     cli.folder_input = os.path.abspath(os.path.join("input"))
     cli.folder_output = os.path.abspath(os.path.join("output", "demo", "cli"))
     cli.run()
@@ -0,0 +1,75 @@
+import os
+import csv
+
+from typing import Any, Optional
+
+LABELS_FILE = "labels.csv"
+
+
+def read_labels(
+        file_path: str, input_root: Optional[str] = None) -> dict[str, dict[str, Any]]:
+    """
+    Read the clinical labels of the input images from a CSV file.
+
+    The file has an `image` column, holding the path of each image relative
+    to the input folder, and any of the optional `patient_id`, `wound_id`
+    and `clinical_pwat` columns. Empty cells are left unknown.
+
+    Args:
+        file_path (str): Path of the labels CSV file.
+        input_root (str | None): Input folder the image paths are relative to, the folder of the file if None.
+
+    Returns:
+        dict[str, dict[str, Any]]: The patient ID, wound ID and clinical PWAT of each image, by normalized image path.
+
+    Raises:
+        ValueError: If the file has no `image` column or a clinical PWAT is not a number.
+    """
+    input_root = input_root or os.path.dirname(file_path)
+    labels: dict[str, dict[str, Any]] = {}
+    with open(file_path, mode="r", newline="") as file:
+        reader = csv.DictReader(file)
+        if "image" not in (reader.fieldnames or []):
+            raise ValueError(f"Labels {file_path} have no 'image' column.")
+        for line in reader:
+            clinical_pwat = line.get("clinical_pwat") or None
+            try:
+                clinical_pwat = float(
+                    clinical_pwat) if clinical_pwat is not None else None
+            except ValueError:
+                raise ValueError(
+                    f"Clinical PWAT {clinical_pwat} of {line['image']} is not a number.")
+            labels[label_key(os.path.join(input_root, line["image"]))] = {
+                "patient_id": line.get("patient_id") or None,
+                "wound_id": line.get("wound_id") or None,
+                "clinical_pwat": clinical_pwat,
+            }
+    return labels
+
+
+def find_labels(input_root: str) -> dict[str, dict[str, Any]]:
+    """
+    Read the labels CSV file of an input folder, if it has one.
+
+    Args:
+        input_root (str): The input folder.
+
+    Returns:
+        dict[str, dict[str, Any]]: The labels, see `read_labels`, empty without labels file.
+    """
+    file_path = os.path.join(input_root, LABELS_FILE)
+    return read_labels(file_path, input_root) if os.path.exists(
+        file_path) else {}
+
+
+def label_key(image_path: str) -> str:
+    """
+    Normalize an image path to look up its labels.
+
+    Args:
+        image_path (str): Path to the wound image file.
+
+    Returns:
+        str: The absolute, normalized path.
+    """
+    return os.path.normcase(os.path.abspath(image_path))
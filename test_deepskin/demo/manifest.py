@@ -0,0 +1,166 @@
+import os
+import json
+import sqlite3
+import hashlib
+import datetime
+
+from typing import Any
+
+
+class Manifest:
+    """
+    A SQLite record of the images already processed by a batch run.
+
+    Each processed image is stored with the hash of its content, the
+    processing parameters, the model version and its output files. A later
+    run skips an image when all of them still match, so only new or changed
+    images are processed again and an interrupted run resumes where it
+    stopped. The content hash is only recomputed when the file size or
+    modification time changed.
+
+    Attributes:
+        db_path (str): Path of the SQLite database.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the Manifest object, creating the database if needed.
+
+        Args:
+            db_path (str): Path of the SQLite database.
+        """
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        self.db_path: str = db_path
+        self._connection = sqlite3.connect(db_path)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                image_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                processed_at TEXT NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        self._connection.close()
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """
+        Hash the content of a file.
+
+        Args:
+            file_path (str): Path of the file.
+
+        Returns:
+            str: The hexadecimal digest.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, mode="rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def check(self, image_path: str, params: dict[str, Any],
+              model_version: str) -> tuple[bool, str]:
+        """
+        Check whether an image is already processed with the same parameters and model.
+
+        Args:
+            image_path (str): Path to the wound image file.
+            params (dict[str, Any]): The processing parameters.
+            model_version (str): The version of the models.
+
+        Returns:
+            tuple[bool, str]: Whether the image can be skipped, and its content hash.
+        """
+        stat = os.stat(image_path)
+        row = self._connection.execute(
+            "SELECT size, mtime_ns, content_hash, params, model_version, outputs "
+            "FROM images WHERE image_path = ?", (image_path,)).fetchone()
+        if row is None:
+            return False, self.hash_file(image_path)
+
+        size, mtime_ns, done_hash, done_params, done_model_version, outputs = row
+        content_hash = done_hash
+        if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            content_hash = self.hash_file(image_path)
+            if content_hash != done_hash:
+                return False, content_hash
+        done = (
+            done_params == self._dumps(params)
+            and done_model_version == model_version
+            and all(os.path.exists(output) for output in json.loads(outputs))
+        )
+        return done, content_hash
+
+    def record(self, image_path: str, content_hash: str, params: dict[str, Any],
+               model_version: str, outputs: list[str]) -> None:
+        """
+        Record a processed image, committed right away so a crash keeps it.
+
+        Args:
+            image_path (str): Path to the wound image file.
+            content_hash (str): The content hash given by `check`.
+            params (dict[str, Any]): The processing parameters.
+            model_version (str): The version of the models.
+            outputs (list[str]): Paths of the files written for the image.
+        """
+        self.record_many(
+            [(image_path, content_hash, params, model_version, outputs)])
+
+    def record_many(
+            self, records: list[tuple[str, str, dict[str, Any], str, list[str]]]) -> None:
+        """
+        Record several processed images in a single commit.
+
+        Args:
+            records (list[tuple[str, str, dict[str, Any], str, list[str]]]): The arguments of `record` for each image.
+        """
+        processed_at = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        rows = []
+        for image_path, content_hash, params, model_version, outputs in records:
+            stat = os.stat(image_path)
+            rows.append((
+                image_path,
+                stat.st_size,
+                stat.st_mtime_ns,
+                content_hash,
+                self._dumps(params),
+                model_version,
+                json.dumps(outputs),
+                processed_at,
+            ))
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._connection.commit()
+
+    @staticmethod
+    def _dumps(params: dict[str, Any]) -> str:
+        """
+        Serialize processing parameters in a stable way.
+
+        Args:
+            params (dict[str, Any]): The processing parameters.
+
+        Returns:
+            str: The JSON string.
+        """
+        return json.dumps(params, sort_keys=True)
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,393 @@
+import os
+import multiprocessing
+
+from numpy import ndarray
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+
+from demo.manifest import Manifest
+from demo.labels import label_key
+from src.wound_image import WoundImage
+from src.results_store import ResultsStore
+from src.results_writer import open_results_writer
+from src.model_registry import model_registry
+from src.inference_backend import TENSORFLOW
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def iter_image_paths(folder: str, recursive: bool = False) -> Iterator[str]:
+    """
+    Lazily list the image files of a folder.
+
+    Args:
+        folder (str): The folder to walk.
+        recursive (bool): Whether to also walk the sub-folders.
+
+    Yields:
+        str: The path of each image file, as soon as it is found.
+    """
+    folders = [folder]
+    while folders:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(IMAGE_EXTENSIONS):
+                    yield entry.path
+                elif recursive and entry.is_dir():
+                    folders.append(entry.path)
+
+
+def processing_params(image_path: str, working_scale: float = 1.0,
+                      results_file: Optional[str] = None,
+                      morphometrics_file: Optional[str] = None,
+                      pixel_size: Optional[float] = None,
+                      label: Optional[dict] = None,
+                      encoder_settings: Optional[dict[str, int]] = None) -> dict:
+    """
+    Get the parameters the outputs of an image depend on.
+
+    Args:
+        image_path (str): Path to the wound image file.
+        working_scale (float): Fraction of the image resolution the masks are computed at.
+        results_file (str | None): Path the PWAT row of the image is written to, its extension giving the format.
+        morphometrics_file (str | None): Path the morphometrics row of the image is written to, none if None.
+        pixel_size (float | None): Side of a pixel in millimeters of the physical morphometrics.
+        label (dict | None): Patient ID, wound ID and clinical PWAT of the image, see `read_labels`.
+        encoder_settings (dict[str, int] | None): Encoder setting by file extension, see `WoundImage.save_images`.
+
+    Returns:
+        dict: The segmentation and PWAT parameters, the rendered artifacts, their extension and encoder setting, the results files and the labels.
+    """
+    file_extension = "." + image_path.split(".")[-1]
+    return {
+        # Other results files do not have the rows of the images already
+        # processed
+        "results_file": results_file,
+        "morphometrics_file": morphometrics_file,
+        "pixel_size": pixel_size,
+        # Written to the results row and the store, a relabelled image is
+        # processed again
+        "label": {key: (label or {}).get(key) for key in ("patient_id", "wound_id", "clinical_pwat")},
+        "working_scale": working_scale,
+        "segmentation_tol": WoundImage.SEGMENTATION_TOL,
+        "peri_wound_ksize": list(WoundImage.PERI_WOUND_KSIZE),
+        "pwat_ksize": list(WoundImage.PWAT_KSIZE),
+        "artifacts": list(WoundImage.ARTIFACTS),
+        "file_extension": file_extension,
+        # Only the setting of the saved format, e.g. a new JPEG quality
+        # leaves the PNG images processed
+        "encoder_setting": (encoder_settings or {}).get(file_extension),
+    }
+
+
+def init_worker(logging: bool, threads: int, backend: str = TENSORFLOW,
+                model_path: Optional[str] = None) -> None:
+    """
+    Share the CPU between the worker processes and warm the models of one.
+
+    Args:
+        logging (bool): Whether to enable logging for debugging purposes.
+        threads (int): Number of TensorFlow and inference backend threads of the worker.
+        backend (str): Name of the inference backend of the segmentation, see `BACKENDS`.
+        model_path (str | None): Path of the exported model of the backend, None for TensorFlow.
+    """
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+    except RuntimeError:
+        # TensorFlow runtime already initialized, keep its threads
+        pass
+    model_registry.configure(backend, model_path, threads)
+    model_registry.warm_up(verbose=logging)
+
+
+def process_image(image_path: str, wounds_output_dir: str, logging: bool,
+                  input_root: Optional[str] = None,
+                  working_scale: float = 1.0,
+                  clinical_pwat: Optional[float] = None,
+                  graph_workers: int = 1,
+                  preview_width: Optional[int] = None,
+                  encoder_settings: Optional[dict[str, int]] = None,
+                  morphometrics: bool = False,
+                  pixel_size: Optional[float] = None) -> tuple[list, list[str], Optional[ndarray], Optional[list]]:
+    """
+    Save all processed images of an input image.
+
+    The WoundImage and its arrays are dropped when the function returns,
+    only the PWAT row, and the small contact sheet and morphometrics row if
+    asked, are kept.
+
+    Args:
+        image_path (str): Path to the wound image file.
+        wounds_output_dir (str): Directory receiving one folder of images per input image.
+        logging (bool): Whether to enable logging for debugging purposes.
+        input_root (str | None): Input folder the image folder name is relative to, its own folder if None.
+        working_scale (float): Fraction of the image resolution the masks are computed at.
+        clinical_pwat (float | None): PWAT scored by a clinician, None if not labelled.
+        graph_workers (int): Number of threads computing the independent stages of the image.
+        preview_width (int | None): Width of the images of the contact sheet returned, none if None.
+        encoder_settings (dict[str, int] | None): Encoder setting by file extension, see `WoundImage.save_images`.
+        morphometrics (bool): Whether to also return the morphometrics row of the image.
+        pixel_size (float | None): Side of a pixel in millimeters, for the physical morphometrics.
+
+    Returns:
+        tuple[list, list[str], ndarray | None, list | None]: The PWAT row of the image, see `WoundImage.get_pwat_row`, the paths of the saved images, the contact sheet and the morphometrics row, see `WoundImage.get_morphometrics_row`.
+    """
+    wi = WoundImage(image_path=image_path, logging=logging,
+                    working_scale=working_scale, clinical_pwat=clinical_pwat)
+    relative_path = os.path.relpath(
+        image_path, input_root) if input_root else os.path.basename(image_path)
+    current_dir = os.path.join(
+        wounds_output_dir, relative_path.replace(".", "_"))
+    extension = "." + wi.image_path.split(".")[-1]
+
+    # Save all images in the 'img_output_dir'
+    wi.compute(WoundImage.ARTIFACTS + (("morphometrics",)
+               if morphometrics else ()), graph_workers)
+    outputs = wi.save_images(img_output_dir=current_dir, file_extension=extension,
+                             encoder_settings=encoder_settings)
+    # Rendered from the arrays already computed, without reading the saved
+    # images
+    preview = wi.render_contact_sheet(
+        thumbnail_width=preview_width) if preview_width is not None else None
+    morphometrics_row = wi.get_morphometrics_row(
+        pixel_size) if morphometrics else None
+    return wi.get_pwat_row(), outputs, preview, morphometrics_row
+
+
+def run_batch(image_paths: Iterable[str], wounds_output_dir: str, results_file: str,
+              workers: int, ordered: bool, logging: bool,
+              input_root: Optional[str] = None,
+              manifest: Optional[Manifest] = None,
+              working_scale: float = 1.0,
+              flush_every: int = 64,
+              labels: Optional[dict[str, dict]] = None,
+              store: Optional[ResultsStore] = None,
+              source: str = "cli",
+              graph_workers: int = 1,
+              preview: Optional[Callable[[str, ndarray], None]] = None,
+              preview_width: int = 160,
+              encoder_settings: Optional[dict[str, int]] = None,
+              morphometrics_file: Optional[str] = None,
+              pixel_size: Optional[float] = None,
+              backend: str = TENSORFLOW,
+              model_path: Optional[str] = None) -> Iterator[list]:
+    """
+    Process images sequentially or on a pool of worker processes.
+
+    Images are pulled lazily from `image_paths` and at most two per worker
+    are in flight, so memory does not grow with the number of images and
+    the first results are written right away. Each worker process loads its
+    own models once. The PWAT rows and the manifest are only written by the
+    calling process, through one results writer opened for the whole run,
+    which writes the rows `flush_every` at a time, as does the writer of the
+    morphometrics rows. The images of the written rows are then recorded in
+    the manifest, and added to the results store, in a single commit each.
+
+    Args:
+        image_paths (Iterable[str]): Paths to the wound image files, e.g. from `iter_image_paths`.
+        wounds_output_dir (str): Directory receiving one folder of images per input image.
+        results_file (str): Path to save PWAT data, a .csv, .parquet or .sqlite file, see `open_results_writer`.
+        workers (int): Number of worker processes, 1 to process in the calling process.
+        ordered (bool): Whether the rows follow the order of `image_paths` or the completion order.
+        logging (bool): Whether to enable logging for debugging purposes.
+        input_root (str | None): Input folder the image folder names are relative to, their own folder if None.
+        manifest (Manifest | None): Record of the processed images, those already in it are skipped.
+        working_scale (float): Fraction of the image resolution the masks are computed at.
+        flush_every (int): Number of PWAT rows written to the results file at once.
+        labels (dict[str, dict] | None): Patient ID, wound ID and clinical PWAT of the labelled images, see `read_labels`.
+        store (ResultsStore | None): Store the results are added to, with the content hash and labels of their image.
+        source (str): Name of the run in the results store (e.g., 'cli' or 'ui').
+        graph_workers (int): Number of threads computing the independent stages of each image.
+        preview (Callable[[str, ndarray], None] | None): Called with the path and the BGR contact sheet of each processed image, see `WoundImage.render_contact_sheet`.
+        preview_width (int): Width of the images of the contact sheets sent to `preview`.
+        encoder_settings (dict[str, int] | None): Encoder setting by file extension, see `WoundImage.save_images`.
+        morphometrics_file (str | None): Path to save the morphometrics of the images, any format of `results_file`, none if None.
+        pixel_size (float | None): Side of a pixel in millimeters, for the physical morphometrics.
+        backend (str): Name of the inference backend of the segmentation, see `BACKENDS`.
+        model_path (str | None): Path of the exported model of the backend, None for TensorFlow.
+
+    Yields:
+        list: The PWAT row of each processed image, once its images are saved.
+
+    Raises:
+        ValueError: If the backend is not valid or its model path is missing.
+    """
+    # Configured first, the model version tells apart the results of each
+    # backend
+    model_registry.configure(backend, model_path)
+    model_version = model_registry.version()
+
+    def params(image_path: str, label: dict) -> dict:
+        return processing_params(image_path, working_scale, results_file,
+                                 morphometrics_file, pixel_size, label, encoder_settings)
+
+    def pending_images() -> Iterator[tuple[str, Optional[str], dict]]:
+        for image_path in image_paths:
+            content_hash = None
+            label = labels.get(label_key(image_path), {}) if labels else {}
+            if manifest is not None:
+                done, content_hash = manifest.check(
+                    image_path, params(image_path, label), model_version)
+                if done:
+                    if logging:
+                        print(f"Skipped {image_path}, already processed")
+                    continue
+            elif store is not None:
+                content_hash = Manifest.hash_file(image_path)
+            yield image_path, content_hash, label
+
+    writer = open_results_writer(results_file, WoundImage.CSV_HEADER,
+                                 flush_every=flush_every, logging=logging)
+    morphometrics_writer = open_results_writer(
+        morphometrics_file, WoundImage.MORPHOMETRICS_HEADER, flush_every=flush_every,
+        logging=logging) if morphometrics_file else None
+    unrecorded: list[tuple[str, Optional[str], dict, str, list[str]]] = []
+    unstored: list[dict] = []
+
+    def record() -> None:
+        # Recorded last, an image is only skipped once its row is written
+        if manifest is not None and unrecorded:
+            manifest.record_many(unrecorded)
+        if store is not None and unstored:
+            store.add(unstored)
+        unrecorded.clear()
+        unstored.clear()
+
+    def complete(image_path: str, content_hash: Optional[str], label: dict,
+                 row: list, outputs: list[str], sheet: Optional[ndarray],
+                 morphometrics_row: Optional[list]) -> None:
+        writer.write(row)
+        if morphometrics_writer is not None:
+            morphometrics_writer.write(morphometrics_row)
+        unrecorded.append(
+            (image_path,
+             content_hash,
+             params(image_path, label),
+                model_version,
+                outputs))
+        unstored.append({
+            "image_hash": content_hash,
+            "image": image_path,
+            "patient_id": label.get("patient_id"),
+            "wound_id": label.get("wound_id"),
+            "clinical_pwat": row[1],
+            "predicted_pwat": row[2],
+            "working_scale": working_scale,
+            "model_version": model_version,
+            "source": source,
+        })
+        # Both writers get a row per image, they flush together
+        if writer.buffered == 0:
+            record()
+        if preview is not None:
+            preview(image_path, sheet)
+
+    try:
+        yield from _run_images(pending_images(), complete, wounds_output_dir, workers,
+                               ordered, logging, input_root, working_scale, graph_workers,
+                               preview_width if preview is not None else None, encoder_settings,
+                               morphometrics_writer is not None, pixel_size, backend, model_path)
+    finally:
+        try:
+            writer.close()
+        finally:
+            if morphometrics_writer is not None:
+                morphometrics_writer.close()
+        record()
+
+
+def _run_images(images: Iterator[tuple[str, Optional[str], dict]], complete: Callable[..., None],
+                wounds_output_dir: str, workers: int, ordered: bool, logging: bool,
+                input_root: Optional[str], working_scale: float,
+                graph_workers: int, preview_width: Optional[int],
+                encoder_settings: Optional[dict[str, int]], morphometrics: bool,
+                pixel_size: Optional[float], backend: str,
+                model_path: Optional[str]) -> Iterator[list]:
+    """
+    Process images sequentially or on a pool of worker processes, see `run_batch`.
+
+    Args:
+        images (Iterator[tuple[str, str | None, dict]]): The path, content hash and labels of each image to process.
+        complete (Callable[..., None]): Called with the path, content hash, labels, PWAT row, outputs, contact sheet and morphometrics row of each processed image.
+        wounds_output_dir (str): Directory receiving one folder of images per input image.
+        workers (int): Number of worker processes, 1 to process in the calling process.
+        ordered (bool): Whether the rows follow the order of `images` or the completion order.
+        logging (bool): Whether to enable logging for debugging purposes.
+        input_root (str | None): Input folder the image folder names are relative to, their own folder if None.
+        working_scale (float): Fraction of the image resolution the masks are computed at.
+        graph_workers (int): Number of threads computing the independent stages of each image.
+        preview_width (int | None): Width of the images of the contact sheets, none if None.
+        encoder_settings (dict[str, int] | None): Encoder setting by file extension, see `WoundImage.save_images`.
+        morphometrics (bool): Whether to compute the morphometrics row of each image.
+        pixel_size (float | None): Side of a pixel in millimeters, for the physical morphometrics.
+        backend (str): Name of the inference backend of the worker processes.
+        model_path (str | None): Path of the exported model of the backend.
+
+    Yields:
+        list: The PWAT row of each processed image.
+    """
+    if workers <= 1:
+        for image_path, content_hash, label in images:
+            row, outputs, sheet, morphometrics_row = process_image(
+                image_path, wounds_output_dir, logging, input_root, working_scale,
+                label.get(
+                    "clinical_pwat"), graph_workers, preview_width, encoder_settings,
+                morphometrics, pixel_size)
+            complete(
+                image_path,
+                content_hash,
+                label,
+                row,
+                outputs,
+                sheet,
+                morphometrics_row)
+            yield row
+        return
+
+    # TensorFlow is not fork-safe, workers start from a fresh interpreter
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(logging, threads, backend, model_path)) as executor:
+        pending: deque[tuple[Future, str, Optional[str], dict]] = deque()
+
+        def submit_next() -> bool:
+            image = next(images, None)
+            if image is None:
+                return False
+            image_path, content_hash, label = image
+            pending.append((executor.submit(
+                process_image, image_path, wounds_output_dir, logging, input_root,
+                working_scale, label.get(
+                    "clinical_pwat"), graph_workers, preview_width,
+                encoder_settings, morphometrics, pixel_size),
+                image_path, content_hash, label))
+            return True
+
+        while len(pending) < 2 * workers and submit_next():
+            pass
+        while pending:
+            if ordered:
+                item = pending.popleft()
+            else:
+                done, _ = wait([future for future, _, _, _ in pending],
+                               return_when=FIRST_COMPLETED)
+                item = next(item for item in pending if item[0] in done)
+                pending.remove(item)
+            future, image_path, content_hash, label = item
+            row, outputs, sheet, morphometrics_row = future.result()
+            submit_next()
+            complete(
+                image_path,
+                content_hash,
+                label,
+                row,
+                outputs,
+                sheet,
+                morphometrics_row)
+            yield row
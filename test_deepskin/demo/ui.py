@@ -1,11 +1,15 @@
 from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QFileDialog, QMessageBox, QProgressBar
 from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QImage, QPixmap
 
 import subprocess
 import sys
 import os
+import numpy as np
 
-from src.wound_image import WoundImage
+from demo.labels import find_labels
+from demo.pipeline import run_batch, iter_image_paths
+from src.results_store import ResultsStore
 
 
 class Worker(QThread):
@@ -14,6 +18,7 @@ class Worker(QThread):
     finished = Signal()
     error = Signal(str)
     progress = Signal(int)
+    preview = Signal(object)
 
     def __init__(self, folder_input: str, folder_output: str, logging: bool):
         super().__init__()
@@ -23,36 +28,32 @@ class Worker(QThread):
 
     def run(self):
         try:
-            # List all image files in the input folder
-            wsis: list[WoundImage] = [
-                WoundImage(
-                    image_path=os.path.join(
-                        self.folder_input,
-                        file),
-                    logging=self.logging)
-                for file in os.listdir(self.folder_input)
-                if file.endswith((".png", ".jpg", ".jpeg"))
-            ]
-
-            total_files = len(wsis)
+            # Count the image files without keeping them, for the progress bar
+            total_files = sum(1 for _ in iter_image_paths(self.folder_input))
             wounds_output_dir = os.path.join(self.folder_output, "wounds")
-            csv_output_file = os.path.join(
+            results_file = os.path.join(
                 self.folder_output, "csv", "pwat_data.csv")
-
-            for index, wi in enumerate(wsis):
-                # Update progress bar
-                progress = int(((index + 1) / total_files) * 100)
-                self.progress.emit(progress)
-
-                current_dir = os.path.join(
-                    wounds_output_dir, os.path.basename(wi.image_path).replace(".", "_"))
-                extension = "." + wi.image_path.split(".")[-1]
-
-                # Save all data in the 'img_output_dir'
-                wi.save_all(
-                    img_output_dir=current_dir,
-                    csv_output_file=csv_output_file,
-                    file_extension=extension)
+            store_file = os.path.join(self.folder_output, "results.sqlite")
+
+            # Save all data in the 'wounds_output_dir' and 'results_file',
+            # one image at a time, and add the results to the 'store_file'
+            with ResultsStore(store_file) as store:
+                for index, _ in enumerate(run_batch(
+                        image_paths=iter_image_paths(self.folder_input),
+                        wounds_output_dir=wounds_output_dir,
+                        results_file=results_file,
+                        workers=1,
+                        ordered=True,
+                        logging=self.logging,
+                        input_root=self.folder_input,
+                        labels=find_labels(self.folder_input),
+                        store=store,
+                        source="ui",
+                        # Contact sheet of each image, straight from its arrays
+                        preview=lambda _, sheet: self.preview.emit(sheet))):
+                    # Update progress bar
+                    progress = int(((index + 1) / total_files) * 100)
+                    self.progress.emit(progress)
 
             if self.folder_output:
                 # For Windows
@@ -113,6 +114,11 @@ class UI(QWidget):
         # Add the progress bar to the layout
         layout.addWidget(self.progress_bar)
 
+        # Contact sheet of the last processed image
+        self.label_preview = QLabel()
+        self.label_preview.setVisible(False)
+        layout.addWidget(self.label_preview)
+
         self.setLayout(layout)
 
     def choose_folder_input(self):
@@ -153,6 +159,7 @@ class UI(QWidget):
             self.worker.finished.connect(self.on_generation_finished)
             self.worker.error.connect(self.on_generation_error)
             self.worker.progress.connect(self.on_progress_update)
+            self.worker.preview.connect(self.on_preview_update)
 
             # Start the worker thread
             self.worker.start()
@@ -171,6 +178,15 @@ class UI(QWidget):
     def on_progress_update(self, value: int):
         self.progress_bar.setValue(value)  # Update the progress bar
 
+    def on_preview_update(self, sheet: np.ndarray):
+        sheet = np.ascontiguousarray(sheet)
+        height, width = sheet.shape[:2]
+        # Copied, the QImage does not own the array memory
+        image = QImage(sheet.data, width, height, sheet.strides[0],
+                       QImage.Format.Format_BGR888).copy()
+        self.label_preview.setPixmap(QPixmap.fromImage(image))
+        self.label_preview.setVisible(True)
+
     def reset_ui(self):
         self.btn_input.setEnabled(True)
         self.btn_output.setEnabled(True)
@@ -0,0 +1,159 @@
+import time
+import queue
+import threading
+import numpy as np
+
+from numpy import ndarray
+from typing import Optional
+from concurrent.futures import Future
+
+from src.model_registry import ModelRegistry
+
+
+class BatchSegmenter:
+    """
+    A micro-batching front of the segmentation model.
+
+    Concurrent `segment` calls are collected for up to `max_batch` images or
+    `max_wait` seconds and run through the model in one forward pass. Every
+    image is resized to the fixed model input in its calling thread, so the
+    batch is a plain stack without padding, and each caller thresholds and
+    resizes its own prediction back. It exposes the same `segment` and `pwat`
+    methods as the `ModelRegistry` it wraps and can be given to a `WoundImage`.
+
+    Attributes:
+        models (ModelRegistry): The registry holding the segmentation model.
+        max_batch (int): Maximum number of images per forward pass.
+        max_wait (float): Maximum seconds the first image waits for others.
+    """
+
+    def __init__(self, models: ModelRegistry, max_batch: int, max_wait: float):
+        """
+        Initialize the BatchSegmenter object.
+
+        Args:
+            models (ModelRegistry): The registry holding the segmentation model.
+            max_batch (int): Maximum number of images per forward pass.
+            max_wait (float): Maximum seconds the first image waits for others.
+
+        Raises:
+            ValueError: If the batch size is not positive or the wait is negative.
+        """
+        if max_batch < 1 or max_wait < 0:
+            raise ValueError(
+                "Batch size must be positive and batch wait must not be negative.")
+
+        self.models: ModelRegistry = models
+        self.max_batch: int = max_batch
+        self.max_wait: float = max_wait
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start the thread running the batched forward passes.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="batch-segmenter", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the batching thread once the pending images are processed.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def segment(self, img: ndarray, tol: float,
+                verbose: bool = False) -> ndarray:
+        """
+        Segment an RGB image in wound, body and background masks.
+
+        Args:
+            img (ndarray): The RGB image.
+            tol (float): The probability threshold of each class.
+            verbose (bool): Whether deepskin prints its loading messages.
+
+        Returns:
+            ndarray: The uint8 segmentation mask with the wound, body and background channels.
+
+        Raises:
+            RuntimeError: If the batching thread is not started.
+        """
+        if self._thread is None:
+            raise RuntimeError("Batch segmenter is not started.")
+        self.models.load(verbose=verbose)
+        future: Future = Future()
+        self._queue.put((self.models.preprocess(img), future))
+        return self.models.postprocess(future.result(), img.shape, tol)
+
+    def pwat(self, img: ndarray, mask: ndarray,
+             ksize: tuple[int, int], verbose: bool = False) -> float:
+        """
+        Predict the PWAT score of an RGB image from its segmentation.
+
+        Args:
+            img (ndarray): The RGB image.
+            mask (ndarray): The segmentation mask of the image.
+            ksize (tuple[int, int]): Kernel size of the peri-wound area.
+            verbose (bool): Whether deepskin prints its messages.
+
+        Returns:
+            float: The predicted PWAT.
+        """
+        return self.models.pwat(
+            img=img, mask=mask, ksize=ksize, verbose=verbose)
+
+    def _collect(self, first: tuple[ndarray, Future]
+                 ) -> list[tuple[ndarray, Future]]:
+        """
+        Collect the images arriving within `max_wait` of the first one.
+
+        Args:
+            first (tuple[ndarray, Future]): The first preprocessed image and its future.
+
+        Returns:
+            list[tuple[ndarray, Future]]: At most `max_batch` images and their futures.
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    # Still take what already arrived
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Keep the stop signal for the main loop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        """
+        Run the forward passes until `stop` is called.
+        """
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            futures = [future for _, future in batch]
+            try:
+                preds = self.models.predict(
+                    np.stack([inputs for inputs, _ in batch]))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, pred in zip(futures, preds):
+                future.set_result(pred)
@@ -0,0 +1,260 @@
+import threading
+import numpy as np
+
+from abc import ABC, abstractmethod
+from numpy import ndarray
+from typing import Any, Optional
+
+TENSORFLOW = "tensorflow"
+ONNX = "onnx"
+TFLITE = "tflite"
+
+
+class InferenceBackend(ABC):
+    """
+    A runtime of the segmentation model.
+
+    Every backend takes the same float32 batches of preprocessed images and
+    returns the same class probabilities, see `ModelRegistry.predict`, so
+    the pre and post processing are shared. TensorFlow runs the deepskin
+    model itself and is the reference, the others run a model exported from
+    it, see `src.model_export`.
+
+    Attributes:
+        model_path (str | None): Path of the exported model, None for TensorFlow.
+        threads (int | None): Number of threads of one forward pass, the runtime default if None.
+    """
+
+    name = ""
+
+    def __init__(
+            self, model_path: Optional[str] = None, threads: Optional[int] = None):
+        """
+        Initialize the InferenceBackend object, the model is only read by `load`.
+
+        Args:
+            model_path (str | None): Path of the exported model, None for TensorFlow.
+            threads (int | None): Number of threads of one forward pass, the runtime default if None.
+        """
+        self.model_path: Optional[str] = model_path
+        self.threads: Optional[int] = threads
+
+    @abstractmethod
+    def load(self, verbose: bool = False) -> None:
+        """
+        Load the model.
+
+        Args:
+            verbose (bool): Whether to print the loading messages.
+        """
+
+    @abstractmethod
+    def input_size(self) -> tuple[int, int]:
+        """
+        Get the input size of the model.
+
+        Returns:
+            tuple[int, int]: The (height, width) expected by the model.
+        """
+
+    @abstractmethod
+    def predict(self, batch: ndarray) -> ndarray:
+        """
+        Run the model on a batch of preprocessed images.
+
+        Args:
+            batch (ndarray): A (N, height, width, 3) float32 array in [0, 1].
+
+        Returns:
+            ndarray: The (N, height, width, 3) float32 class probabilities.
+        """
+
+
+class TensorFlowBackend(InferenceBackend):
+    """
+    The deepskin Keras model run by TensorFlow, the reference of the other backends.
+    """
+
+    name = TENSORFLOW
+
+    def load(self, verbose: bool = False) -> None:
+        # Imported here, only this backend builds the Keras model
+        from deepskin import deepskin_model
+        self._model = deepskin_model(verbose=verbose)
+
+    def input_size(self) -> tuple[int, int]:
+        _, height, width, _ = self._model.input_shape
+        return height, width
+
+    def predict(self, batch: ndarray) -> ndarray:
+        return np.asarray(self._model(batch, training=False))
+
+    @property
+    def model(self) -> Any:
+        """The loaded Keras model, to export it."""
+        return self._model
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    An exported ONNX model run by ONNX Runtime on the CPU, float32 or int8 quantized.
+
+    It needs the optional `onnxruntime` package. A session runs concurrent
+    batches safely.
+    """
+
+    name = ONNX
+
+    def load(self, verbose: bool = False) -> None:
+        """
+        Load the model.
+
+        Args:
+            verbose (bool): Whether to print the loading messages.
+
+        Raises:
+            ImportError: If onnxruntime is not installed.
+        """
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "ONNX backend needs onnxruntime, install it with 'pip install onnxruntime'.") from e
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        options.log_severity_level = 0 if verbose else 3
+        self._session = onnxruntime.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"])
+        self._input = self._session.get_inputs()[0]
+
+    def input_size(self) -> tuple[int, int]:
+        _, height, width, _ = self._input.shape
+        return height, width
+
+    def predict(self, batch: ndarray) -> ndarray:
+        return self._session.run(
+            None, {self._input.name: batch.astype(np.float32, copy=False)})[0]
+
+
+class TfliteBackend(InferenceBackend):
+    """
+    An exported TFLite model, float32 or int8 quantized.
+
+    It runs with the small `tflite-runtime` package if installed, with
+    TensorFlow otherwise. The interpreter takes one image at a time and is
+    not thread safe, so the images of a batch run one after the other,
+    under a lock. The inputs and outputs of an int8 model are quantized and
+    dequantized here.
+    """
+
+    name = TFLITE
+
+    def load(self, verbose: bool = False) -> None:
+        """
+        Load the model.
+
+        Args:
+            verbose (bool): Whether to print the loading messages.
+
+        Raises:
+            ImportError: If neither tflite-runtime nor TensorFlow is installed.
+        """
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+            except ImportError as e:
+                raise ImportError(
+                    "TFLite backend needs tflite-runtime, install it with 'pip install tflite-runtime'.") from e
+        self._lock = threading.Lock()
+        self._interpreter = Interpreter(
+            model_path=self.model_path,
+            num_threads=self.threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+
+    def input_size(self) -> tuple[int, int]:
+        _, height, width, _ = self._input["shape"]
+        return int(height), int(width)
+
+    def predict(self, batch: ndarray) -> ndarray:
+        preds = []
+        with self._lock:
+            for img in batch:
+                self._interpreter.set_tensor(
+                    self._input["index"], self._quantize(img[np.newaxis, ...]))
+                self._interpreter.invoke()
+                preds.append(self._dequantize(
+                    self._interpreter.get_tensor(self._output["index"]))[0])
+        return np.stack(preds)
+
+    def _quantize(self, x: ndarray) -> ndarray:
+        """
+        Convert a float input to the input type of the model.
+
+        Args:
+            x (ndarray): The float32 input.
+
+        Returns:
+            ndarray: The input, quantized with the scale and zero point of an int8 model.
+        """
+        dtype = self._input["dtype"]
+        scale, zero_point = self._input["quantization"]
+        if not np.issubdtype(dtype, np.integer) or not scale:
+            return x.astype(dtype, copy=False)
+        info = np.iinfo(dtype)
+        return np.clip(np.round(x / scale + zero_point),
+                       info.min, info.max).astype(dtype)
+
+    def _dequantize(self, y: ndarray) -> ndarray:
+        """
+        Convert an output of the model to float.
+
+        Args:
+            y (ndarray): The output.
+
+        Returns:
+            ndarray: The float32 output, dequantized with the scale and zero point of an int8 model.
+        """
+        scale, zero_point = self._output["quantization"]
+        if not np.issubdtype(y.dtype, np.integer) or not scale:
+            return y.astype(np.float32, copy=False)
+        return (y.astype(np.float32) - zero_point) * np.float32(scale)
+
+
+BACKENDS = {
+    TENSORFLOW: TensorFlowBackend,
+    ONNX: OnnxBackend,
+    TFLITE: TfliteBackend,
+}
+
+
+def create_backend(name: str, model_path: Optional[str] = None,
+                   threads: Optional[int] = None) -> InferenceBackend:
+    """
+    Create an inference backend, without loading its model.
+
+    Args:
+        name (str): Name of the backend, one of `BACKENDS`.
+        model_path (str | None): Path of the exported model, required by every backend but TensorFlow.
+        threads (int | None): Number of threads of one forward pass, the runtime default if None.
+
+    Returns:
+        InferenceBackend: The backend.
+
+    Raises:
+        ValueError: If the backend is not valid or its model path is missing.
+    """
+    backend: Optional[type] = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(
+            f"{name} is not a valid backend, try one of {', '.join(BACKENDS)} instead.")
+    if name != TENSORFLOW and not model_path:
+        raise ValueError(
+            f"The {name} backend needs the path of an exported model.")
+    return backend(model_path, threads)
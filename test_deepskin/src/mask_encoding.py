@@ -0,0 +1,78 @@
+import cv2
+import numpy as np
+
+from numpy import ndarray
+from typing import Any
+
+
+def encode_rle(mask: ndarray) -> dict[str, Any]:
+    """
+    Run-length encode a binary mask, as the uncompressed RLE of COCO.
+
+    The pixels are read column after column, and the counts alternate
+    between background and mask runs, starting with a background run that
+    is 0 when the first pixel belongs to the mask.
+
+    Args:
+        mask (ndarray): The (height, width) mask, any non-zero pixel belongs to it.
+
+    Returns:
+        dict[str, Any]: The `size` as [height, width] and the `counts` of the runs.
+    """
+    height, width = mask.shape[:2]
+    pixels = mask.ravel(order="F") != 0
+    if pixels.size == 0:
+        return {"size": [height, width], "counts": []}
+    # Index of the first pixel of each run
+    starts = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+    counts = np.diff(np.concatenate(([0], starts, [pixels.size])))
+    if pixels[0]:
+        counts = np.concatenate(([0], counts))
+    return {"size": [height, width], "counts": counts.tolist()}
+
+
+def decode_rle(rle: dict[str, Any]) -> ndarray:
+    """
+    Decode a run-length encoded mask, see `encode_rle`.
+
+    Args:
+        rle (dict[str, Any]): The `size` as [height, width] and the `counts` of the runs.
+
+    Returns:
+        ndarray: The (height, width) uint8 mask in {0, 255}.
+
+    Raises:
+        ValueError: If the counts do not add up to the size.
+    """
+    height, width = rle["size"]
+    counts = np.asarray(rle["counts"], dtype=np.int64)
+    if counts.sum() != height * width:
+        raise ValueError(
+            f"Run lengths add up to {counts.sum()} pixels instead of {height * width}.")
+    values = np.where(np.arange(counts.size) % 2 == 1, 255, 0).astype(np.uint8)
+    return np.ascontiguousarray(
+        np.repeat(values, counts).reshape(width, height).T)
+
+
+def encode_polygons(mask: ndarray, tolerance: float = 0.0) -> list[list[int]]:
+    """
+    Encode the outer contours of a binary mask as polygons, as the segmentations of COCO.
+
+    The holes of the mask are filled, use `encode_rle` to keep them.
+
+    Args:
+        mask (ndarray): The (height, width) uint8 mask, any non-zero pixel belongs to it.
+        tolerance (float): Maximum distance in pixels between a contour and its simplified polygon, 0 to keep every corner.
+
+    Returns:
+        list[list[int]]: The flat [x1, y1, x2, y2, ...] coordinates of each polygon of at least 3 points.
+    """
+    contours, _ = cv2.findContours(
+        mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    polygons = []
+    for contour in contours:
+        if tolerance > 0:
+            contour = cv2.approxPolyDP(contour, tolerance, True)
+        if len(contour) >= 3:
+            polygons.append(contour.reshape(-1).tolist())
+    return polygons
@@ -0,0 +1,34 @@
+import os
+import sys
+
+from typing import Optional
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Get the resident set size of the current process.
+
+    Returns:
+        int | None: The resident memory in bytes, None if the platform does not expose it.
+    """
+    try:
+        with open("/proc/self/statm", mode="r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        int | None: The peak resident memory in bytes, None if the platform does not expose it.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
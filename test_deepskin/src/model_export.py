@@ -0,0 +1,158 @@
+import os
+import sys
+import argparse
+import cv2
+import numpy as np
+
+from numpy import ndarray
+from typing import Iterator, Optional
+
+from src.inference_backend import ONNX, TFLITE, TENSORFLOW
+from src.model_registry import model_registry
+
+
+def calibration_batches(folder: str, limit: int = 64) -> list[ndarray]:
+    """
+    Preprocess images to calibrate the int8 quantization, as the segmentation sees them.
+
+    Args:
+        folder (str): Folder of representative wound images.
+        limit (int): Maximum number of images.
+
+    Returns:
+        list[ndarray]: A (1, height, width, 3) float32 batch per image.
+
+    Raises:
+        ValueError: If the folder has no image.
+    """
+    # Imported here, the demo package is not needed to run the backends
+    from demo.pipeline import iter_image_paths
+
+    batches = []
+    for image_path in iter_image_paths(folder, recursive=True):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        batches.append(model_registry.preprocess(img)[np.newaxis, ...])
+        if len(batches) >= limit:
+            break
+    if not batches:
+        raise ValueError(f"No calibration image found in {folder}.")
+    return batches
+
+
+def export_onnx(output_path: str, calibration: Optional[list[ndarray]] = None,
+                opset: int = 17) -> None:
+    """
+    Export the segmentation model to ONNX, int8 quantized if calibration batches are given.
+
+    The quantization is static, with per-channel int8 weights and the
+    activation ranges measured on the calibration batches, in the QDQ format
+    run by the CPU kernels of ONNX Runtime. It needs the optional `tf2onnx`
+    and `onnxruntime` packages.
+
+    Args:
+        output_path (str): Path of the ONNX model.
+        calibration (list[ndarray] | None): Preprocessed batches, see `calibration_batches`, float32 model if None.
+        opset (int): ONNX opset of the model.
+
+    Raises:
+        ImportError: If tf2onnx or onnxruntime is not installed.
+    """
+    try:
+        import tensorflow as tf
+        import tf2onnx
+    except ImportError as e:
+        raise ImportError(
+            "ONNX export needs tf2onnx, install it with 'pip install tf2onnx'.") from e
+    model_registry.configure(TENSORFLOW)
+    height, width = model_registry.input_size()
+    float_path = output_path if calibration is None else output_path + ".float32.onnx"
+    tf2onnx.convert.from_keras(
+        model_registry.load().model, opset=opset, output_path=float_path,
+        input_signature=(tf.TensorSpec((None, height, width, 3), tf.float32, name="input"),))
+    if calibration is None:
+        return
+
+    try:
+        from onnxruntime.quantization import (
+            CalibrationDataReader, QuantFormat, QuantType, quantize_static)
+    except ImportError as e:
+        raise ImportError(
+            "ONNX quantization needs onnxruntime, install it with 'pip install onnxruntime'.") from e
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self._batches: Iterator[ndarray] = iter(calibration)
+
+        def get_next(self) -> Optional[dict[str, ndarray]]:
+            batch = next(self._batches, None)
+            return None if batch is None else {"input": batch}
+
+    try:
+        quantize_static(float_path, output_path, Reader(), quant_format=QuantFormat.QDQ,
+                        per_channel=True, weight_type=QuantType.QInt8,
+                        activation_type=QuantType.QUInt8)
+    finally:
+        os.remove(float_path)
+
+
+def export_tflite(output_path: str,
+                  calibration: Optional[list[ndarray]] = None) -> None:
+    """
+    Export the segmentation model to TFLite, int8 quantized if calibration batches are given.
+
+    The quantization is full integer, inputs and outputs included, with the
+    activation ranges measured on the calibration batches, see
+    `TfliteBackend` for the conversion of the inputs and outputs.
+
+    Args:
+        output_path (str): Path of the TFLite model.
+        calibration (list[ndarray] | None): Preprocessed batches, see `calibration_batches`, float32 model if None.
+    """
+    import tensorflow as tf
+    model_registry.configure(TENSORFLOW)
+    converter = tf.lite.TFLiteConverter.from_keras_model(
+        model_registry.load().model)
+    if calibration is not None:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: (
+            [batch] for batch in calibration)
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    with open(output_path, mode="wb") as file:
+        file.write(converter.convert())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Export the segmentation model for the ONNX or TFLite backend, optionally int8 quantized.")
+    parser.add_argument("--format", choices=(ONNX, TFLITE), default=ONNX,
+                        help="format of the exported model (default: onnx)")
+    parser.add_argument("--output", required=True,
+                        help="path of the exported model, e.g. models/deepskin_int8.onnx")
+    parser.add_argument("--int8", action="store_true",
+                        help="quantize the model to int8, calibrated on the --calibration images")
+    parser.add_argument("--calibration", default="input",
+                        help="folder of representative wound images for --int8 (default: input)")
+    parser.add_argument("--calibration-images", type=int, default=64,
+                        help="maximum number of calibration images (default: 64)")
+    args = parser.parse_args()
+
+    calibration = calibration_batches(
+        args.calibration, args.calibration_images) if args.int8 else None
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    if args.format == ONNX:
+        export_onnx(args.output, calibration)
+    else:
+        export_tflite(args.output, calibration)
+    print(
+        f"Exported {args.output} ({os.path.getsize(args.output) / (1024 * 1024):.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import os
+import cv2
+import time
+import importlib.metadata
+import threading
+import numpy as np
+
+from numpy import ndarray
+from typing import Any, Optional
+from deepskin import evaluate_PWAT_score
+
+from src.memory import rss_bytes
+from src.inference_backend import InferenceBackend, TENSORFLOW, create_backend
+
+
+class ModelRegistry:
+    """
+    A process-wide holder of the deepskin models.
+
+    `deepskin.wound_segmentation` builds the segmentation network and loads its
+    weights on every call. The registry loads them once per process, keeps them
+    resident and runs the same pre and post processing around the cached model,
+    so only the first call (or the warm-up) pays the construction cost. The
+    model runs on the inference backend chosen by `configure`, TensorFlow by
+    default.
+
+    Attributes:
+        backend (str): Name of the inference backend, see `BACKENDS`.
+        model_path (str | None): Path of the exported model of the backend, None for TensorFlow.
+        threads (int | None): Number of threads of one forward pass, the runtime default if None.
+        load_time (float | None): Seconds spent building the segmentation model.
+        warm_up_time (float | None): Seconds spent on the first segmentation and PWAT pass.
+        memory (int | None): Resident memory in bytes added by loading the model.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ModelRegistry, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._model = None
+            cls._instance.backend = TENSORFLOW
+            cls._instance.model_path = None
+            cls._instance.threads = None
+            cls._instance.load_time = None
+            cls._instance.warm_up_time = None
+            cls._instance.memory = None
+        return cls._instance
+
+    def configure(self, backend: str = TENSORFLOW, model_path: Optional[str] = None,
+                  threads: Optional[int] = None) -> None:
+        """
+        Choose the inference backend of the segmentation model, the loaded model is dropped if it changes.
+
+        Args:
+            backend (str): Name of the inference backend, see `BACKENDS`.
+            model_path (str | None): Path of the exported model, required by every backend but TensorFlow.
+            threads (int | None): Number of threads of one forward pass, the runtime default if None.
+
+        Raises:
+            ValueError: If the backend is not valid or its model path is missing.
+        """
+        # Validated before anything is dropped
+        create_backend(backend, model_path, threads)
+        with self._lock:
+            if (backend, model_path, threads) == (
+                    self.backend, self.model_path, self.threads):
+                return
+            self.backend = backend
+            self.model_path = model_path
+            self.threads = threads
+            self._model = None
+            self.load_time = None
+            self.warm_up_time = None
+            self.memory = None
+
+    def load(self, verbose: bool = False) -> InferenceBackend:
+        """
+        Load the segmentation model if not already loaded.
+
+        Args:
+            verbose (bool): Whether deepskin prints its loading messages.
+
+        Returns:
+            InferenceBackend: The backend holding the loaded model.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    rss = rss_bytes()
+                    start = time.perf_counter()
+                    model = create_backend(
+                        self.backend, self.model_path, self.threads)
+                    model.load(verbose=verbose)
+                    self.load_time = time.perf_counter() - start
+                    if rss is not None:
+                        self.memory = rss_bytes() - rss
+                    self._model = model
+        return self._model
+
+    def warm_up(self, verbose: bool = False) -> None:
+        """
+        Load the models and run them once on a dummy image.
+
+        The first forward pass traces the graph and allocates the runtime
+        buffers, it is done here so that no request pays for it.
+
+        Args:
+            verbose (bool): Whether deepskin prints its loading messages.
+        """
+        if self.warm_up_time is not None:
+            return
+        self.load(verbose=verbose)
+        height, width = self.input_size()
+        img = np.full((height, width, 3), 127, dtype=np.uint8)
+        # Synthetic wound inside a body so the PWAT features are defined
+        mask = np.zeros((height, width, 3), dtype=np.uint8)
+        mask[..., 2] = 255
+        mask[height // 8:-height // 8, width // 8:-width // 8] = (0, 255, 0)
+        mask[height // 4:-height // 4, width // 4:-width // 4] = (255, 0, 0)
+        start = time.perf_counter()
+        self.segment(img=img, tol=0.5)
+        self.pwat(img=img, mask=mask, ksize=(65, 65))
+        self.warm_up_time = time.perf_counter() - start
+
+    def input_size(self) -> tuple[int, int]:
+        """
+        Get the input size of the segmentation model.
+
+        Returns:
+            tuple[int, int]: The (height, width) expected by the model.
+        """
+        return self.load().input_size()
+
+    def preprocess(self, img: ndarray) -> ndarray:
+        """
+        Resize and normalize an RGB image to the segmentation model input.
+
+        Args:
+            img (ndarray): The RGB image.
+
+        Returns:
+            ndarray: A float32 array of the model input size in [0, 1].
+        """
+        height, width = self.input_size()
+        resized = cv2.resize(img, dsize=(width, height),
+                             interpolation=cv2.INTER_CUBIC)
+        return resized.astype(np.float32) * (1. / 255)
+
+    def predict(self, batch: ndarray) -> ndarray:
+        """
+        Run the segmentation model on a batch of preprocessed images.
+
+        Args:
+            batch (ndarray): A (N, height, width, 3) float32 array.
+
+        Returns:
+            ndarray: The (N, height, width, 3) class probabilities.
+        """
+        return self.load().predict(batch)
+
+    @staticmethod
+    def postprocess(
+            pred: ndarray, shape: tuple[int, ...], tol: float) -> ndarray:
+        """
+        Threshold a model prediction and resize it back to the image shape.
+
+        Args:
+            pred (ndarray): The (height, width, 3) class probabilities of one image.
+            shape (tuple[int, ...]): The shape of the original image.
+            tol (float): The probability threshold of each class.
+
+        Returns:
+            ndarray: The uint8 segmentation mask in {0, 255}.
+        """
+        mask = (pred > tol).astype(np.uint8)
+        mask = cv2.resize(
+            mask,
+            dsize=(
+                shape[1],
+                shape[0]),
+            interpolation=cv2.INTER_NEAREST)
+        return mask * np.uint8(255)
+
+    def segment(self, img: ndarray, tol: float,
+                verbose: bool = False) -> ndarray:
+        """
+        Segment an RGB image in wound, body and background masks.
+
+        Args:
+            img (ndarray): The RGB image.
+            tol (float): The probability threshold of each class.
+            verbose (bool): Whether deepskin prints its loading messages.
+
+        Returns:
+            ndarray: The uint8 segmentation mask with the wound, body and background channels.
+        """
+        self.load(verbose=verbose)
+        pred = self.predict(self.preprocess(img)[np.newaxis, ...])
+        return self.postprocess(pred[0], img.shape, tol)
+
+    def pwat(self, img: ndarray, mask: ndarray,
+             ksize: tuple[int, int], verbose: bool = False) -> float:
+        """
+        Predict the PWAT score of an RGB image from its segmentation.
+
+        Args:
+            img (ndarray): The RGB image.
+            mask (ndarray): The segmentation mask of the image.
+            ksize (tuple[int, int]): Kernel size of the peri-wound area.
+            verbose (bool): Whether deepskin prints its messages.
+
+        Returns:
+            float: The predicted PWAT.
+        """
+        return evaluate_PWAT_score(
+            ksize=ksize, img=img, mask=mask, verbose=verbose)
+
+    def version(self) -> str:
+        """
+        Get the version of the models, to tell apart results of different models.
+
+        Returns:
+            str: The version of the deepskin package providing the models, followed by the backend and exported model if not TensorFlow.
+        """
+        try:
+            version = f"deepskin-{importlib.metadata.version('deepskin')}"
+        except importlib.metadata.PackageNotFoundError:
+            version = "deepskin-unknown"
+        if self.backend != TENSORFLOW:
+            version += f"+{self.backend}-{os.path.splitext(os.path.basename(self.model_path))[0]}"
+        return version
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get the loading statistics of the models.
+
+        Returns:
+            dict[str, Any]: The backend, whether the model is loaded, its load time, warm-up time and memory footprint.
+        """
+        return {
+            "backend": self.backend,
+            "model_path": self.model_path,
+            "loaded": self._model is not None,
+            "load_time": self.load_time,
+            "warm_up_time": self.warm_up_time,
+            "memory": self.memory,
+        }
+
+
+model_registry = ModelRegistry()
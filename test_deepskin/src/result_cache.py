@@ -0,0 +1,274 @@
+import os
+import uuid
+import hashlib
+import threading
+import numpy as np
+
+from numpy import ndarray
+from typing import Any, Optional, Union
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    A content-addressed cache of segmentation masks and PWAT predictions.
+
+    Entries are keyed by a hash of the decoded image and of the parameters
+    that produced them, so the same photo uploaded twice (even under another
+    name) reuses its results. The in-memory tier is a LRU bounded by the total
+    size of its entries. With `disk_dir`, entries are also written as `.npy`
+    files and read back on a memory miss, which shares them between processes
+    and keeps them across restarts. The on-disk tier is a LRU too, bounded by
+    `max_disk_bytes`: reading a file marks it as used, and once the files
+    written exceed the budget the least recently used ones are removed. The
+    processes sharing the directory each sweep it, so the budget can be
+    exceeded by the files the others wrote since their last sweep.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the in-memory entries.
+        disk_dir (str | None): Directory of the on-disk tier, None to disable it.
+        max_disk_bytes (int): Maximum total size of the on-disk entries.
+        hits (int): Number of lookups answered by the cache.
+        misses (int): Number of lookups not answered by the cache.
+    """
+
+    # Fraction of `max_disk_bytes` a sweep frees the on-disk tier down to,
+    # so the next writes do not sweep it again right away
+    DISK_LOW_WATER = 0.9
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None,
+                 max_disk_bytes: Optional[int] = None):
+        """
+        Initialize the ResultCache object, sweeping the on-disk tier if over its budget.
+
+        Args:
+            max_bytes (int): Maximum total size of the in-memory entries.
+            disk_dir (str | None): Directory of the on-disk tier, None to disable it.
+            max_disk_bytes (int | None): Maximum total size of the on-disk entries, `max_bytes` if None.
+
+        Raises:
+            ValueError: If a maximum size is negative.
+        """
+        if max_disk_bytes is None:
+            max_disk_bytes = max_bytes
+        if max_bytes < 0 or max_disk_bytes < 0:
+            raise ValueError("Cache size must not be negative.")
+
+        self.max_bytes: int = max_bytes
+        self.disk_dir: Optional[str] = disk_dir
+        self.max_disk_bytes: int = max_disk_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._entries: OrderedDict[str, Union[ndarray, float]] = OrderedDict()
+        self._bytes: int = 0
+        self._lock = threading.Lock()
+        # Bytes on disk as of the last sweep, plus those written since
+        self._disk_bytes: int = 0
+        self._disk_lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._sweep_disk()
+
+    @staticmethod
+    def digest(img: ndarray) -> str:
+        """
+        Hash the content of a decoded image.
+
+        Args:
+            img (ndarray): The decoded image.
+
+        Returns:
+            str: The hexadecimal digest.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{img.shape}|{img.dtype}".encode())
+        digest.update(np.ascontiguousarray(img))
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(digest: str, stage: str, **params: Any) -> str:
+        """
+        Build the cache key of a result.
+
+        Args:
+            digest (str): The digest of the image the result is computed from.
+            stage (str): Name of the result (e.g., 'segmentation').
+            **params: Parameters the result depends on.
+
+        Returns:
+            str: The hexadecimal key.
+        """
+        key = f"{digest}|{stage}|{sorted(params.items())}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Union[ndarray, float]]:
+        """
+        Get a result from memory, then from disk.
+
+        Args:
+            key (str): The key of the result.
+
+        Returns:
+            ndarray | float | None: The cached result, None on a miss.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._insert(key, value)
+        return value
+
+    def put(self, key: str, value: Union[ndarray, float]) -> None:
+        """
+        Store a result in memory and on disk.
+
+        Args:
+            key (str): The key of the result.
+            value (ndarray | float): The result, arrays must not be modified afterwards.
+        """
+        with self._lock:
+            self._insert(key, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get the usage statistics of the cache.
+
+        Returns:
+            dict[str, Any]: Number of entries, bytes held in memory and on disk, hits, misses and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_bytes": self._disk_bytes if self.disk_dir else None,
+                "max_disk_bytes": self.max_disk_bytes if self.disk_dir else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _insert(self, key: str, value: Union[ndarray, float]) -> None:
+        """
+        Insert an entry in memory and evict the least recently used ones.
+
+        Args:
+            key (str): The key of the result.
+            value (ndarray | float): The result.
+        """
+        size = self._size(value)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._size(previous)
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._size(evicted)
+
+    @staticmethod
+    def _size(value: Union[ndarray, float]) -> int:
+        """
+        Get the size accounted for an entry.
+
+        Args:
+            value (ndarray | float): The result.
+
+        Returns:
+            int: The size in bytes.
+        """
+        return value.nbytes if isinstance(value, ndarray) else 8
+
+    def _disk_path(self, key: str) -> str:
+        """
+        Get the on-disk path of an entry.
+
+        Args:
+            key (str): The key of the result.
+
+        Returns:
+            str: The path of the `.npy` file.
+        """
+        return os.path.join(self.disk_dir, key + ".npy")
+
+    def _read_disk(self, key: str) -> Optional[Union[ndarray, float]]:
+        """
+        Read an entry from the on-disk tier.
+
+        Args:
+            key (str): The key of the result.
+
+        Returns:
+            ndarray | float | None: The result, None if not on disk.
+        """
+        if not self.disk_dir:
+            return None
+        disk_path = self._disk_path(key)
+        try:
+            value = np.load(disk_path, allow_pickle=False)
+            # The modification time orders the sweeps, the access time is often
+            # not updated
+            os.utime(disk_path)
+        except (OSError, ValueError):
+            return None
+        return float(value) if value.ndim == 0 else value
+
+    def _write_disk(self, key: str, value: Union[ndarray, float]) -> None:
+        """
+        Write an entry to the on-disk tier, atomically, then sweep it if over its budget.
+
+        Args:
+            key (str): The key of the result.
+            value (ndarray | float): The result.
+        """
+        if not self.disk_dir or self._size(value) > self.max_disk_bytes:
+            return
+        temp_path = os.path.join(self.disk_dir, f".{uuid.uuid4()}.npy")
+        np.save(temp_path, np.asarray(value), allow_pickle=False)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, self._disk_path(key))
+        with self._disk_lock:
+            self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._sweep_disk()
+
+    def _sweep_disk(self) -> None:
+        """
+        Measure the on-disk tier and remove its least recently used files while over its budget.
+        """
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith(".npy") or entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Removed by another process meanwhile
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        if total > self.max_disk_bytes:
+            target = int(self.max_disk_bytes * self.DISK_LOW_WATER)
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        self._disk_bytes = total
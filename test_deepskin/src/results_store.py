@@ -0,0 +1,227 @@
+import os
+import hashlib
+import sqlite3
+import datetime
+import threading
+
+from typing import Any, Optional
+
+# Columns of a stored result, in insertion order
+RESULT_COLUMNS = (
+    "image_hash",
+    "image",
+    "patient_id",
+    "wound_id",
+    "clinical_pwat",
+    "predicted_pwat",
+    "working_scale",
+    "model_version",
+    "source",
+    "timestamp",
+)
+
+
+class ResultsStore:
+    """
+    A SQLite store of the PWAT results, to trend them per patient and wound.
+
+    Every processed image adds a result with the hash of its content, its
+    patient and wound identifiers when known, its clinical and predicted
+    PWAT, the processing parameters and a UTC timestamp. The results are
+    indexed by image hash, by patient, wound and timestamp, and by
+    timestamp, so a time series is read without scanning the whole store.
+    The database is in WAL mode: readers do not wait for the writers, and
+    several processes can add results to the same store.
+
+    Attributes:
+        db_path (str): Path of the SQLite database.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the ResultsStore object, creating the database and its indexes if needed.
+
+        Args:
+            db_path (str): Path of the SQLite database.
+        """
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        self.db_path: str = db_path
+        # Shared by the threads of the API, one statement at a time
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            db_path, timeout=30, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS pwat_results (
+                id INTEGER PRIMARY KEY,
+                image_hash TEXT NOT NULL,
+                image TEXT NOT NULL,
+                patient_id TEXT,
+                wound_id TEXT,
+                clinical_pwat REAL,
+                predicted_pwat REAL NOT NULL,
+                working_scale REAL NOT NULL,
+                model_version TEXT NOT NULL,
+                source TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pwat_results_image_hash
+                ON pwat_results (image_hash);
+            CREATE INDEX IF NOT EXISTS pwat_results_patient_wound_timestamp
+                ON pwat_results (patient_id, wound_id, timestamp);
+            CREATE INDEX IF NOT EXISTS pwat_results_timestamp
+                ON pwat_results (timestamp);
+        """)
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        self._connection.close()
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """
+        Hash the content of an image, as `Manifest.hash_file` does for a file.
+
+        Args:
+            data (bytes): The encoded image.
+
+        Returns:
+            str: The hexadecimal digest.
+        """
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    @staticmethod
+    def now() -> str:
+        """
+        Get the current time as stored, ordered as text.
+
+        Returns:
+            str: The UTC time in ISO 8601 format, to the second.
+        """
+        return datetime.datetime.now(
+            datetime.timezone.utc).isoformat(timespec="seconds")
+
+    @staticmethod
+    def parse_timestamp(value: str, end_of_day: bool = False) -> str:
+        """
+        Convert a timestamp or a date to the stored format, to compare it with the stored timestamps.
+
+        Args:
+            value (str): An ISO 8601 timestamp, UTC if it has no offset, or date (e.g. 2026-01-31).
+            end_of_day (bool): Whether a date stands for its last second instead of its first one.
+
+        Returns:
+            str: The UTC time in ISO 8601 format, to the second, see `now`.
+
+        Raises:
+            ValueError: If the value is not an ISO 8601 timestamp or date.
+        """
+        try:
+            date = datetime.date.fromisoformat(value)
+        except ValueError:
+            timestamp = datetime.datetime.fromisoformat(value)
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+            timestamp = timestamp.astimezone(datetime.timezone.utc)
+            # Stored to the second, a later fraction only starts from the next
+            # one
+            if timestamp.microsecond and not end_of_day:
+                timestamp += datetime.timedelta(seconds=1)
+            return timestamp.replace(
+                microsecond=0).isoformat(timespec="seconds")
+        time = datetime.time.max if end_of_day else datetime.time.min
+        return datetime.datetime.combine(
+            date, time, datetime.timezone.utc).isoformat(timespec="seconds")
+
+    def add(self, results: list[dict[str, Any]]) -> None:
+        """
+        Add results in a single commit.
+
+        Args:
+            results (list[dict[str, Any]]): The results, with a value for each of `RESULT_COLUMNS`, the timestamp defaulting to now.
+        """
+        now = self.now()
+        rows = []
+        for result in results:
+            result = {**result, "timestamp": result.get("timestamp") or now}
+            rows.append(tuple(result.get(column) for column in RESULT_COLUMNS))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT INTO pwat_results ({', '.join(RESULT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})", rows)
+
+    def series(self, patient_id: str, wound_id: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 1000) -> list[dict[str, Any]]:
+        """
+        Get the results of a patient, or of one of their wounds, in time order.
+
+        Args:
+            patient_id (str): Identifier of the patient.
+            wound_id (str | None): Identifier of the wound, all the wounds of the patient if None.
+            since (str | None): Earliest timestamp or date, in ISO 8601 format, included, see `parse_timestamp`.
+            until (str | None): Latest timestamp or date, in ISO 8601 format, included, a date includes the whole day.
+            limit (int): Maximum number of results, the earliest first.
+
+        Returns:
+            list[dict[str, Any]]: The results, with their `RESULT_COLUMNS`.
+
+        Raises:
+            ValueError: If since or until is not an ISO 8601 timestamp or date.
+        """
+        conditions = ["patient_id = ?"]
+        params: list[Any] = [patient_id]
+        if wound_id is not None:
+            conditions.append("wound_id = ?")
+            params.append(wound_id)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(self.parse_timestamp(since))
+        if until is not None:
+            conditions.append("timestamp <= ?")
+            params.append(self.parse_timestamp(until, end_of_day=True))
+        return self._select(
+            f"WHERE {' AND '.join(conditions)} ORDER BY timestamp, id LIMIT ?",
+            params + [limit])
+
+    def by_hash(self, image_hash: str) -> list[dict[str, Any]]:
+        """
+        Get the results of an image content, from every run that processed it.
+
+        Args:
+            image_hash (str): The content hash of the image.
+
+        Returns:
+            list[dict[str, Any]]: The results, with their `RESULT_COLUMNS`, in time order.
+        """
+        return self._select(
+            "WHERE image_hash = ? ORDER BY timestamp, id", [image_hash])
+
+    def _select(self, clause: str, params: list[Any]) -> list[dict[str, Any]]:
+        """
+        Read results.
+
+        Args:
+            clause (str): The WHERE, ORDER BY and LIMIT clauses of the query.
+            params (list[Any]): The parameters of the clauses.
+
+        Returns:
+            list[dict[str, Any]]: The results, with their `RESULT_COLUMNS`.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {', '.join(RESULT_COLUMNS)} FROM pwat_results {clause}", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,349 @@
+import os
+import csv
+import uuid
+import sqlite3
+
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ResultsWriter(ABC):
+    """
+    A buffered, append-only sink of result rows.
+
+    The destination is created or its header validated once, when the
+    writer is opened. Rows are then buffered and written in batches of
+    `flush_every`, and on `flush` or `close`. Subclasses implement the
+    storage, see `open_results_writer` to pick one from the file extension.
+
+    Attributes:
+        file_path (str): Path of the results.
+        header (list[str]): Names of the columns of every row.
+        flush_every (int): Number of buffered rows written at once.
+        logging (bool): Whether to enable logging for debugging purposes.
+    """
+
+    def __init__(self, file_path: str, header: list[str],
+                 flush_every: int = 64, logging: bool = False):
+        """
+        Initialize the ResultsWriter object and open its destination.
+
+        Args:
+            file_path (str): Path of the results.
+            header (list[str]): Names of the columns of every row.
+            flush_every (int): Number of buffered rows written at once.
+            logging (bool): Whether to enable logging for debugging purposes.
+
+        Raises:
+            ValueError: If `flush_every` is not positive or the header of existing results does not match.
+        """
+        if flush_every < 1:
+            raise ValueError("Rows must be flushed every 1 or more rows.")
+
+        self.file_path: str = file_path
+        self.header: list[str] = list(header)
+        self.flush_every: int = flush_every
+        self.logging: bool = logging
+
+        self._rows: list[list[Any]] = []
+
+        dir_path = os.path.dirname(file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+            self.log(f"Created {dir_path}")
+        self._open()
+
+    def log(self, msg: str):
+        """
+        Log a message if logging is enabled.
+
+        Args:
+            msg (str): The message to log.
+        """
+        if self.logging is True:
+            print(msg)
+
+    @property
+    def buffered(self) -> int:
+        """Number of rows written on the next flush."""
+        return len(self._rows)
+
+    def write(self, row: list[Any]) -> None:
+        """
+        Buffer a row, writing the buffer once it holds `flush_every` rows.
+
+        Args:
+            row (list[Any]): The values of the row, in `header` order.
+
+        Raises:
+            ValueError: If the row does not have one value per column.
+        """
+        if len(row) != len(self.header):
+            raise ValueError(
+                f"Row has {len(row)} values for {len(self.header)} columns.")
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_every:
+            self.flush()
+
+    def write_rows(self, rows: list[list[Any]]) -> None:
+        """
+        Buffer several rows.
+
+        Args:
+            rows (list[list[Any]]): The rows, in `header` order.
+        """
+        for row in rows:
+            self.write(row)
+
+    def flush(self) -> None:
+        """
+        Write the buffered rows.
+        """
+        if self._rows:
+            self._write_batch(self._rows)
+            self.log(f"Edited {self.file_path} with {len(self._rows)} rows")
+            self._rows = []
+
+    def close(self) -> None:
+        """
+        Write the buffered rows and close the destination.
+        """
+        try:
+            self.flush()
+        finally:
+            self._close()
+
+    @abstractmethod
+    def _open(self) -> None:
+        """
+        Create the destination or validate its header.
+        """
+
+    @abstractmethod
+    def _write_batch(self, rows: list[list[Any]]) -> None:
+        """
+        Write rows to the destination.
+
+        Args:
+            rows (list[list[Any]]): The rows, in `header` order.
+        """
+
+    @abstractmethod
+    def _close(self) -> None:
+        """
+        Close the destination.
+        """
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class CsvResultsWriter(ResultsWriter):
+    """
+    A CSV sink, shared safely by several processes.
+
+    The file is kept open in append mode and every batch is written under an
+    exclusive lock of the file, so the rows of concurrent writers never
+    interleave.
+    """
+
+    def _open(self) -> None:
+        """
+        Open the CSV file, writing its header if empty or validating it otherwise.
+
+        Raises:
+            ValueError: If the CSV header of an existing CSV not match the expected format.
+        """
+        self._file = open(self.file_path, mode="a+", newline="")
+        try:
+            with self._locked():
+                self._file.seek(0)
+                existing_header = next(csv.reader(self._file), None)
+                if existing_header is None:
+                    csv.writer(self._file).writerow(self.header)
+                    self._file.flush()
+                    self.log(f"Created {self.file_path}")
+                elif existing_header != self.header:
+                    raise ValueError(
+                        "CSV header does not match expected format!")
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _write_batch(self, rows: list[list[Any]]) -> None:
+        with self._locked():
+            csv.writer(self._file).writerows(rows)
+            self._file.flush()
+
+    def _close(self) -> None:
+        self._file.close()
+
+    def _locked(self) -> "_FileLock":
+        """
+        Lock the CSV file for the other processes.
+
+        Returns:
+            _FileLock: The context holding the lock.
+        """
+        return _FileLock(self._file)
+
+
+class SqliteResultsWriter(ResultsWriter):
+    """
+    A SQLite sink, with one `results` table and one transaction per batch.
+
+    SQLite locks the database itself, so several processes can share it.
+    """
+
+    def _open(self) -> None:
+        """
+        Create the `results` table or validate its columns.
+
+        Raises:
+            ValueError: If the columns of an existing table do not match the header.
+        """
+        self._connection = sqlite3.connect(self.file_path, timeout=30)
+        columns = ", ".join(f'"{name}"' for name in self.header)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS results ({columns})")
+        self._connection.commit()
+        existing_header = [column[1] for column in
+                           self._connection.execute("PRAGMA table_info(results)")]
+        if existing_header != self.header:
+            self._connection.close()
+            raise ValueError(
+                "SQLite results columns do not match expected format!")
+        self._insert = (f"INSERT INTO results ({columns}) "
+                        f"VALUES ({', '.join('?' * len(self.header))})")
+
+    def _write_batch(self, rows: list[list[Any]]) -> None:
+        with self._connection:
+            self._connection.executemany(self._insert, rows)
+
+    def _close(self) -> None:
+        self._connection.close()
+
+
+class ParquetResultsWriter(ResultsWriter):
+    """
+    A Parquet sink, writing a dataset directory with one part file per writer.
+
+    Each batch is a row group of the part file of this writer, so several
+    processes write to the same dataset without sharing a file. It needs the
+    optional `pyarrow` package.
+    """
+
+    def _open(self) -> None:
+        """
+        Create the dataset directory or validate the columns of its part files.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+            ValueError: If the columns of an existing part file do not match the header.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "Parquet results need pyarrow, install it with 'pip install pyarrow'.") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._writer = None
+
+        os.makedirs(self.file_path, exist_ok=True)
+        for entry in os.scandir(self.file_path):
+            if entry.name.endswith(".parquet"):
+                if self._pq.read_schema(entry.path).names != self.header:
+                    raise ValueError(
+                        "Parquet results columns do not match expected format!")
+                break
+        self._part_path: str = os.path.join(
+            self.file_path, f"part-{os.getpid()}-{uuid.uuid4().hex}.parquet")
+
+    def _write_batch(self, rows: list[list[Any]]) -> None:
+        table = self._pa.table({name: [row[index] for row in rows]
+                                for index, name in enumerate(self.header)})
+        if self._writer is None:
+            # Columns without any value yet, e.g. unlabelled scores, are
+            # numbers
+            schema = self._pa.schema([
+                field.with_type(
+                    self._pa.float64()) if field.type == self._pa.null() else field
+                for field in table.schema])
+            self._writer = self._pq.ParquetWriter(self._part_path, schema)
+            self.log(f"Created {self._part_path}")
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _FileLock:
+    """
+    An exclusive lock of an open file between processes, with fcntl or msvcrt on Windows.
+    """
+
+    def __init__(self, file: Any):
+        self._file = file
+
+    def __enter__(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            # msvcrt locks a byte range, the first byte stands for the file
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        # Another process may have appended meanwhile
+        self._file.seek(0, os.SEEK_END)
+
+    def __exit__(self, *args) -> None:
+        self._file.flush()
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+WRITERS = {
+    ".csv": CsvResultsWriter,
+    ".sqlite": SqliteResultsWriter,
+    ".db": SqliteResultsWriter,
+    ".parquet": ParquetResultsWriter,
+}
+
+
+def open_results_writer(file_path: str, header: list[str], flush_every: int = 64,
+                        logging: bool = False) -> ResultsWriter:
+    """
+    Open the results writer matching the extension of a path.
+
+    Args:
+        file_path (str): Path of the results, ending with .csv, .sqlite, .db or .parquet.
+        header (list[str]): Names of the columns of every row.
+        flush_every (int): Number of buffered rows written at once.
+        logging (bool): Whether to enable logging for debugging purposes.
+
+    Returns:
+        ResultsWriter: The opened writer.
+
+    Raises:
+        ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    writer: Optional[type] = WRITERS.get(extension)
+    if writer is None:
+        raise ValueError(
+            f"{extension} is not a valid results extension, try {'/'.join(WRITERS)} instead.")
+    return writer(file_path, header, flush_every=flush_every, logging=logging)
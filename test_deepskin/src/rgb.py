@@ -1,9 +1,14 @@
+import numpy as np
+
+from numpy import ndarray
+
+
 class RGB:
     """
     A class representing RGB color values.
 
-    This class provides predefined RGB color constants and a static method
-    to create custom RGB color tuples.
+    This class provides predefined RGB color constants and static methods
+    to create custom RGB color tuples and convert them to BGR.
 
     Attributes:
         RED (tuple): RGB value for the color red (255, 0, 0).
@@ -20,6 +25,36 @@ class RGB:
     BLACK = (0, 0, 0)
     WHITE = (255, 255, 255)
 
+    @staticmethod
+    def to_bgr(color: tuple[int, int, int]) -> tuple[int, int, int]:
+        """
+        Converts an RGB color tuple to the BGR order used by OpenCV images.
+
+        Args:
+            color (tuple[int, int, int]): The RGB color.
+
+        Returns:
+            tuple[int, int, int]: The same color in BGR order.
+        """
+        return color[::-1]
+
+    @staticmethod
+    def bit_palette(colors: tuple[tuple[int, int, int], ...]) -> ndarray:
+        """
+        Creates a lookup table coloring the label values whose bits stand for classes.
+
+        Args:
+            colors (tuple[tuple[int, int, int], ...]): The RGB color of each bit, from the lowest.
+
+        Returns:
+            ndarray: The (256, 3) uint8 BGR color of each label value, the colors of its bits added up to 255.
+        """
+        palette = np.zeros((256, 3), dtype=np.int32)
+        labels = np.arange(256)
+        for bit, color in enumerate(colors):
+            palette[(labels >> bit) & 1 == 1] += RGB.to_bgr(color)
+        return np.minimum(palette, 255).astype(np.uint8)
+
     @staticmethod
     def CUSTOM(r: int, g: int, b: int) -> tuple[int, int, int]:
         """
@@ -1,27 +1,37 @@
 import re
 import os
-import csv
 import cv2
+import time
 import uuid
-import shutil
+import threading
 import logging
 import datetime
 import pylab as plt
+import numpy as np
 import tensorflow as tf
 
 from numpy import ndarray
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from deepskin.imgproc import imfill, get_perilesion_mask
-from deepskin import wound_segmentation, evaluate_PWAT_score
 
 
 from src.rgb import RGB
+from src.result_cache import ResultCache
+from src.results_writer import CsvResultsWriter
+from src.batch_segmenter import BatchSegmenter
+from src.model_registry import ModelRegistry, model_registry
 
 
 # Suppress TensorFlow logging messages
 tf.get_logger().setLevel(logging.ERROR)
 
 
+class ImageDecodeError(ValueError):
+    """Raised when a wound image file or its data cannot be decoded."""
+
+
 class WoundImage:
     """
     A class to process and analyze wound images.
@@ -32,52 +42,365 @@ class WoundImage:
     Attributes:
         image_path (str): Path to the wound image file.
         logging (bool): Whether to enable logging for debugging purposes.
-        _image (ndarray): The loaded image as a NumPy array.
-        _segmentation (ndarray): The segmentation mask of the image.
-        _wound_mask (ndarray): Mask for the wound area.
-        _body_mask (ndarray): Mask for the body area.
-        _bg_mask (ndarray): Mask for the background area.
+        _image (ndarray): The loaded image as a NumPy array, in BGR order.
+        _image_rgb (ndarray): RGB copy of the image given to the models.
+        _scratch (ndarray): Buffer the overlays are drawn into.
+        working_scale (float): Fraction of the image resolution the segmentation and morphology run at.
+        _working_image_rgb (ndarray): RGB copy of the image at the working resolution.
+        _working_labels (ndarray): The label map of the segmentation at the working resolution.
+        _labels (ndarray): The label map of the segmentation of the image, see `LABEL_BITS`.
         _wound_masked (ndarray): Image with only the wound area visible.
         _peri_wound_mask (ndarray): Mask for the peri-wound area.
         _peri_wound_masked (ndarray): Image with only the peri-wound area visible.
+        _wound_contours (tuple): Contours of the wound mask.
+        _body_contours (tuple): Contours of the body mask.
+        _peri_wound_contours (tuple): Contours of the peri-wound mask.
+        contour_approx (int): OpenCV contour approximation method of the contours.
         _predicted_pwat (float): Predicted PWAT score.
-        _clinical_pwat (float): Clinical PWAT score.
-        _temp_dir (str): Directory for temporary files.
+        _morphometrics (dict): Size, shape and color of the wound and peri-wound areas, in pixels.
+        _clinical_pwat (float | None): Clinical PWAT score, None if not labelled.
+        _models (ModelRegistry | BatchSegmenter): Holder of the segmentation and PWAT models.
+        _image_data (bytes | ndarray | None): In-memory encoded or BGR image used instead of the file.
+        _cache (ResultCache | None): Cache of the segmentation and predicted PWAT.
+        _image_digest (str | None): Content hash of the decoded image, used in cache keys.
+        tracer (Callable[[str, float], None] | None): Called with the name and the duration of each processing stage.
+        _stage_children (threading.local): Time spent in the nested stages of each running stage, per thread.
+        _tracer_lock (threading.Lock): Serializes the tracer calls of the threads of `compute`.
     """
 
-    def __init__(self, image_path: str, logging: bool):
+    # Columns of the PWAT CSV files
+    CSV_HEADER = ["image", "clinical_score", "predictional_score", "timestamp"]
+    # Columns of the morphometrics rows, see `get_morphometrics_row`
+    MORPHOMETRICS_HEADER = [
+        "image", "pixel_size_mm",
+        "wound_area_px", "wound_area_mm2", "wound_perimeter_px", "wound_perimeter_mm",
+        "wound_bbox_x", "wound_bbox_y", "wound_bbox_width", "wound_bbox_height",
+        "wound_mean_red", "wound_mean_green", "wound_mean_blue",
+        "wound_std_red", "wound_std_green", "wound_std_blue",
+        "peri_wound_area_px", "peri_wound_area_mm2", "peri_wound_perimeter_px", "peri_wound_perimeter_mm",
+        "peri_wound_bbox_x", "peri_wound_bbox_y", "peri_wound_bbox_width", "peri_wound_bbox_height",
+        "peri_wound_mean_red", "peri_wound_mean_green", "peri_wound_mean_blue",
+        "peri_wound_std_red", "peri_wound_std_green", "peri_wound_std_blue",
+    ]
+    # Number of bins of the color histograms of the morphometrics, per channel
+    HISTOGRAM_BINS = 16
+
+    # Probability threshold of the segmentation classes
+    SEGMENTATION_TOL = 0.95
+    # NOTE: You can play with ksize parameters (tuple[int, int]) but can
+    # give wrong predicion and it could probably depend of the file
+    # dimension (dynamic ksize)
+    PERI_WOUND_KSIZE = (20, 20)
+    PWAT_KSIZE = (65, 65)
+    # Both kernel sizes are given at full resolution and scaled with
+    # `working_scale`
+
+    # Names of the processed images, each rendered by its 'render_<name>'
+    # method
+    ARTIFACTS = (
+        "original",
+        "segmentation_mask",
+        "segmentation_semantic",
+        "mask_wound",
+        "mask_peri_wound",
+        "masked_wound",
+        "masked_peri_wound",
+        "pwat_estimation"
+    )
+
+    # Name of the mosaic of every processed image, rendered like an artifact
+    CONTACT_SHEET = "contact_sheet"
+    # Width of each image in the contact sheets of `render`
+    CONTACT_SHEET_THUMBNAIL_WIDTH = 480
+
+    # Encoder setting of each file extension: OpenCV flag, minimum and maximum
+    ENCODER_SETTINGS = {
+        ".png": (cv2.IMWRITE_PNG_COMPRESSION, 0, 9),
+        ".jpg": (cv2.IMWRITE_JPEG_QUALITY, 0, 100),
+        ".jpeg": (cv2.IMWRITE_JPEG_QUALITY, 0, 100),
+        ".webp": (cv2.IMWRITE_WEBP_QUALITY, 1, 100),
+    }
+    # Threads encoding and writing the images of `save_images`, shared by all
+    # images
+    ENCODER_WORKERS = min(8, os.cpu_count() or 1)
+    _encoder_pool: Optional[ThreadPoolExecutor] = None
+    _encoder_pool_lock = threading.Lock()
+
+    # Bit of each class in the label maps of the segmentation, in the order of
+    # the channels of the model mask, as the classes may overlap
+    LABEL_BITS = {
+        "wound": 1,
+        "body": 2,
+        "background": 4,
+    }
+    # BGR color of each label value, the wound in red, the body in green and
+    # the background in blue
+    LABEL_PALETTE = RGB.bit_palette((RGB.RED, RGB.GREEN, RGB.BLUE))
+
+    # Processing graph: for each node, the attributes its '_update_<node>'
+    # method fills, the nodes it reads and the stage it is traced as
+    NODES = {
+        "image": (("_image",), (), "decode"),
+        "image_rgb": (("_image_rgb",), ("image",), "preprocess"),
+        "working_image_rgb": (("_working_image_rgb",), ("image_rgb",), "preprocess"),
+        # The image is read by the cache keys and the upsampling
+        "working_segmentation": (("_working_labels",), ("image", "working_image_rgb"), "segmentation"),
+        "segmentation": (("_labels",), ("image", "working_segmentation"), "masks"),
+        "wound_masked": (("_wound_masked",), ("image", "segmentation"), "masked"),
+        "peri_wound_mask": (("_peri_wound_mask",), ("image", "working_segmentation"), "peri_wound_mask"),
+        "peri_wound_masked": (("_peri_wound_masked",), ("image", "peri_wound_mask"), "masked"),
+        "wound_contours": (("_wound_contours",), ("segmentation",), "contours"),
+        "body_contours": (("_body_contours",), ("segmentation",), "contours"),
+        "peri_wound_contours": (("_peri_wound_contours",), ("peri_wound_mask",), "contours"),
+        "predicted_pwat": (("_predicted_pwat",), ("image", "working_image_rgb", "working_segmentation"), "predicted_pwat"),
+        "morphometrics": (("_morphometrics",), ("image", "segmentation", "peri_wound_mask", "wound_contours", "peri_wound_contours"), "morphometrics"),
+    }
+
+    # Nodes each artifact is rendered from
+    ARTIFACT_NODES = {
+        "original": ("image",),
+        "segmentation_mask": ("segmentation",),
+        "segmentation_semantic": ("body_contours", "wound_contours"),
+        "mask_wound": ("wound_contours",),
+        "mask_peri_wound": ("peri_wound_contours",),
+        "masked_wound": ("wound_masked",),
+        "masked_peri_wound": ("peri_wound_masked",),
+        "pwat_estimation": ("wound_contours", "predicted_pwat"),
+    }
+    ARTIFACT_NODES["contact_sheet"] = tuple(dict.fromkeys(
+        node for nodes in ARTIFACT_NODES.values() for node in nodes))
+
+    def __init__(self, image_path: str, logging: bool,
+                 models: Optional[Union[ModelRegistry, BatchSegmenter]] = None,
+                 image_data: Optional[Union[bytes, ndarray]] = None,
+                 cache: Optional[ResultCache] = None,
+                 contour_approx: int = cv2.CHAIN_APPROX_NONE,
+                 working_scale: float = 1.0,
+                 tracer: Optional[Callable[[str, float], None]] = None,
+                 clinical_pwat: Optional[float] = None):
         """
         Initialize the WoundImage object.
 
         Args:
-            image_path (str): Path to the wound image file.
+            image_path (str): Path to the wound image file, only used as a name when `image_data` is given.
             logging (bool): Whether to enable logging for debugging purposes.
+            models (ModelRegistry | BatchSegmenter | None): Holder of the models, the process-wide registry by default.
+            image_data (bytes | ndarray | None): Encoded image bytes or a decoded BGR image to use instead of reading the file.
+            cache (ResultCache | None): Cache of the segmentation and predicted PWAT, shared between images.
+            contour_approx (int): OpenCV contour approximation method, cv2.CHAIN_APPROX_SIMPLE keeps fewer points for the same drawing.
+            working_scale (float): Fraction of the image resolution the segmentation, the peri-wound area and the PWAT are computed at, in (0, 1]. The masks are upsampled to the full resolution for the overlays only.
+            tracer (Callable[[str, float], None] | None): Called with the name and the seconds of each processing stage, excluding the stages it triggers (e.g., 'decode', 'segmentation', 'render', 'encode').
+            clinical_pwat (float | None): PWAT scored by a clinician, e.g. from a labels CSV, None if not labelled.
 
         Raises:
-            ValueError: If the image path is not a valid folder architecure or file format.
-            FileNotFoundError: If any of the RGB values are outside the range 0-255.
+            ValueError: If the image path is not a valid folder architecure or file format, or the working scale is not in (0, 1].
+            FileNotFoundError: If no image data is given and the image file does not exist.
         """
         self._valid_image_path(image_path)
-        if not os.path.exists(image_path):
+        if not 0 < working_scale <= 1:
+            raise ValueError(
+                f"Working scale {working_scale} must be in (0, 1].")
+        if image_data is None and not os.path.exists(image_path):
             raise FileNotFoundError(f"File {image_path} not found.")
 
         self.image_path: str = image_path
         self.logging: bool = logging
+        self.contour_approx: int = contour_approx
+        self.working_scale: float = working_scale
+        self._image_data: Optional[Union[bytes, ndarray]] = image_data
+        self._cache: Optional[ResultCache] = cache
+        self._image_digest: Optional[str] = None
+        self.tracer: Optional[Callable[[str, float], None]] = tracer
+        # Each thread of `compute` nests its own stages
+        self._stage_children: threading.local = threading.local()
+        self._tracer_lock: threading.Lock = threading.Lock()
 
         # Initialize attributes to None
         self._image: Optional[ndarray] = None
-        self._segmentation: Optional[ndarray] = None
-        self._wound_mask: Optional[ndarray] = None
-        self._body_mask: Optional[ndarray] = None
-        self._bg_mask: Optional[ndarray] = None
+        self._image_rgb: Optional[ndarray] = None
+        self._scratch: Optional[ndarray] = None
+        self._working_image_rgb: Optional[ndarray] = None
+        self._working_labels: Optional[ndarray] = None
+        self._labels: Optional[ndarray] = None
         self._wound_masked: Optional[ndarray] = None
         self._peri_wound_mask: Optional[ndarray] = None
         self._peri_wound_masked: Optional[ndarray] = None
+        self._wound_contours: Optional[tuple] = None
+        self._body_contours: Optional[tuple] = None
+        self._peri_wound_contours: Optional[tuple] = None
         self._predicted_pwat: Optional[float] = None
-        self._clinical_pwat: Optional[float] = None
+        self._morphometrics: Optional[dict] = None
+        self._clinical_pwat: Optional[float] = clinical_pwat
+
+        # Models are loaded once per process and shared by every image
+        self._models: Union[ModelRegistry,
+                            BatchSegmenter] = models if models is not None else model_registry
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """
+        Time a processing stage and report it to the tracer, if any.
+
+        The time of the stages run inside it (e.g., the segmentation needed by
+        a render) is only reported for them, so the durations add up.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        if self.tracer is None:
+            yield
+            return
+        stack = getattr(self._stage_children, "stack", None)
+        if stack is None:
+            stack = self._stage_children.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += seconds
+            with self._tracer_lock:
+                self.tracer(name, seconds - children)
+
+    def _ensure(self, node: str) -> None:
+        """
+        Compute a node of the processing graph if it is not already, see `NODES`.
+
+        Args:
+            node (str): Name of the node.
+        """
+        attributes, _, stage = self.NODES[node]
+        if any(getattr(self, attribute) is None for attribute in attributes):
+            with self._stage(stage):
+                getattr(self, "_update_" + node)()
+
+    def compute(self, outputs: Iterable[str], workers: int = 1) -> None:
+        """
+        Compute nodes of the processing graph, or the nodes of artifacts, and only what they depend on.
+
+        The nodes already computed and their dependencies are skipped. With
+        several workers, the nodes whose dependencies are computed run at the
+        same time on threads (e.g., the PWAT prediction with the masks and
+        contours), OpenCV and the models releasing the GIL.
+
+        Args:
+            outputs (Iterable[str]): Names of nodes of `NODES` or of artifacts of `ARTIFACTS`.
+            workers (int): Number of threads, 1 to compute in the calling thread.
+
+        Raises:
+            ValueError: If an output is neither a node nor an artifact.
+        """
+        nodes = []
+        for output in outputs:
+            if output in self.ARTIFACT_NODES:
+                nodes.extend(self.ARTIFACT_NODES[output])
+            elif output in self.NODES:
+                nodes.append(output)
+            else:
+                raise ValueError(
+                    f"{output} is not a valid node or artifact, try one of {', '.join(self.NODES)} or {', '.join(self.ARTIFACTS)} instead.")
+        plan = self._plan(nodes)
+        if workers <= 1 or len(plan) <= 1:
+            for node in plan:
+                self._ensure(node)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wound-image") as executor:
+            waiting = list(plan)
+            running: dict[Future, str] = {}
+            while waiting or running:
+                for node in [node for node in waiting
+                             if not set(self.NODES[node][1]) & (set(waiting) | set(running.values()))]:
+                    waiting.remove(node)
+                    running[executor.submit(self._ensure, node)] = node
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    future.result()
+
+    def _plan(self, nodes: Iterable[str]) -> list[str]:
+        """
+        List the nodes to compute for some nodes, each after its dependencies.
+
+        Args:
+            nodes (Iterable[str]): Names of the nodes asked for.
 
-        # Temporary directory for storing intermediate files
-        self._temp_dir: str = os.path.join("output", "src")
+        Returns:
+            list[str]: The nodes not computed yet, along with the dependencies they need, in dependency order.
+        """
+        plan: list[str] = []
+        seen: set[str] = set()
+
+        def visit(node: str) -> None:
+            if node in seen:
+                return
+            seen.add(node)
+            attributes, dependencies, _ = self.NODES[node]
+            if all(getattr(self, attribute)
+                   is not None for attribute in attributes):
+                return
+            for dependency in dependencies:
+                visit(dependency)
+            plan.append(node)
+
+        for node in nodes:
+            visit(node)
+        return plan
+
+    def invalidate(self, *nodes: str) -> None:
+        """
+        Drop nodes of the processing graph and every node depending on them, to compute them again.
+
+        Args:
+            *nodes (str): Names of the nodes of `NODES`, e.g. 'wound_contours' after changing `contour_approx`.
+
+        Raises:
+            ValueError: If a node is not valid.
+        """
+        for node in nodes:
+            if node not in self.NODES:
+                raise ValueError(
+                    f"{node} is not a valid node, try one of {', '.join(self.NODES)} instead.")
+        dropped = set(nodes)
+        # NODES lists every node after its dependencies
+        for node, (_, dependencies, _) in self.NODES.items():
+            if dropped & set(dependencies):
+                dropped.add(node)
+        for node in dropped:
+            for attribute in self.NODES[node][0]:
+                setattr(self, attribute, None)
+        if "image" in dropped:
+            self._image_digest = None
+            self._scratch = None
+
+    def set_image_data(self, image_data: Union[bytes, ndarray]) -> None:
+        """
+        Replace the image, every result is computed again from it.
+
+        Args:
+            image_data (bytes | ndarray): Encoded image bytes or a decoded BGR image.
+        """
+        self._image_data = image_data
+        self.invalidate("image")
+
+    def set_working_scale(self, working_scale: float) -> None:
+        """
+        Change the working resolution, only the results computed at it are computed again.
+
+        Args:
+            working_scale (float): Fraction of the image resolution, in (0, 1].
+
+        Raises:
+            ValueError: If the working scale is not in (0, 1].
+        """
+        if not 0 < working_scale <= 1:
+            raise ValueError(
+                f"Working scale {working_scale} must be in (0, 1].")
+        self.working_scale = working_scale
+        self.invalidate("working_image_rgb")
 
     def log(self, msg: str):
         """
@@ -93,152 +416,80 @@ class WoundImage:
         """
         Display all processed images in a single plot.
 
-        This method saves all intermediate images to a temporary directory,
-        displays them in a grid, and then cleans up the temporary files.
-        """
-        current_dir = os.path.join(self._temp_dir, str(uuid.uuid4()))
-        cof = os.path.join(self._temp_dir, "pwat_data.csv")
-        fe = ".png"
-        os.makedirs(self._temp_dir, exist_ok=True)
-        self.log(f"Created {self._temp_dir}")
-        self.save_all(
-            img_output_dir=current_dir,
-            csv_output_file=cof,
-            file_extension=fe)
-
-        def get_save_path(filename: str) -> str:
-            return os.path.join(current_dir, filename + fe)
-
-        files = [
-            "original",
-            "segmentation_mask",
-            "segmentation_semantic",
-            "mask_wound",
-            "mask_peri_wound",
-            "masked_wound",
-            "masked_peri_wound",
-            "pwat_estimation"
-        ]
-        fig, axes = plt.subplots(2, 4)
-        fig.subplots_adjust(
-            left=0,
-            right=1,
-            top=1,
-            bottom=0,
-            wspace=0,
-            hspace=0)
-        axes = axes.ravel()
-        for i in range(len(files)):
-            # Convert BGR to RGB
-            img = cv2.imread(get_save_path(files[i]))[..., ::-1]
-            axes[i].imshow(img)
-            axes[i].axis('off')
-            axes[i].set_title(files[i])
-        plt.gcf().canvas.manager.set_window_title("Plots")
-        plt.show()
-        plt.close()
-        os.remove(cof)
-        self.log(f"Removed {cof}")
-        shutil.rmtree(current_dir)
-        self.log(f"Removed {current_dir}")
+        The processed images are rendered from memory into one contact sheet,
+        see `render_contact_sheet`, without writing any file.
+        """
+        self._show_img(self.render_contact_sheet(
+            thumbnail_width=self.CONTACT_SHEET_THUMBNAIL_WIDTH), "Plots")
 
     def show_original(self):
         """
         Display the original image.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_original(current_file)
-        self._show_img(current_file, "original")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_original(), "original")
 
     def show_segmentation_mask(self):
         """
         Display the segmentation mask.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_segmentation_mask(current_file)
-        self._show_img(current_file, "segmentation_mask")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_segmentation_mask(), "segmentation_mask")
 
     def show_segmentation_semantic(self):
         """
         Display the semantic segmentation with contours.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_segmentation_semantic(current_file)
-        self._show_img(current_file, "segmentation_semantic")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(
+            self.render_segmentation_semantic(),
+            "segmentation_semantic")
 
     def show_mask_wound(self):
         """
         Display the wound mask.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_mask_wound(current_file)
-        self._show_img(current_file, "mask_wound")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_mask_wound(), "mask_wound")
 
     def show_mask_peri_wound(self):
         """
         Display the peri-wound mask.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_mask_peri_wound(current_file)
-        self._show_img(current_file, "mask_peri_wound")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_mask_peri_wound(), "mask_peri_wound")
 
     def show_masked_wound(self):
         """
         Display the image with only the wound area visible.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_masked_wound(current_file)
-        self._show_img(current_file, "masked_wound")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_masked_wound(), "masked_wound")
 
     def show_masked_peri_wound(self):
         """
         Display the image with only the peri-wound area visible.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_masked_peri_wound(current_file)
-        self._show_img(current_file, "masked_peri_wound")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_masked_peri_wound(), "masked_peri_wound")
 
     def show_pwat_estimation(self):
         """
         Display the PWAT estimation overlay on the image.
         """
-        current_file = os.path.join(self._temp_dir, str(uuid.uuid4()) + ".png")
-        self.save_pwat_estimation(current_file)
-        self._show_img(current_file, "pwat_estimation")
-        os.remove(current_file)
-        self.log(f"Removed {current_file}")
+        self._show_img(self.render_pwat_estimation(), "pwat_estimation")
 
-    def _show_img(self, img_path: str, title: str):
+    def _show_img(self, bgr_img: ndarray, title: str):
         """
-        Display an image from the given path.
+        Display an image.
 
         Args:
-            img_path (str): Path to the image file.
+            bgr_img (ndarray): The image in BGR format.
             title (str): Title for the displayed image.
         """
-        img = cv2.imread(img_path)[..., ::-1]  # Convert BGR to RGB
-        plt.imshow(img)
+        plt.imshow(bgr_img[..., ::-1])  # Convert BGR to RGB
+        plt.axis('off')
         plt.title(title)
         plt.gcf().canvas.manager.set_window_title(title)
         plt.show()
         plt.close()
 
     def save_all(self, img_output_dir: str,
-                 csv_output_file: str, file_extension: str):
+                 csv_output_file: str, file_extension: str,
+                 encoder_settings: Optional[dict[str, int]] = None):
         """
         Save all processed images and PWAT data to files.
 
@@ -246,27 +497,141 @@ class WoundImage:
             img_output_dir (str): Directory to save image files.
             csv_output_file (str): Path to save PWAT data as a CSV file.
             file_extension (str): File extension for saved images (e.g., '.png').
+            encoder_settings (dict[str, int] | None): Encoder setting by file extension, see `save_images`.
 
         Raises:
-            ValueError: If the file extension is not a valid image format.
+            ValueError: If the file extension or its encoder setting is not valid.
         """
-        if file_extension not in ('.png', '.jpg', '.jpeg'):
-            raise ValueError(
-                f"{file_extension} is not a valid file extension, try .pgn/.jpeg/.jpg instead.")
-
-        def get_save_path(filename: str) -> str:
-            return os.path.join(img_output_dir, filename + file_extension)
-
-        self.save_original(get_save_path("original"))
-        self.save_segmentation_mask(get_save_path("segmentation_mask"))
-        self.save_segmentation_semantic(get_save_path("segmentation_semantic"))
-        self.save_mask_wound(get_save_path("mask_wound"))
-        self.save_mask_peri_wound(get_save_path("mask_peri_wound"))
-        self.save_masked_wound(get_save_path("masked_wound"))
-        self.save_masked_peri_wound(get_save_path("masked_peri_wound"))
-        self.save_pwat_estimation(get_save_path("pwat_estimation"))
+        self.save_images(img_output_dir, file_extension, encoder_settings)
         self.save_pwat_to_csv(csv_output_file)
 
+    def save_images(self, img_output_dir: str, file_extension: str,
+                    encoder_settings: Optional[dict[str, int]] = None) -> list[str]:
+        """
+        Save all processed images to files, all or none of them.
+
+        The images are rendered one after the other, then encoded and written
+        at the same time on the shared encoder threads, OpenCV releasing the
+        GIL. Each is written to a temporary file of the output directory, and
+        the temporary files only replace the images once all are written: on
+        error they are removed and the images of a previous save are kept.
+
+        Args:
+            img_output_dir (str): Directory to save image files.
+            file_extension (str): File extension for saved images (e.g., '.png').
+            encoder_settings (dict[str, int] | None): Encoder setting by file extension, the PNG compression level (0-9), the JPEG quality (0-100) or the WebP quality (1-100), OpenCV default if missing.
+
+        Returns:
+            list[str]: Paths of the saved images.
+
+        Raises:
+            ValueError: If the file extension or its encoder setting is not valid.
+        """
+        params = self._encoder_params(file_extension, encoder_settings)
+        file_paths = [os.path.join(img_output_dir, artifact + file_extension)
+                      for artifact in self.ARTIFACTS]
+        for file_path in file_paths:
+            self._valid_image_path(file_path)
+        if img_output_dir and not os.path.exists(img_output_dir):
+            os.makedirs(img_output_dir, exist_ok=True)
+            self.log(f"Created {img_output_dir}")
+
+        pool = self._get_encoder_pool()
+        futures: list[Future] = []
+        try:
+            for artifact, file_path in zip(self.ARTIFACTS, file_paths):
+                img = self.render(artifact)
+                if self._scratch is not None and np.shares_memory(
+                        img, self._scratch):
+                    # The next render overwrites the scratch buffer
+                    img = img.copy()
+                futures.append(pool.submit(
+                    self._write_temp_img, file_path, img, params))
+            temp_paths = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled() and future.exception() is None:
+                    os.remove(future.result())
+            raise
+
+        for temp_path, file_path in zip(temp_paths, file_paths):
+            os.replace(temp_path, file_path)
+            self.log(f"Created {file_path}")
+        return file_paths
+
+    def _write_temp_img(self, file_path: str, bgr_img: ndarray,
+                        params: list[int]) -> str:
+        """
+        Encode an image and write it next to its file, under a temporary name.
+
+        Args:
+            file_path (str): Path the image is saved to, its extension giving the format.
+            bgr_img (ndarray): The image in BGR format.
+            params (list[int]): OpenCV encoder parameters, see `_encoder_params`.
+
+        Returns:
+            str: Path of the temporary file, with the encoded image.
+
+        Raises:
+            ValueError: If OpenCV cannot encode the image.
+        """
+        content = self._encode_img(
+            os.path.splitext(file_path)[1], bgr_img, params)
+        dir_path, file_name = os.path.split(file_path)
+        temp_path = os.path.join(
+            dir_path, f".{file_name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with self._stage("save"), open(temp_path, "xb") as file:
+                file.write(content)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return temp_path
+
+    @classmethod
+    def _get_encoder_pool(cls) -> ThreadPoolExecutor:
+        """
+        Get the threads encoding and writing images, started once per process.
+
+        Returns:
+            ThreadPoolExecutor: The pool of `ENCODER_WORKERS` threads.
+        """
+        with cls._encoder_pool_lock:
+            if cls._encoder_pool is None:
+                cls._encoder_pool = ThreadPoolExecutor(
+                    max_workers=cls.ENCODER_WORKERS, thread_name_prefix="wound-image-encoder")
+            return cls._encoder_pool
+
+    def _encoder_params(self, file_extension: str,
+                        encoder_settings: Optional[dict[str, int]] = None) -> list[int]:
+        """
+        Get the OpenCV encoder parameters of a file extension.
+
+        Args:
+            file_extension (str): Image format of the encoding (e.g., '.png').
+            encoder_settings (dict[str, int] | None): Encoder setting by file extension, see `save_images`.
+
+        Returns:
+            list[int]: The OpenCV flag and value of the setting, empty for the OpenCV default.
+
+        Raises:
+            ValueError: If the file extension or its encoder setting is not valid.
+        """
+        if file_extension not in self.ENCODER_SETTINGS:
+            raise ValueError(
+                f"{file_extension} is not a valid file extension, try {'/'.join(self.ENCODER_SETTINGS)} instead.")
+        value = (encoder_settings or {}).get(file_extension)
+        if value is None:
+            return []
+        flag, minimum, maximum = self.ENCODER_SETTINGS[file_extension]
+        if not minimum <= value <= maximum:
+            raise ValueError(
+                f"{file_extension} encoder setting must be between {minimum} and {maximum}.")
+        return [flag, int(value)]
+
     def save_original(self, file_path: str):
         """
         Save the original image to a file.
@@ -274,7 +639,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the image.
         """
-        self._save_img(file_path, self.get_image().copy())
+        self._save_img(file_path, self.render_original())
 
     def save_segmentation_mask(self, file_path: str):
         """
@@ -283,7 +648,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the mask.
         """
-        self._save_img(file_path, self.get_segmentation().copy())
+        self._save_img(file_path, self.render_segmentation_mask())
 
     def save_segmentation_semantic(self, file_path: str):
         """
@@ -292,16 +657,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the image.
         """
-        img = self.get_image().copy()
-        contours_body, _ = cv2.findContours(
-            self.get_body_mask().copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE
-        )
-        contours_wound, _ = cv2.findContours(
-            self.get_wound_mask().copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE
-        )
-        cv2.drawContours(img, contours_body, -1, RGB.BLUE, 2)
-        cv2.drawContours(img, contours_wound, -1, RGB.GREEN, 2)
-        self._save_img(file_path, img)
+        self._save_img(file_path, self.render_segmentation_semantic())
 
     def save_mask_wound(self, file_path: str):
         """
@@ -310,12 +666,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the mask.
         """
-        img = self.get_image().copy()
-        contours_wound, _ = cv2.findContours(
-            self.get_wound_mask().copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE
-        )
-        cv2.drawContours(img, contours_wound, -1, RGB.GREEN, 2)
-        self._save_img(file_path, img)
+        self._save_img(file_path, self.render_mask_wound())
 
     def save_mask_peri_wound(self, file_path: str):
         """
@@ -324,12 +675,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the mask.
         """
-        img = self.get_image().copy()
-        contours_peri_wound, _ = cv2.findContours(
-            self.get_peri_wound_mask().copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE
-        )
-        cv2.drawContours(img, contours_peri_wound, -1, RGB.GREEN, 2)
-        self._save_img(file_path, img)
+        self._save_img(file_path, self.render_mask_peri_wound())
 
     def save_masked_wound(self, file_path: str):
         """
@@ -338,7 +684,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the image.
         """
-        self._save_img(file_path, self.get_wound_masked().copy())
+        self._save_img(file_path, self.render_masked_wound())
 
     def save_masked_peri_wound(self, file_path: str):
         """
@@ -347,7 +693,7 @@ class WoundImage:
         Args:
             file_path (str): Path to save the image.
         """
-        self._save_img(file_path, self.get_peri_wound_masked().copy())
+        self._save_img(file_path, self.render_masked_peri_wound())
 
     def save_pwat_estimation(self, file_path: str):
         """
@@ -356,16 +702,206 @@ class WoundImage:
         Args:
             file_path (str): Path to save the image.
         """
-        img = self.get_image().copy()
-        contours_wound, _ = cv2.findContours(
-            self.get_wound_mask().copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE
-        )
-        cv2.drawContours(img, contours_wound, -1, RGB.GREEN, 2)
+        self._save_img(file_path, self.render_pwat_estimation())
+
+    def encode(self, artifact: str, file_extension: str,
+               quality: Optional[int] = None) -> bytes:
+        """
+        Encode a processed image in memory.
+
+        Args:
+            artifact (str): Name of the processed image, one of `ARTIFACTS`.
+            file_extension (str): Image format of the encoding (e.g., '.png').
+            quality (int | None): JPEG or WebP quality, see `save_images`, OpenCV default if None, ignored for PNG.
+
+        Returns:
+            bytes: The encoded image.
+
+        Raises:
+            ValueError: If the artifact, the file extension or the quality is not valid.
+        """
+        encoder_settings = {
+            file_extension: quality} if file_extension != ".png" else None
+        params = self._encoder_params(file_extension, encoder_settings)
+        return self._encode_img(file_extension, self.render(artifact), params)
+
+    def render(self, artifact: str) -> ndarray:
+        """
+        Render a processed image.
+
+        Args:
+            artifact (str): Name of the processed image, one of `ARTIFACTS` or `CONTACT_SHEET`.
+
+        Returns:
+            ndarray: The rendered BGR image, see the `render_*` methods for how long it stays valid.
+
+        Raises:
+            ValueError: If the artifact is not valid.
+        """
+        if artifact == self.CONTACT_SHEET:
+            return self.render_contact_sheet(
+                thumbnail_width=self.CONTACT_SHEET_THUMBNAIL_WIDTH)
+        if artifact not in self.ARTIFACTS:
+            raise ValueError(
+                f"{artifact} is not a valid artifact, try one of {', '.join(self.ARTIFACTS)} or {self.CONTACT_SHEET} instead.")
+        with self._stage("render"):
+            return getattr(self, "render_" + artifact)()
+
+    def render_contact_sheet(self, artifacts: Optional[Iterable[str]] = None,
+                             columns: int = 4,
+                             thumbnail_width: Optional[int] = None) -> ndarray:
+        """
+        Render processed images side by side in one mosaic, each titled with its name.
+
+        Every image is rendered in memory and copied, or downscaled, into its
+        place of the mosaic right away, so the renders can share the scratch
+        buffer.
+
+        Args:
+            artifacts (Iterable[str] | None): Names of the processed images, all of `ARTIFACTS` if None.
+            columns (int): Number of images per row.
+            thumbnail_width (int | None): Width each image is downscaled to, the image resolution if None.
+
+        Returns:
+            ndarray: The new BGR mosaic, rows of `columns` images of the same size.
+
+        Raises:
+            ValueError: If an artifact, the number of columns or the thumbnail width is not valid.
+        """
+        artifacts = tuple(
+            artifacts) if artifacts is not None else self.ARTIFACTS
+        if not artifacts or columns < 1 or (
+                thumbnail_width is not None and thumbnail_width < 1):
+            raise ValueError(
+                "A contact sheet needs artifacts, columns and a positive thumbnail width.")
+        for artifact in artifacts:
+            if artifact not in self.ARTIFACTS:
+                raise ValueError(
+                    f"{artifact} is not a valid artifact, try one of {', '.join(self.ARTIFACTS)} instead.")
+        height, width = self.get_image().shape[:2]
+        if thumbnail_width is not None and thumbnail_width < width:
+            # Never upscaled
+            width, height = thumbnail_width, max(
+                1, round(height * thumbnail_width / width))
+        columns = min(columns, len(artifacts))
+        rows = -(-len(artifacts) // columns)
+        sheet = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        font_scale = 0.5
+        font_thickness = 1
+        for index, artifact in enumerate(artifacts):
+            row, column = divmod(index, columns)
+            y, x = row * height, column * width
+            img = self.render(artifact)
+            if img.shape[:2] != (height, width):
+                # Area interpolation averages the pixels instead of aliasing
+                # them
+                img = cv2.resize(
+                    img, (width, height), interpolation=cv2.INTER_AREA)
+            sheet[y:y + height, x:x + width] = img
+            # Countour
+            cv2.putText(sheet, artifact, (x + 5, y + 15), font, font_scale,
+                        RGB.to_bgr(RGB.WHITE), font_thickness + 1, cv2.LINE_AA)
+            # Text
+            cv2.putText(sheet, artifact, (x + 5, y + 15), font, font_scale,
+                        RGB.to_bgr(RGB.BLACK), font_thickness, cv2.LINE_AA)
+        return sheet
+
+    def render_original(self) -> ndarray:
+        """
+        Render the original image.
+
+        Returns:
+            ndarray: The BGR image itself, it must not be modified.
+        """
+        return self.get_image()
+
+    def render_segmentation_mask(self) -> ndarray:
+        """
+        Render the segmentation mask, with the wound in red, the body in green and the background in blue.
+
+        Returns:
+            ndarray: The rendered BGR image, in the scratch buffer overwritten by the next render.
+        """
+        return np.take(self.LABEL_PALETTE, self.get_labels(), axis=0,
+                       out=self._get_scratch())
+
+    def render_segmentation_semantic(self) -> ndarray:
+        """
+        Render the semantic segmentation with contours.
+
+        Returns:
+            ndarray: The rendered BGR image, in the scratch buffer overwritten by the next render.
+        """
+        img = self._get_scratch()
+        np.copyto(img, self.get_image())
+        cv2.drawContours(img, self.get_body_contours(), -
+                         1, RGB.to_bgr(RGB.BLUE), 2)
+        cv2.drawContours(img, self.get_wound_contours(), -
+                         1, RGB.to_bgr(RGB.GREEN), 2)
+        return img
+
+    def render_mask_wound(self) -> ndarray:
+        """
+        Render the wound mask.
+
+        Returns:
+            ndarray: The rendered BGR image, in the scratch buffer overwritten by the next render.
+        """
+        img = self._get_scratch()
+        np.copyto(img, self.get_image())
+        cv2.drawContours(img, self.get_wound_contours(), -
+                         1, RGB.to_bgr(RGB.GREEN), 2)
+        return img
+
+    def render_mask_peri_wound(self) -> ndarray:
+        """
+        Render the peri-wound mask.
+
+        Returns:
+            ndarray: The rendered BGR image, in the scratch buffer overwritten by the next render.
+        """
+        img = self._get_scratch()
+        np.copyto(img, self.get_image())
+        cv2.drawContours(img, self.get_peri_wound_contours(), -
+                         1, RGB.to_bgr(RGB.GREEN), 2)
+        return img
+
+    def render_masked_wound(self) -> ndarray:
+        """
+        Render the image with only the wound area visible.
+
+        Returns:
+            ndarray: The cached BGR image itself, it must not be modified.
+        """
+        return self.get_wound_masked()
+
+    def render_masked_peri_wound(self) -> ndarray:
+        """
+        Render the image with only the peri-wound area visible.
+
+        Returns:
+            ndarray: The cached BGR image itself, it must not be modified.
+        """
+        return self.get_peri_wound_masked()
+
+    def render_pwat_estimation(self) -> ndarray:
+        """
+        Render the PWAT estimation overlay on the image.
+
+        Returns:
+            ndarray: The rendered BGR image, in the scratch buffer overwritten by the next render.
+        """
+        img = self._get_scratch()
+        np.copyto(img, self.get_image())
+        cv2.drawContours(img, self.get_wound_contours(), -
+                         1, RGB.to_bgr(RGB.GREEN), 2)
         font = cv2.FONT_HERSHEY_SIMPLEX
         font_scale = 0.6
         font_thickness = 1
-        text_color = RGB.BLACK
-        border_color = RGB.WHITE
+        text_color = RGB.to_bgr(RGB.BLACK)
+        border_color = RGB.to_bgr(RGB.WHITE)
         line_type = cv2.LINE_AA
         x, y = 10, 30
 
@@ -392,7 +928,7 @@ class WoundImage:
         y += 20
         pwat_clinical = self.get_clinical_pwat()
 
-        if pwat_clinical > 0.0:
+        if pwat_clinical is not None:
             # Countour
             cv2.putText(
                 img,
@@ -434,7 +970,7 @@ class WoundImage:
             text_color,
             font_thickness,
             line_type)
-        self._save_img(file_path, img)
+        return img
 
     def _save_img(self, file_path: str, bgr_img: ndarray):
         """
@@ -453,10 +989,34 @@ class WoundImage:
             if not os.path.exists(dir_path):
                 os.makedirs(dir_path, exist_ok=True)
                 self.log(f"Created {dir_path}")
-        rgb_img = bgr_img[..., ::-1]  # Convert BGR to RGB
-        cv2.imwrite(file_path, rgb_img)
+        with self._stage("save"):
+            cv2.imwrite(file_path, bgr_img)
         self.log(f"Created {file_path}")
 
+    def _encode_img(self, file_extension: str, bgr_img: ndarray,
+                    params: Optional[list[int]] = None) -> bytes:
+        """
+        Encode an image in memory.
+
+        Args:
+            file_extension (str): Image format of the encoding (e.g., '.png').
+            bgr_img (ndarray): The image in BGR format.
+            params (list[int] | None): OpenCV encoder parameters, see `_encoder_params`.
+
+        Returns:
+            bytes: The encoded image.
+
+        Raises:
+            ValueError: If OpenCV cannot encode the image.
+        """
+        with self._stage("encode"):
+            success, buffer = cv2.imencode(
+                file_extension, bgr_img, params or [])
+        if not success:
+            raise ValueError(
+                f"Image could not be encoded as {file_extension}.")
+        return buffer.tobytes()
+
     def save_pwat_to_csv(self, file_path: str) -> None:
         """
         Save PWAT data to a CSV file.
@@ -464,6 +1024,39 @@ class WoundImage:
         Args:
             file_path (str): Path to save the CSV file.
 
+        Raises:
+            ValueError: If the file path is not a valid folder architecure or .csv file format.
+            ValueError: If the CSV header of an existing CSV not match the expected format.
+        """
+        self.append_pwat_rows(file_path, [self.get_pwat_row()], self.logging)
+
+    def get_pwat_row(self) -> list:
+        """
+        Get the PWAT data of the image as a CSV row.
+
+        Returns:
+            list: The image path, clinical score (None if not labelled), predicted score and timestamp, matching `CSV_HEADER`.
+        """
+        return [
+            self.image_path,
+            self.get_clinical_pwat(),
+            self.get_predicted_pwat(),
+            datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        ]
+
+    @classmethod
+    def append_pwat_rows(cls, file_path: str,
+                         rows: list[list], logging: bool) -> None:
+        """
+        Append PWAT rows, as given by `get_pwat_row`, to a CSV file.
+
+        The file is opened for this call only, keep a `ResultsWriter` open to stream many rows.
+
+        Args:
+            file_path (str): Path to save the CSV file.
+            rows (list[list]): The rows to append.
+            logging (bool): Whether to enable logging for debugging purposes.
+
         Raises:
             ValueError: If the file path is not a valid folder architecure or .csv file format.
             ValueError: If the CSV header of an existing CSV not match the expected format.
@@ -474,129 +1067,272 @@ class WoundImage:
             raise ValueError(
                 f"File {file_path} not a good format for .csv with folders.")
 
-        header = ["image", "clinical_score", "predictional_score", "timestamp"]
-
-        # If the file dont exist, create it and add header
-        if not os.path.exists(file_path):
-            dir_path = os.path.dirname(file_path)
-            if dir_path:
-                if not os.path.exists(dir_path):
-                    os.makedirs(dir_path, exist_ok=True)
-                    self.log(f"Created {dir_path}")
-            with open(file_path, mode="w", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow(header)
-            self.log(f"Created {file_path}")
-        # Else check if its a valid header
-        else:
-            with open(file_path, mode="r", newline="") as file:
-                reader = csv.reader(file)
-                existing_header = next(reader, None)
-                if existing_header != header:
-                    raise ValueError(
-                        "CSV header does not match expected format!")
-
-        # Write data
-        with open(file_path, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                self.image_path,
-                self.get_clinical_pwat(),
-                self.get_predicted_pwat(),
-                datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            ])
-        self.log(f"Edited {file_path}")
-
-    def process(self) -> None:
-        """
-        Process the image by updating segmentation, masks, and PWAT scores.
-        """
-        self._update_image()
-        self._update_segmentation()
-        self._update_masks()
-        self._update_wound_masked()
-        self._update_peri_wound_mask()
-        self._update_peri_wound_masked()
-        self._update_predicted_pwat()
-        self._update_clinical_pwat()
+        with CsvResultsWriter(file_path, cls.CSV_HEADER, flush_every=max(len(rows), 1),
+                              logging=logging) as writer:
+            writer.write_rows(rows)
+
+    def process(self, workers: int = 1) -> None:
+        """
+        Process the image by computing every node of the processing graph, see `compute` to compute only some.
+
+        Args:
+            workers (int): Number of threads computing the independent nodes.
+        """
+        self.compute(self.NODES, workers)
 
     def get_image(self) -> ndarray:
         """
         Get the original image as a NumPy array.
 
         Returns:
-            ndarray: The loaded image.
+            ndarray: The loaded image, contiguous in the BGR order of OpenCV.
         """
-        if self._image is None:
-            self._update_image()
+        self._ensure("image")
         return self._image
 
     def _update_image(self) -> None:
         """
-        Load and update the original image.
+        Load and update the original image, from memory if image data was given.
+
+        Raises:
+            ImageDecodeError: If the image cannot be decoded.
         """
-        rgb_img = cv2.imread(self.image_path)
-        bgr_img = rgb_img[..., ::-1]  # Convert BGR to RGB
+        if isinstance(self._image_data, ndarray):
+            bgr_img = np.ascontiguousarray(self._image_data)
+        elif self._image_data is not None:
+            bgr_img = cv2.imdecode(
+                np.frombuffer(self._image_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        else:
+            bgr_img = cv2.imread(self.image_path)
+        if bgr_img is None:
+            raise ImageDecodeError(
+                f"File {self.image_path} could not be decoded as an image.")
+        # Kept in the OpenCV order, converted only for the models and the plots
         self._image = bgr_img
 
+    def get_image_rgb(self) -> ndarray:
+        """
+        Get the original image in RGB order, as expected by the models.
+
+        Returns:
+            ndarray: The loaded image, contiguous in RGB order.
+        """
+        self._ensure("image_rgb")
+        return self._image_rgb
+
+    def _update_image_rgb(self) -> None:
+        """
+        Update the RGB copy of the original image.
+        """
+        self._image_rgb = cv2.cvtColor(self.get_image(), cv2.COLOR_BGR2RGB)
+
+    def _get_scratch(self) -> ndarray:
+        """
+        Get the buffer the overlays are drawn into, allocated once per image.
+
+        Returns:
+            ndarray: An uninitialized array of the image shape.
+        """
+        if self._scratch is None:
+            self._scratch = np.empty_like(self.get_image())
+        return self._scratch
+
+    def get_working_image_rgb(self) -> ndarray:
+        """
+        Get the RGB image at the working resolution.
+
+        Returns:
+            ndarray: The RGB image, downscaled by `working_scale`.
+        """
+        self._ensure("working_image_rgb")
+        return self._working_image_rgb
+
+    def _update_working_image_rgb(self) -> None:
+        """
+        Update the RGB image at the working resolution.
+        """
+        img = self.get_image_rgb()
+        if self.working_scale == 1:
+            self._working_image_rgb = img
+            return
+        height, width = img.shape[:2]
+        size = (max(1, round(width * self.working_scale)),
+                max(1, round(height * self.working_scale)))
+        # Area interpolation averages the pixels instead of aliasing them
+        self._working_image_rgb = cv2.resize(
+            img, size, interpolation=cv2.INTER_AREA)
+
+    def get_working_labels(self) -> ndarray:
+        """
+        Get the label map of the segmentation at the working resolution.
+
+        Returns:
+            ndarray: The uint8 label map of the working image, see `LABEL_BITS`.
+        """
+        self._ensure("working_segmentation")
+        return self._working_labels
+
+    def get_working_segmentation(self) -> ndarray:
+        """
+        Get the segmentation mask at the working resolution.
+
+        Returns:
+            ndarray: A new segmentation mask of the working image, with the wound, body and background channels.
+        """
+        return self._to_segmentation(self.get_working_labels())
+
+    def _update_working_segmentation(self) -> None:
+        """
+        Perform wound segmentation of the working image, kept as a label map.
+        """
+        key = self._cache_key("labels", tol=self.SEGMENTATION_TOL,
+                              scale=self.working_scale)
+        if key is not None:
+            self._working_labels = self._cache.get(key)
+            if self._working_labels is not None:
+                self.log(f"Segmentation of {self.image_path} found in cache")
+                return
+        self._working_labels = self._to_labels(self._models.segment(
+            img=self.get_working_image_rgb(), tol=self.SEGMENTATION_TOL, verbose=self.logging
+        ))
+        if key is not None:
+            self._cache.put(key, self._working_labels)
+
+    def get_labels(self) -> ndarray:
+        """
+        Get the label map of the segmentation.
+
+        Returns:
+            ndarray: The uint8 label map, at the image resolution, see `LABEL_BITS`.
+        """
+        self._ensure("segmentation")
+        return self._labels
+
     def get_segmentation(self) -> ndarray:
         """
         Get the segmentation mask.
 
         Returns:
-            ndarray: The segmentation mask.
+            ndarray: A new segmentation mask, at the image resolution, with the wound, body and background channels.
         """
-        if self._segmentation is None:
-            self._update_segmentation()
-        return self._segmentation
+        return self._to_segmentation(self.get_labels())
 
     def _update_segmentation(self) -> None:
         """
-        Perform wound segmentation and update the segmentation mask.
+        Update the label map of the segmentation from the one at the working resolution.
         """
-        self._segmentation = wound_segmentation(
-            img=self.get_image(), tol=0.95, verbose=self.logging
-        )
+        self._labels = self._upsample(self.get_working_labels())
+
+    def _to_labels(self, segmentation: ndarray) -> ndarray:
+        """
+        Pack a segmentation mask into a label map, a third of its size.
+
+        Args:
+            segmentation (ndarray): The uint8 segmentation mask in {0, 255}, with one channel per class of `LABEL_BITS`.
+
+        Returns:
+            ndarray: The uint8 label map, the bits of the classes of each pixel set.
+        """
+        # 255 has every bit set, so masking the channels keeps the bit of their
+        # class
+        bits = np.array(tuple(self.LABEL_BITS.values()), dtype=np.uint8)
+        return np.bitwise_or.reduce(segmentation & bits, axis=2)
+
+    def _to_segmentation(self, labels: ndarray) -> ndarray:
+        """
+        Unpack a label map into a segmentation mask.
+
+        Args:
+            labels (ndarray): The uint8 label map.
+
+        Returns:
+            ndarray: The uint8 segmentation mask in {0, 255}, with one channel per class of `LABEL_BITS`.
+        """
+        return cv2.merge([self._class_mask(labels, label)
+                         for label in self.LABEL_BITS])
+
+    def _class_mask(self, labels: ndarray, label: str) -> ndarray:
+        """
+        Get the mask of a class from a label map.
+
+        Args:
+            labels (ndarray): The uint8 label map.
+            label (str): Name of the class, one of `LABEL_BITS`.
+
+        Returns:
+            ndarray: A new uint8 mask in {0, 255}.
+        """
+        return cv2.compare(cv2.bitwise_and(
+            labels, self.LABEL_BITS[label]), 0, cv2.CMP_NE)
+
+    def _upsample(self, mask: ndarray) -> ndarray:
+        """
+        Bring a mask of the working resolution back to the image resolution.
+
+        Args:
+            mask (ndarray): The mask at the working resolution.
+
+        Returns:
+            ndarray: The mask at the image resolution, the same array at full working scale.
+        """
+        height, width = self.get_image().shape[:2]
+        if mask.shape[:2] == (height, width):
+            return mask
+        # Nearest neighbour keeps the masks binary
+        return cv2.resize(mask, (width, height),
+                          interpolation=cv2.INTER_NEAREST)
+
+    def _scale_ksize(self, ksize: tuple[int, int]) -> tuple[int, int]:
+        """
+        Scale a full resolution kernel size to the working resolution.
+
+        Args:
+            ksize (tuple[int, int]): The kernel size at full resolution.
+
+        Returns:
+            tuple[int, int]: The kernel size at the working resolution.
+        """
+        return tuple(max(1, round(k * self.working_scale)) for k in ksize)
 
     def get_wound_mask(self) -> ndarray:
         """
         Get the wound mask.
 
         Returns:
-            ndarray: The wound mask.
+            ndarray: A new wound mask, read from the label map.
         """
-        if self._wound_mask is None:
-            self._update_masks()
-        return self._wound_mask
+        return self._class_mask(self.get_labels(), "wound")
 
     def get_body_mask(self) -> ndarray:
         """
         Get the body mask.
 
         Returns:
-            ndarray: The body mask.
+            ndarray: A new body mask, read from the label map.
         """
-        if self._body_mask is None:
-            self._update_masks()
-        return self._body_mask
+        return self._class_mask(self.get_labels(), "body")
 
     def get_bg_mask(self) -> ndarray:
         """
         Get the background mask.
 
         Returns:
-            ndarray: The background mask.
+            ndarray: A new background mask, read from the label map.
         """
-        if self._bg_mask is None:
-            self._update_masks()
-        return self._bg_mask
+        return self._class_mask(self.get_labels(), "background")
 
-    def _update_masks(self) -> None:
+    def get_masks(self) -> dict[str, ndarray]:
         """
-        Update the wound, body, and background masks.
+        Get the masks of every segmented area.
+
+        Returns:
+            dict[str, ndarray]: The new wound, body and background masks, and the peri-wound mask, by name.
         """
-        self._wound_mask, self._body_mask, self._bg_mask = cv2.split(
-            self.get_segmentation())
+        labels = self.get_labels()
+        masks = {label: self._class_mask(labels, label)
+                 for label in self.LABEL_BITS}
+        masks["peri_wound"] = self.get_peri_wound_mask()
+        return masks
 
     def get_wound_masked(self) -> ndarray:
         """
@@ -605,8 +1341,7 @@ class WoundImage:
         Returns:
             ndarray: The wound mask image.
         """
-        if self._wound_masked is None:
-            self._update_wound_masked()
+        self._ensure("wound_masked")
         return self._wound_masked
 
     def _update_wound_masked(self) -> None:
@@ -624,25 +1359,23 @@ class WoundImage:
         Returns:
             ndarray: The peri-wound mask.
         """
-        if self._peri_wound_mask is None:
-            self._update_peri_wound_mask()
+        self._ensure("peri_wound_mask")
         return self._peri_wound_mask
 
     def _update_peri_wound_mask(self) -> None:
         """
-        Update the peri-wound masks.
+        Update the peri-wound mask, computed at the working resolution.
         """
-        wound_mask = self.get_wound_mask()
+        labels = self.get_working_labels()
+        wound_mask = self._class_mask(labels, "wound")
+        body_mask = self._class_mask(labels, "body")
         pwm = get_perilesion_mask(
-            # NOTE: You can play with ksize parameter (tuple[int, int]) but can
-            # give wrong predicion and it could probably depend of the file
-            # dimension (dynamic ksize)
-            ksize=(20, 20),
+            ksize=self._scale_ksize(self.PERI_WOUND_KSIZE),
             mask=wound_mask
         )
-        self._peri_wound_mask = cv2.bitwise_and(
-            pwm, pwm, mask=imfill(self.get_body_mask() | wound_mask)
-        )
+        self._peri_wound_mask = self._upsample(cv2.bitwise_and(
+            pwm, pwm, mask=imfill(body_mask | wound_mask)
+        ))
 
     def get_peri_wound_masked(self) -> ndarray:
         """
@@ -651,8 +1384,7 @@ class WoundImage:
         Returns:
             ndarray: The peri-wound mask image.
         """
-        if self._peri_wound_masked is None:
-            self._update_peri_wound_masked()
+        self._ensure("peri_wound_masked")
         return self._peri_wound_masked
 
     def _update_peri_wound_masked(self) -> None:
@@ -664,6 +1396,69 @@ class WoundImage:
             img, img, mask=self.get_peri_wound_mask()
         )
 
+    def get_wound_contours(self) -> tuple:
+        """
+        Get the contours of the wound mask.
+
+        Returns:
+            tuple: The wound contours, shared by every render.
+        """
+        self._ensure("wound_contours")
+        return self._wound_contours
+
+    def _update_wound_contours(self) -> None:
+        """
+        Update the contours of the wound mask.
+        """
+        self._wound_contours = self._find_contours(self.get_wound_mask())
+
+    def get_body_contours(self) -> tuple:
+        """
+        Get the contours of the body mask.
+
+        Returns:
+            tuple: The body contours, shared by every render.
+        """
+        self._ensure("body_contours")
+        return self._body_contours
+
+    def _update_body_contours(self) -> None:
+        """
+        Update the contours of the body mask.
+        """
+        self._body_contours = self._find_contours(self.get_body_mask())
+
+    def get_peri_wound_contours(self) -> tuple:
+        """
+        Get the contours of the peri-wound mask.
+
+        Returns:
+            tuple: The peri-wound contours, shared by every render.
+        """
+        self._ensure("peri_wound_contours")
+        return self._peri_wound_contours
+
+    def _update_peri_wound_contours(self) -> None:
+        """
+        Update the contours of the peri-wound mask.
+        """
+        self._peri_wound_contours = self._find_contours(
+            self.get_peri_wound_mask())
+
+    def _find_contours(self, mask: ndarray) -> tuple:
+        """
+        Find the contours of a mask.
+
+        Args:
+            mask (ndarray): The binary mask, left untouched by OpenCV.
+
+        Returns:
+            tuple: The contours of the mask.
+        """
+        contours, _ = cv2.findContours(
+            mask, cv2.RETR_TREE, self.contour_approx)
+        return contours
+
     def get_predicted_pwat(self) -> float:
         """
         Get the predicted PWAT.
@@ -671,41 +1466,160 @@ class WoundImage:
         Returns:
             float: The predicted PWAT.
         """
-        if self._predicted_pwat is None:
-            self._update_predicted_pwat()
+        self._ensure("predicted_pwat")
         return self._predicted_pwat
 
     def _update_predicted_pwat(self) -> None:
         """
         Update the predicted PWAT.
         """
-        self._predicted_pwat = evaluate_PWAT_score(
-            # NOTE: You can play with ksize parameter (tuple[int, int]) but can
-            # give wrong predicion and it could probably depend of the file
-            # dimension (dynamic ksize)
-            ksize=(65, 65),
-            img=self.get_image(), mask=self.get_segmentation(), verbose=self.logging
+        key = self._cache_key(
+            "predicted_pwat", tol=self.SEGMENTATION_TOL, ksize=self.PWAT_KSIZE,
+            scale=self.working_scale)
+        if key is not None:
+            self._predicted_pwat = self._cache.get(key)
+            if self._predicted_pwat is not None:
+                self.log(f"Predicted PWAT of {self.image_path} found in cache")
+                return
+        self._predicted_pwat = self._models.pwat(
+            ksize=self._scale_ksize(self.PWAT_KSIZE),
+            img=self.get_working_image_rgb(), mask=self.get_working_segmentation(),
+            verbose=self.logging
         )
+        if key is not None:
+            self._cache.put(key, self._predicted_pwat)
+
+    def get_mask_statistics(self) -> dict[str, float]:
+        """
+        Get the size of the segmented areas.
+
+        Returns:
+            dict[str, float]: The image size, the wound, body and peri-wound areas in pixels and their fraction of the image.
+        """
+        wound_mask = self.get_wound_mask()
+        height, width = wound_mask.shape[:2]
+        total = height * width
+        wound_area = cv2.countNonZero(wound_mask)
+        body_area = cv2.countNonZero(self.get_body_mask())
+        peri_wound_area = cv2.countNonZero(self.get_peri_wound_mask())
+        return {
+            "width": width,
+            "height": height,
+            "wound_area": wound_area,
+            "body_area": body_area,
+            "peri_wound_area": peri_wound_area,
+            "wound_fraction": wound_area / total,
+            "body_fraction": body_area / total,
+            "peri_wound_fraction": peri_wound_area / total,
+        }
+
+    def get_morphometrics(self, pixel_size: Optional[float] = None) -> dict:
+        """
+        Get the size, shape and color of the wound and peri-wound areas.
 
-    def get_clinical_pwat(self) -> float:
+        Args:
+            pixel_size (float | None): Side of a pixel in millimeters, the physical sizes are None if unknown.
+
+        Returns:
+            dict: The image size and pixel size, and for the `wound` and `peri_wound` areas their area and perimeter in pixels and millimeters, bounding box and RGB color mean, standard deviation and histogram.
+
+        Raises:
+            ValueError: If the pixel size is not positive.
+        """
+        if pixel_size is not None and pixel_size <= 0:
+            raise ValueError("Pixel size must be positive.")
+        self._ensure("morphometrics")
+        height, width = self.get_image().shape[:2]
+        morphometrics = {
+            "width": width,
+            "height": height,
+            "pixel_size_mm": pixel_size}
+        for region, metrics in self._morphometrics.items():
+            morphometrics[region] = {
+                **metrics,
+                "area_mm2": metrics["area_px"] * pixel_size ** 2 if pixel_size else None,
+                "perimeter_mm": metrics["perimeter_px"] * pixel_size if pixel_size else None,
+            }
+        return morphometrics
+
+    def _update_morphometrics(self) -> None:
+        """
+        Update the morphometrics of the wound and peri-wound areas, each read in a few OpenCV passes over its mask.
         """
-        Get the clinical PWAT.
+        img = self.get_image()
+        regions = {
+            "wound": (self.get_wound_mask(), self.get_wound_contours()),
+            "peri_wound": (self.get_peri_wound_mask(), self.get_peri_wound_contours()),
+        }
+        morphometrics = {}
+        for region, (mask, contours) in regions.items():
+            mean, std = cv2.meanStdDev(img, mask=mask)
+            # BGR channels, listed in RGB order
+            histograms = [cv2.calcHist([img], [channel], mask, [self.HISTOGRAM_BINS], [0, 256])
+                          for channel in (2, 1, 0)]
+            morphometrics[region] = {
+                "area_px": cv2.countNonZero(mask),
+                # Holes included, as the contours are
+                "perimeter_px": float(sum(cv2.arcLength(contour, True) for contour in contours)),
+                "bounding_box": list(cv2.boundingRect(mask)),
+                "color_mean": mean.ravel()[::-1].tolist(),
+                "color_std": std.ravel()[::-1].tolist(),
+                "color_histogram": {
+                    color: histogram.ravel().astype(int).tolist()
+                    for color, histogram in zip(("red", "green", "blue"), histograms)
+                },
+            }
+        self._morphometrics = morphometrics
+
+    def get_morphometrics_row(
+            self, pixel_size: Optional[float] = None) -> list:
+        """
+        Get the morphometrics of the image as a CSV row, without the color histograms.
+
+        Args:
+            pixel_size (float | None): Side of a pixel in millimeters, the physical sizes are None if unknown.
 
         Returns:
-            float: The clinical PWAT.
+            list: The image path, pixel size and the morphometrics of each area, matching `MORPHOMETRICS_HEADER`.
+        """
+        morphometrics = self.get_morphometrics(pixel_size)
+        row = [self.image_path, pixel_size]
+        for region in ("wound", "peri_wound"):
+            metrics = morphometrics[region]
+            row += [metrics["area_px"], metrics["area_mm2"],
+                    metrics["perimeter_px"], metrics["perimeter_mm"],
+                    *metrics["bounding_box"], *metrics["color_mean"], *metrics["color_std"]]
+        return row
+
+    def get_clinical_pwat(self) -> Optional[float]:
+        """
+        Get the clinical PWAT, as given at initialization.
+
+        Returns:
+            float | None: The clinical PWAT, None if the image is not labelled.
         """
-        if self._clinical_pwat is None:
-            self._update_clinical_pwat()
         return self._clinical_pwat
 
-    def _update_clinical_pwat(self) -> None:
+    def _cache_key(self, stage: str, **params) -> Optional[str]:
         """
-        Update the clinical PWAT.
+        Get the cache key of a result of this image.
+
+        The version of the models is part of the key, so the results of
+        another backend or exported model are not reused.
+
+        Args:
+            stage (str): Name of the result.
+            **params: Parameters the result depends on.
+
+        Returns:
+            str | None: The key, None if no cache is used.
         """
-        # TODO: handle clinical labelisation by setting '_clinical_pwat' as init param
-        # For 'wound_image' list that use input folder, add inside a .csv
-        # or something like that and handle it
-        self._clinical_pwat = 0.0
+        if self._cache is None:
+            return None
+        if self._image_digest is None:
+            self._image_digest = self._cache.digest(self.get_image())
+        return self._cache.key(self._image_digest, stage,
+                               model=model_registry.version(), **params)
 
     def _valid_image_path(self, image_path):
         """
@@ -717,8 +1631,8 @@ class WoundImage:
         Raises:
             ValueError: If the image path is not a valid folder architecure or file format.
         """
-        pattern = r"^(?:[A-Za-z]:\\|/)?(?:[\w\s.-]+[/\\])*[\w\s.-]+\.(?:png|jpe?g)$"
+        pattern = r"^(?:[A-Za-z]:\\|/)?(?:[\w\s.-]+[/\\])*[\w\s.-]+\.(?:png|jpe?g|webp)$"
         match = re.match(pattern, image_path, re.IGNORECASE)
         if not match:
             raise ValueError(
-                f"File {image_path} not a good format for .png/.jpeg/.jpg with folders.")
+                f"File {image_path} not a good format for .png/.jpeg/.jpg/.webp with folders.")